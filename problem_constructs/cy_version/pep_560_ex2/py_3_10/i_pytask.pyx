@@ -27,17 +27,22 @@ class IPyTask(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def execute(self):
+    def execute(self, deadline=None):
         """ Execute the task.
 
         This a (synchronous) blocking call; this method returns only after the
         task has completed, or throws an exception when it has failed or has
         been aborted.
 
+        :param deadline: time.monotonic() value at which the task is aborted if
+            not completed yet, None for no deadline. Like any abort request it
+            takes effect at the next interruption point of the task.
+
         :raises
         Any exception that occured during the execution of the task.
         PyTaskFailedException, task did not complete due to an error.
         PyTaskAbortedException, task has been aborted.
+        PyTaskTimeoutException, task has been aborted because of its deadline.
         PyTaskInvalidStateException, task cannot be started in the current state.
         """
 
@@ -80,22 +85,30 @@ class IPyTask(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def wait_inactive(self):
+    def wait_inactive(self, timeout=None):
         """ Wait for the task to become inactive.
 
         Specifically wait until the task enters the PyTaskState::Completed,
         PyTaskState::Failed, PyTaskState::Aborted or PyTaskState::Paused
         state.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises
+        PyTaskTimeoutException, task did not become inactive within the timeout.
         """
 
     @abstractmethod
-    def wait_has_started(self):
+    def wait_has_started(self, timeout=None):
         """ Wait for task to have left the PyTaskState::Idle state.
 
         Since the execute() method is typically called from a different thread
         than the pause() and abort() methods, this method can be used to make
         sure that these methods are not called before the task has left the
         PyTaskState::Idle state.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises
+        PyTaskTimeoutException, task did not start within the timeout.
         """
 
     @abstractmethod
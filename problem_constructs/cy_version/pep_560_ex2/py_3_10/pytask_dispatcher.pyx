@@ -0,0 +1,173 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from enum import IntEnum, unique
+from typing import Callable, Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@unique
+class OverflowPolicy(IntEnum):
+    """ What EventDispatcher.dispatch does when its queue is full.
+
+    Block:      wait until there is space, no events are lost but the emitting
+                thread stalls (possibly holding the task state machine lock).
+    DropNewest: discard the event being dispatched.
+    DropOldest: discard the oldest queued event.
+    """
+    Block = 1
+    DropNewest = 2
+    DropOldest = 3
+
+
+class EventDispatcher:
+    """ Delivers events emitted by EventBroadcasters on a dedicated thread, or
+    an executor, instead of on the thread that emits them.
+
+    * Events are queued in a bounded FIFO queue and delivered one at a time,
+      so the order is guaranteed per subscriber (and across subscribers).
+    * The subscribers of an event are those subscribed when it was emitted.
+    * Exceptions raised by subscribers are logged, they cannot be propagated
+      to the emitting thread.
+    * A single dispatcher can be shared by many broadcasters / tasks.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, max_queue_size: int = 1024,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+                 executor: Optional[Executor] = None):
+        """ Initializer.
+
+        :param max_queue_size: maximum number of events queued
+        :param overflow_policy: what to do when the queue is full
+        :param executor: deliver using this executor rather than a dedicated
+            thread (started on first use)
+        """
+        if max_queue_size < 1:
+            raise ValueError('max_queue_size must be at least 1')
+        self._max_queue_size = max_queue_size
+        self._overflow_policy = overflow_policy
+        self._executor = executor
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._queue: Deque[Tuple[Tuple[Callable, ...], tuple, dict]] = deque()
+        self._pending = 0  # queued plus being delivered
+        self._draining = False
+        self._thread: Optional[threading.Thread] = None
+        self._delivering_thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.dropped = 0
+        """ Number of events discarded because the queue was full. """
+
+    def dispatch(self, handlers: Tuple[Callable, ...], args: tuple, kwargs: dict) -> None:
+        """ Queue an event for delivery to the handlers supplied.
+
+        :param handlers: handlers to call
+        :param args: positional arguments for the handlers
+        :param kwargs: keyword arguments for the handlers
+        """
+        if not handlers:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('EventDispatcher is closed')
+
+            if len(self._queue) >= self._max_queue_size:
+                if self._overflow_policy == OverflowPolicy.DropNewest:
+                    self.dropped += 1
+                    return
+                if self._overflow_policy == OverflowPolicy.DropOldest:
+                    self._queue.popleft()
+                    self._pending -= 1
+                    self.dropped += 1
+                elif not self._is_delivering_thread():
+                    # Never block the delivering thread itself: it is the one making space.
+                    while len(self._queue) >= self._max_queue_size and not self._closed:
+                        self._not_full.wait()
+                    if self._closed:
+                        raise RuntimeError('EventDispatcher is closed')
+
+            self._queue.append((handlers, args, kwargs))
+            self._pending += 1
+            if self._executor is not None:
+                if not self._draining:
+                    self._draining = True
+                    self._executor.submit(self._drain)
+            else:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='EventDispatcher',
+                                                    daemon=True)
+                    self._thread.start()
+                self._not_empty.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """ Wait until all queued events have been delivered. Must not be
+        called from a subscriber.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :return: True if all events were delivered, False on timeout
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """ Deliver the queued events, then stop the dedicated thread. Events
+        dispatched after closing raise a RuntimeError.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        """
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread is not None and not self._is_delivering_thread():
+            self._thread.join(timeout)
+
+    def _is_delivering_thread(self) -> bool:
+        return threading.current_thread() is self._delivering_thread
+
+    def _run(self) -> None:
+        self._delivering_thread = threading.current_thread()
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+                if not self._queue:
+                    return
+                event = self._queue.popleft()
+                self._not_full.notify()
+            self._deliver(event)
+
+    def _drain(self) -> None:
+        self._delivering_thread = threading.current_thread()
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._draining = False
+                    self._delivering_thread = None
+                    return
+                event = self._queue.popleft()
+                self._not_full.notify()
+            self._deliver(event)
+
+    def _deliver(self, event: Tuple[Tuple[Callable, ...], tuple, dict]) -> None:
+        handlers, args, kwargs = event
+        for handler in handlers:
+            try:
+                handler(*args, **kwargs)
+            except Exception:
+                logger.exception('event handler %r failed', handler)
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
@@ -0,0 +1,26 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+#
+# Augmenting declarations for pytask_event.py: compiled, the classes are
+# extension types with typed attributes. The .py file stays plain Python; the
+# methods declared here are not annotated there, as Cython 3 rejects annotations
+# that differ from these declarations.
+
+
+cdef class Subscription:
+    cdef bint _weak
+    cdef object _handler
+    cdef object _broadcaster
+
+
+cdef class EventBroadcaster:
+    cdef object __weakref__
+    cdef object _dispatcher
+    cdef object _lock
+    cdef readonly tuple _subscriptions
+    cdef tuple _handlers
+    cdef object _timing
+
+    cdef _set_subscriptions_locked(self, tuple subscriptions)
+    cdef _make_handler(self, Subscription subscription)
@@ -0,0 +1,173 @@
+# Copyright (c) 2012-2019 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import inspect
+import threading
+import weakref
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, TypeVar, Union
+
+from .pytask_dispatcher import EventDispatcher
+from .pytask_tracing import HistogramRegistry
+
+if TYPE_CHECKING:
+    from .pytask_event_bus import EventBus
+
+H = TypeVar('H', bound=Callable)
+
+
+class Subscription:
+    """ Represents a subscription to the event. Its only purpose is to provide
+        an unsubscribe mechanism for the EventBroadcaster (or EventBus, see
+        pytask_event_bus).
+
+        An instance of this class is returned when adding a new handler.
+    """
+
+    def __init__(self, handler: Callable, broadcaster: 'Union[EventBroadcaster, EventBus]',
+                 weak: bool = False):
+        self._weak = weak
+        if not weak:
+            self._handler = handler
+        elif inspect.ismethod(handler):
+            self._handler = weakref.WeakMethod(handler)
+        else:
+            self._handler = weakref.ref(handler)
+        # Weak, so subscriptions held by clients do not keep the broadcaster alive.
+        self._broadcaster = weakref.ref(broadcaster)
+
+    @property
+    def handler(self) -> Optional[Callable]:
+        """ The handler, None if weakly referenced and garbage collected.
+        """
+        return self._handler() if self._weak else self._handler
+
+    def unsubscribe(self) -> None:
+        """ Removes the associated handler from the event distribution list.
+        """
+        broadcaster: Optional[Union[EventBroadcaster, EventBus]] = self._broadcaster()
+        if broadcaster is not None:
+            broadcaster._remove_subscription(self)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unsubscribe()
+
+    def _call_weak(self, *args, **kwargs) -> None:
+        """ Called by emit instead of a weakly referenced handler: calls it if
+            still alive, otherwise removes the subscription.
+        """
+        handler = self._handler()
+        if handler is None:
+            self.unsubscribe()
+        else:
+            handler(*args, **kwargs)
+
+
+# Do not inherit from parameterized Generic -> Cython code runs OK. Required anyway: compiled
+# to an extension type, see pytask_event.pxd. Was: class EventBroadcaster(Generic[H]):
+class EventBroadcaster:
+    """ Class that manages a set of subscribers and broadcasts messages to them.
+
+        The subscriptions are kept as an immutable snapshot (tuple) that is
+        replaced as a whole when a handler is added or removed: emit needs no
+        locking, is not affected by (un)subscribing from other threads or from
+        the handlers themselves, and calls the handlers in subscription order.
+
+        Optionally the handlers are called via an EventDispatcher, i.e. on
+        another thread, rather than on the thread that emits.
+
+        A handler can be referenced weakly (see add_handler), so a client that
+        never unsubscribes does not stay alive as long as the broadcaster. The
+        subscription of a garbage collected handler is removed when an event
+        is emitted to it.
+    """
+
+    def __init__(self, dispatcher: Optional[EventDispatcher] = None) -> None:
+        """ Initializer.
+
+        :param dispatcher: if supplied, deliver events asynchronously via it
+        """
+        self._dispatcher = dispatcher
+        self._lock = threading.Lock()
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._handlers: Tuple[H, ...] = ()
+        # (registry, name) if the handlers are timed, see enable_timing.
+        self._timing: Optional[Tuple[HistogramRegistry, str]] = None
+
+    # TODO: Once we are on Python >= 3.10, we can properly annotate `emit` using ParamSpec.
+    def emit(self, *args, **kwargs) -> None:
+        """ Notify all subscribers by calling the registered callback functions.
+            All positional and keyword arguments are forwarded as-is
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.dispatch(self._handlers, args, kwargs)
+            return
+        for handler in self._handlers:
+            handler(*args, **kwargs)
+
+    def add_handler(self, handler: H, weak: bool = False) -> Subscription:
+        """ Add a new subscription to the broadcast list.
+            It will be notified when the event is fired.
+
+            :param handler: method to be called when event is fired
+            :param weak: if True, only keep a weak reference to the handler (a
+                WeakMethod for bound methods). Note that e.g. a lambda or
+                functools.partial only referenced by the subscription is
+                garbage collected right away.
+        """
+        new_sub = Subscription(handler, self, weak)
+        with self._lock:
+            self._subscriptions += (new_sub,)
+            self._handlers += (self._make_handler(new_sub),)
+        return new_sub
+
+    def _remove_subscription(self, subscription: Subscription) -> None:
+        """ Remove the subscription supplied, if still subscribed.
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._set_subscriptions_locked(tuple(sub for sub in self._subscriptions
+                                                     if sub is not subscription))
+
+    def _set_subscriptions_locked(self, subscriptions):
+        # Weak subscriptions whose handler has been collected are dropped as well.
+        # Explicit loops: Cython 0.29 does not compile generator expressions in
+        # a cdef method, see pytask_event.pxd.
+        live = []
+        handlers = []
+        for sub in subscriptions:
+            if sub.handler is not None:
+                live.append(sub)
+                handlers.append(self._make_handler(sub))
+        self._subscriptions = tuple(live)
+        self._handlers = tuple(handlers)
+
+    def enable_timing(self, registry: HistogramRegistry, name: str) -> None:
+        """ Record the duration of each handler call, in the histogram
+            '<name>.<qualified name of the handler>' of the registry supplied.
+        """
+        with self._lock:
+            self._timing = (registry, name)
+            self._set_subscriptions_locked(self._subscriptions)
+
+    def _make_handler(self, subscription):
+        """ Return the callable emit calls for the subscription supplied.
+            Must be called with lock held.
+        """
+        handler = subscription._call_weak if subscription._weak else subscription.handler
+        if self._timing is None:
+            return handler
+        registry, name = self._timing
+        target = subscription.handler
+        handler_name = getattr(target, '__qualname__', type(target).__qualname__)
+        return registry.timed('{0}.{1}'.format(name, handler_name), handler)
+
+    def is_subscribed(self) -> bool:
+        """
+        Check whether any events have subscribed to this event broadcaster
+        :return: True, if any event has subscribed (with a handler still alive)
+                 False, otherwise
+        """
+        return any(sub.handler is not None for sub in self._subscriptions)
@@ -0,0 +1,22 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+#
+# Augmenting declarations for pytask_event_bus.py: compiled, EventBus is an
+# extension type with typed attributes. The .py file stays plain Python; the
+# methods declared here are not annotated there, as Cython 3 rejects annotations
+# that differ from these declarations.
+from .pytask_event cimport Subscription
+
+
+cdef class EventBus:
+    cdef object __weakref__
+    cdef object _dispatcher
+    cdef object _lock
+    cdef readonly tuple _entries
+    cdef readonly tuple _routes
+    cdef tuple _batch_routes
+    cdef object _timing
+
+    cdef _set_entries_locked(self, tuple entries)
+    cdef _make_target(self, Subscription subscription, bint weak, str timing_name)
@@ -0,0 +1,397 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+import time
+from collections import deque
+from enum import IntEnum, unique
+from functools import partial
+from typing import Any, Callable, Deque, FrozenSet, Iterable, List, Optional, Tuple
+
+from .pytask_dispatcher import EventDispatcher
+from .pytask_event import Subscription
+from .pytask_state import PyTaskState
+from .pytask_tracing import HistogramRegistry
+from .pytask_watchdog import DeadlineWatch, default_watchdog
+
+
+@unique
+class TaskEventKind(IntEnum):
+    """ Kind of a TaskEvent, and the type of its value.
+
+    Progress:               percentage (float).
+    Message:                message (str).
+    StateChange:            new state (PyTaskState).
+    UserResponseRequested:  instruction for the user, see PyInteractiveTaskBase.
+    """
+    Progress = 1
+    Message = 2
+    StateChange = 3
+    UserResponseRequested = 4
+
+
+# Not a typing.NamedTuple, see cy_version/typing_namedtuple/README.rst.
+class TaskEvent:
+    """ Event of a task, as delivered by EventBus. """
+    __slots__ = ('kind', 'value')
+
+    def __init__(self, kind: TaskEventKind, value: Any):
+        self.kind = kind
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TaskEvent):
+            return NotImplemented
+        return self.kind == other.kind and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash((self.kind, self.value))
+
+    def __repr__(self) -> str:
+        return 'TaskEvent(kind={0!r}, value={1!r})'.format(self.kind, self.value)
+
+
+# Routes: one per kind, except state changes, which have one per state.
+_STATE_ROUTES = len(TaskEventKind) + 1
+_ROUTE_COUNT = _STATE_ROUTES + len(PyTaskState) + 1
+_NO_HANDLERS: Tuple[Callable, ...] = ()
+_STATE_CHANGE = TaskEventKind.StateChange
+
+# Histogram name of each kind, see EventBus.enable_timing.
+_TIMING_NAMES = {
+    TaskEventKind.Progress: 'progress',
+    TaskEventKind.Message: 'message',
+    TaskEventKind.StateChange: 'state_change',
+    TaskEventKind.UserResponseRequested: 'user_response_requested',
+}
+
+
+def _route_kinds() -> Tuple[Optional[TaskEventKind], ...]:
+    """ Return the kind of the events of each route. """
+    kinds: List[Optional[TaskEventKind]] = [None] * _ROUTE_COUNT
+    for kind in TaskEventKind:
+        kinds[kind] = kind
+    for state in PyTaskState:
+        kinds[_STATE_ROUTES + state] = TaskEventKind.StateChange
+    return tuple(kinds)
+
+
+_ROUTE_KINDS = _route_kinds()
+
+
+def _route_keys(kinds: Iterable[TaskEventKind], states: Iterable[PyTaskState]) -> FrozenSet[int]:
+    keys = set()
+    for kind in kinds:
+        if kind == TaskEventKind.StateChange:
+            keys.update(_STATE_ROUTES + state for state in states)
+        else:
+            keys.add(int(kind))
+    return frozenset(keys)
+
+
+def _deliver_record(handler: Callable[[TaskEvent], None], kind: TaskEventKind, value: Any) -> None:
+    handler(TaskEvent(kind, value))
+
+
+class _Batch:
+    """ Collects the events of a batch subscription and delivers them as a
+    list: when max_batch events are pending, when an event is a state change,
+    or when the oldest pending event is max_latency seconds old (via the
+    watchdog thread).
+
+    Batches are delivered in order, without holding the lock (so a handler may
+    call back into the task): a thread that finds another one delivering
+    leaves its batch to it.
+    """
+    __slots__ = ('_deliver', '_max_batch', '_max_latency', '_lock', '_events', '_ready',
+                 '_delivering', '_watch', '_closed')
+
+    def __init__(self, deliver: Callable[[List[TaskEvent]], None], max_batch: int,
+                 max_latency: float):
+        self._deliver = deliver
+        self._max_batch = max_batch
+        self._max_latency = max_latency
+        self._lock = threading.Lock()
+        self._events: List[TaskEvent] = []
+        self._ready: Deque[List[TaskEvent]] = deque()
+        self._delivering = False
+        self._watch: Optional[DeadlineWatch] = None
+        self._closed = False
+
+    def add(self, kind: TaskEventKind, value: Any) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._events.append(TaskEvent(kind, value))
+            if len(self._events) < self._max_batch and kind != TaskEventKind.StateChange:
+                if self._watch is None:
+                    self._watch = default_watchdog.watch(time.monotonic() + self._max_latency,
+                                                         self.flush)
+                return
+            if not self._end_batch_locked():
+                return
+        self._drain()
+
+    def flush(self) -> None:
+        """ Deliver the pending events, if any. """
+        with self._lock:
+            if not self._events or not self._end_batch_locked():
+                return
+        self._drain()
+
+    def close(self) -> None:
+        """ Discard the pending events. """
+        with self._lock:
+            self._closed = True
+            self._events = []
+            self._ready.clear()
+            if self._watch is not None:
+                self._watch.cancel()
+                self._watch = None
+
+    def _end_batch_locked(self) -> bool:
+        """ Queue the pending events as a batch. Return True if the caller must
+        deliver it (no other thread is delivering).
+        """
+        self._ready.append(self._events)
+        self._events = []
+        if self._watch is not None:
+            self._watch.cancel()
+            self._watch = None
+        if self._delivering:
+            return False
+        self._delivering = True
+        return True
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                if not self._ready:
+                    self._delivering = False
+                    return
+                events = self._ready.popleft()
+            try:
+                self._deliver(events)
+            except BaseException:
+                with self._lock:
+                    self._delivering = False
+                raise
+
+
+class _Entry:
+    """ A subscription to an EventBus, with its filter. """
+    __slots__ = ('subscription', 'weak', 'records', 'kinds', 'routes', 'batch')
+
+    def __init__(self, subscription: Subscription, weak: bool, records: bool,
+                 kinds: FrozenSet[TaskEventKind], routes: FrozenSet[int], batch: Optional[_Batch]):
+        self.subscription = subscription
+        self.weak = weak
+        self.records = records
+        self.kinds = kinds
+        self.routes = routes
+        self.batch = batch
+
+
+class EventBus:
+    """ Single channel for all events of a task: progress, messages, state
+    changes and user response requests.
+
+    * Subscribers filter by event kind and, for state changes, by new state.
+      The subscriptions are indexed by route (kind, or state for state
+      changes): emit only touches the subscribers its event matches.
+    * add_handler delivers TaskEvent records, add_batch_handler lists of them
+      (see _Batch) and add_value_handler the bare value, as EventBroadcaster
+      (used by the subscribe methods of IPyTask).
+    * Like EventBroadcaster, the routes are immutable snapshots replaced as a
+      whole on (un)subscribing, so emit needs no locking and calls the
+      handlers of a route in subscription order. Delivery can be via an
+      EventDispatcher, handlers can be referenced weakly and timed.
+    """
+
+    def __init__(self, dispatcher: Optional[EventDispatcher] = None) -> None:
+        """ Initializer.
+
+        :param dispatcher: if supplied, deliver events asynchronously via it
+        """
+        self._dispatcher = dispatcher
+        self._lock = threading.Lock()
+        self._entries: Tuple[_Entry, ...] = ()
+        # Per route: handlers called with the value, via the dispatcher if any.
+        self._routes: Tuple[Tuple[Callable, ...], ...] = (_NO_HANDLERS,) * _ROUTE_COUNT
+        # With a dispatcher, per route: adders of the batch subscriptions,
+        # called directly (without, they are in _routes).
+        self._batch_routes: Tuple[Tuple[Callable, ...], ...] = (_NO_HANDLERS,) * _ROUTE_COUNT
+        # (registry, name) if the handlers are timed, see enable_timing.
+        self._timing: Optional[Tuple[HistogramRegistry, str]] = None
+
+    def emit(self, kind: TaskEventKind, value: Any) -> None:
+        """ Deliver an event to the subscribers it matches.
+
+        :param kind: kind of the event
+        :param value: value of the event, the new state for a state change
+        """
+        key = _STATE_ROUTES + value if kind == _STATE_CHANGE else kind
+        if self._dispatcher is None:
+            for handler in self._routes[key]:
+                handler(value)
+            return
+        self._dispatcher.dispatch(self._routes[key], (value,), {})
+        for add in self._batch_routes[key]:
+            add(value)
+
+    def add_handler(self, handler: Callable[[TaskEvent], None],
+                    kinds: Optional[Iterable[TaskEventKind]] = None,
+                    states: Optional[Iterable[PyTaskState]] = None,
+                    weak: bool = False) -> Subscription:
+        """ Subscribe to the events matching the filter supplied, as TaskEvent records.
+
+        :param handler: called with each event
+        :param kinds: kinds of events, None for all
+        :param states: for state changes, the new states, None for all
+        :param weak: if True, only keep a weak reference to the handler, see
+            EventBroadcaster.add_handler
+        """
+        return self._add(handler, kinds, states, weak, True, None)
+
+    def add_batch_handler(self, handler: Callable[[List[TaskEvent]], None],
+                          kinds: Optional[Iterable[TaskEventKind]] = None,
+                          states: Optional[Iterable[PyTaskState]] = None,
+                          max_batch: int = 64, max_latency: float = 0.1,
+                          weak: bool = False) -> Subscription:
+        """ Subscribe to the events matching the filter supplied, as lists of
+        TaskEvent records.
+
+        A batch is delivered when max_batch events are pending, with a state
+        change event, and otherwise when its first event is max_latency
+        seconds old: then on the watchdog thread, unless the bus has a
+        dispatcher. Events pending when unsubscribing are discarded.
+
+        :param handler: called with each batch (a list of at least one event)
+        :param max_batch: maximum number of events per batch
+        :param max_latency: maximum delay of an event in seconds
+        See add_handler for the other parameters.
+        """
+        if max_batch < 1:
+            raise ValueError('max_batch must be at least 1')
+        return self._add(handler, kinds, states, weak, True, (max_batch, max_latency))
+
+    def add_value_handler(self, kind: TaskEventKind, handler: Callable[[Any], None],
+                          weak: bool = False) -> Subscription:
+        """ Subscribe to the events of the kind supplied, as bare values, e.g.
+        the percentage of a progress event.
+
+        See add_handler for the parameters.
+        """
+        return self._add(handler, (kind,), None, weak, False, None)
+
+    def _add(self, handler: Callable, kinds: Optional[Iterable[TaskEventKind]],
+             states: Optional[Iterable[PyTaskState]], weak: bool, records: bool,
+             batching: Optional[Tuple[int, float]]) -> Subscription:
+        kinds = frozenset(TaskEventKind) if kinds is None else frozenset(kinds)
+        routes = _route_keys(kinds, PyTaskState if states is None else states)
+        subscription = Subscription(handler, self, weak)
+        with self._lock:
+            batch = None
+            if batching is not None:
+                deliver = self._make_target(subscription, weak, 'batch')
+                if self._dispatcher is not None:
+                    deliver = partial(_dispatch_batch, self._dispatcher, deliver)
+                batch = _Batch(deliver, *batching)
+            entry = _Entry(subscription, weak, records, kinds, routes, batch)
+            self._set_entries_locked(self._entries + (entry,))
+        return subscription
+
+    def _remove_subscription(self, subscription: Subscription) -> None:
+        """ Remove the subscription supplied, if still subscribed.
+        """
+        with self._lock:
+            self._set_entries_locked(tuple(entry for entry in self._entries
+                                           if entry.subscription is not subscription))
+
+    def _set_entries_locked(self, entries):
+        """ Replace the subscriptions and rebuild the routes. Must be called
+        with lock held.
+        """
+        # Explicit loops rather than comprehensions: Cython 0.29 does not compile
+        # them in a cdef method, see pytask_event_bus.pxd.
+        # Weak subscriptions whose handler has been collected are dropped as well.
+        kept_entries = []
+        for entry in entries:
+            if entry.subscription.handler is not None:
+                kept_entries.append(entry)
+        kept = tuple(kept_entries)
+        for entry in self._entries:
+            if entry.batch is not None and entry not in kept:
+                entry.batch.close()
+        self._entries = kept
+
+        routes: List[List[Callable]] = []
+        batch_routes: List[List[Callable]] = []
+        for _ in range(_ROUTE_COUNT):
+            routes.append([])
+            batch_routes.append([])
+        for entry in kept:
+            for key in entry.routes:
+                kind = _ROUTE_KINDS[key]
+                if entry.batch is not None:
+                    adders = routes if self._dispatcher is None else batch_routes
+                    adders[key].append(partial(entry.batch.add, kind))
+                elif entry.records:
+                    routes[key].append(partial(
+                        _deliver_record,
+                        self._make_target(entry.subscription, entry.weak, _TIMING_NAMES[kind]),
+                        kind))
+                else:
+                    routes[key].append(self._make_target(entry.subscription, entry.weak,
+                                                         _TIMING_NAMES[kind]))
+        frozen_routes = []
+        frozen_batch_routes = []
+        for key in range(_ROUTE_COUNT):
+            frozen_routes.append(tuple(routes[key]))
+            frozen_batch_routes.append(tuple(batch_routes[key]))
+        self._routes = tuple(frozen_routes)
+        self._batch_routes = tuple(frozen_batch_routes)
+
+    def _make_target(self, subscription, weak, timing_name):
+        """ Return the callable that calls the handler of the subscription
+        supplied, timed (histogram '<name>.<timing_name>.<handler>') if enabled.
+        Must be called with lock held.
+        """
+        handler = subscription._call_weak if weak else subscription.handler
+        if self._timing is not None:
+            registry, name = self._timing
+            target = subscription.handler
+            handler_name = getattr(target, '__qualname__', type(target).__qualname__)
+            handler = registry.timed('{0}.{1}.{2}'.format(name, timing_name, handler_name),
+                                     handler)
+        return handler
+
+    def enable_timing(self, registry: HistogramRegistry, name: str) -> None:
+        """ Record the duration of each handler call, in the histogram
+        '<name>.<kind>.<qualified name of the handler>' of the registry
+        supplied, with kind e.g. 'progress' or 'state_change', or 'batch'.
+
+        Applies to batch subscriptions made after enabling.
+        """
+        with self._lock:
+            self._timing = (registry, name)
+            self._set_entries_locked(self._entries)
+
+    def flush(self) -> None:
+        """ Deliver the pending events of all batch subscriptions.
+        """
+        for entry in self._entries:
+            if entry.batch is not None:
+                entry.batch.flush()
+
+    def is_subscribed(self, kind: Optional[TaskEventKind] = None) -> bool:
+        """ Return True if any (live) subscription receives events of the kind
+        supplied, None for any kind.
+        """
+        return any(entry.subscription.handler is not None
+                   and (kind is None or kind in entry.kinds) for entry in self._entries)
+
+
+def _dispatch_batch(dispatcher: EventDispatcher, handler: Callable[[List[TaskEvent]], None],
+                    events: List[TaskEvent]) -> None:
+    dispatcher.dispatch((handler,), (events,), {})
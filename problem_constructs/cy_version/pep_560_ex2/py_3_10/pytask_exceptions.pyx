@@ -34,6 +34,13 @@ class PyTaskInvalidStateException(PyTaskException):
     pass
 
 
+class PyTaskTimeoutException(PyTaskException):
+    """ A wait, or the execution of a task, did not finish within the time
+    allowed.
+    """
+    pass
+
+
 class PyTaskNotSupportedException(PyTaskException):
     """ Feature associated with task is not supported.
 
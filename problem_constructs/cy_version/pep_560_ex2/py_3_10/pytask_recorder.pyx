@@ -0,0 +1,363 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import itertools
+import threading
+import time
+from enum import IntEnum, unique
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+from .i_pytask import IPyTask
+from .pytask_event import EventBroadcaster, Subscription
+from .pytask_state import PyTaskState
+
+# Start of every recording session in a log file, followed by a version byte.
+_MAGIC = b'PYTASKEV'
+_VERSION = 1
+# Progress is recorded in units of 0.001%.
+_PROGRESS_SCALE = 1000
+
+
+@unique
+class EventKind(IntEnum):
+    """ Kind of a recorded event.
+
+    Task:           a task has been added to the recording, value is its name.
+    Progress:       value is the percentage.
+    Message:        value is the message.
+    StateChange:    value is the PyTaskState.
+    UserRequest:    value is the user instruction, as str.
+    """
+    Task = 0
+    Progress = 1
+    Message = 2
+    StateChange = 3
+    UserRequest = 4
+
+
+# Not a typing.NamedTuple, see typing_namedtuple/README.rst.
+class RecordedEvent:
+    """ An event read from a log, see read_events.
+
+    timestamp:  seconds since the start of the log.
+    task_id:    ID of the task, unique within the log.
+    kind:       kind of the event.
+    value:      value of the event, see EventKind.
+    """
+    __slots__ = ('timestamp', 'task_id', 'kind', 'value')
+
+    def __init__(self, timestamp: float, task_id: int, kind: EventKind, value: Any):
+        self.timestamp = timestamp
+        self.task_id = task_id
+        self.kind = kind
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RecordedEvent):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return 'RecordedEvent({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+
+def _append_varint(buffer: bytearray, value: int) -> None:
+    """ Append an unsigned int, 7 bits per byte, least significant first. """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """ Return the unsigned int at the position supplied and the position after it. """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return -((value + 1) >> 1) if value & 1 else value >> 1
+
+
+class TaskEventRecorder:
+    """ Records the events of tasks to a compact, append-only binary log.
+
+    Each record is the event kind (1 byte) followed by varints: the time since
+    the previous record (us, monotonic clock), the task ID and the payload.
+    Strings are a varint length plus UTF-8. Records are buffered and written
+    when the buffer is full, on flush and on close. Appending to an existing
+    log adds a new recording session to it. Events of recorded tasks after
+    close, e.g. emitted while closing, are ignored.
+
+    This class is thread safe: events can be recorded and flushed from any thread.
+    """
+
+    def __init__(self, file_name: str, buffer_size: int = 65536):
+        """ Initializer.
+
+        :param file_name: log file, created or appended to
+        :param buffer_size: number of bytes buffered before they are written
+        """
+        self._file = open(file_name, 'ab')
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._buffer = bytearray(_MAGIC)
+        self._buffer.append(_VERSION)
+        _append_varint(self._buffer, time.time_ns() // 1000)
+        self._last_timestamp = time.monotonic_ns() // 1000
+        self._task_ids = itertools.count(1)
+        self._subscriptions: Dict[int, List[Subscription]] = {}
+        self._closed = False
+
+    def __enter__(self) -> 'TaskEventRecorder':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, task: IPyTask) -> int:
+        """ Record the progress, message, state change and (for interactive
+        tasks) user request events of the task supplied.
+
+        :param task: the task
+        :return: the ID of the task in the log
+        :raises ValueError: if the recorder has been closed
+        """
+        task_id = next(self._task_ids)
+        self._append(EventKind.Task, task_id, _encode_str(task.get_name()))
+        subscriptions = [
+            task.subscribe_progress(partial(self._on_progress, task_id)),
+            task.subscribe_message(partial(self._on_message, task_id)),
+            task.subscribe_state_change(partial(self._on_state_change, task_id)),
+        ]
+        # IPyInteractiveTask, checked by method rather than by type: compiled with
+        # Cython 0.29, i_pyinteractivetask does not import, see pep_560_ex2/README.rst.
+        subscribe_user_request = getattr(task, 'subscribe_user_response_requested', None)
+        if subscribe_user_request is not None:
+            subscriptions.append(subscribe_user_request(partial(self._on_user_request, task_id)))
+        with self._lock:
+            if not self._closed:
+                self._subscriptions[task_id] = subscriptions
+                return task_id
+        for subscription in subscriptions:
+            subscription.unsubscribe()
+        raise ValueError('TaskEventRecorder has been closed')
+
+    def stop_recording(self, task_id: int) -> None:
+        """ Stop recording the events of a task.
+
+        :param task_id: ID returned by record
+        """
+        with self._lock:
+            subscriptions = self._subscriptions.pop(task_id, [])
+        for subscription in subscriptions:
+            subscription.unsubscribe()
+
+    def flush(self) -> None:
+        """ Write the buffered records to the log, no-op once closed. """
+        with self._lock:
+            if not self._closed:
+                self._flush_locked()
+
+    def close(self) -> None:
+        """ Stop recording all tasks, write the buffered records, close the log. """
+        with self._lock:
+            if self._closed:
+                return
+            # From here on _append ignores events, e.g. of a task emitting
+            # while its subscriptions are removed below.
+            self._closed = True
+            subscriptions, self._subscriptions = self._subscriptions, {}
+            self._flush_locked()
+            self._file.close()
+        for task_subscriptions in subscriptions.values():
+            for subscription in task_subscriptions:
+                subscription.unsubscribe()
+
+    def _flush_locked(self) -> None:
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._buffer.clear()
+
+    def _append(self, kind: EventKind, task_id: int, payload: Union[bytes, bytearray]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            # Timestamp taken with the lock held, so the records are in time order.
+            timestamp = time.monotonic_ns() // 1000
+            buffer = self._buffer
+            buffer.append(kind)
+            _append_varint(buffer, timestamp - self._last_timestamp)
+            _append_varint(buffer, task_id)
+            buffer += payload
+            self._last_timestamp = timestamp
+            if len(buffer) >= self._buffer_size:
+                self._flush_locked()
+
+    def _on_progress(self, task_id: int, percentage: float) -> None:
+        payload = bytearray()
+        _append_varint(payload, _zigzag(round(percentage * _PROGRESS_SCALE)))
+        self._append(EventKind.Progress, task_id, payload)
+
+    def _on_message(self, task_id: int, message: str) -> None:
+        self._append(EventKind.Message, task_id, _encode_str(message))
+
+    def _on_state_change(self, task_id: int, state: PyTaskState) -> None:
+        self._append(EventKind.StateChange, task_id, bytes([int(state)]))
+
+    def _on_user_request(self, task_id: int, instruction: Any) -> None:
+        self._append(EventKind.UserRequest, task_id, _encode_str(str(instruction)))
+
+
+def _encode_str(text: str) -> bytes:
+    encoded = text.encode('utf-8')
+    payload = bytearray()
+    _append_varint(payload, len(encoded))
+    return bytes(payload) + encoded
+
+
+def read_events(file_name: str) -> Iterator[RecordedEvent]:
+    """ Read the events of a log written by TaskEventRecorder.
+
+    Sessions appended to the log follow each other in time, their task IDs
+    are renumbered to keep them unique. A truncated last record is ignored.
+
+    :param file_name: the log file
+    :return: the events, in time order
+    """
+    with open(file_name, 'rb') as f:
+        data = f.read()
+
+    position = 0
+    timestamp = 0
+    task_id_offset = 0
+    max_task_id = 0
+    try:
+        while position < len(data):
+            if data.startswith(_MAGIC, position):
+                if data[position + len(_MAGIC)] != _VERSION:
+                    raise ValueError('unsupported event log version in {0}'.format(file_name))
+                _, position = _read_varint(data, position + len(_MAGIC) + 1)
+                task_id_offset = max_task_id
+                continue
+
+            kind = EventKind(data[position])
+            delta, position = _read_varint(data, position + 1)
+            task_id, position = _read_varint(data, position)
+            task_id += task_id_offset
+            timestamp += delta
+            if kind == EventKind.Progress:
+                value, position = _read_varint(data, position)
+                value = _unzigzag(value) / _PROGRESS_SCALE
+            elif kind == EventKind.StateChange:
+                value = PyTaskState(data[position])
+                position += 1
+            else:
+                length, position = _read_varint(data, position)
+                if position + length > len(data):
+                    return
+                value = data[position:position + length].decode('utf-8')
+                position += length
+            max_task_id = max(max_task_id, task_id)
+            yield RecordedEvent(timestamp / 1e6, task_id, kind, value)
+    except IndexError:
+        return  # truncated last record
+
+
+class ReplayedTask:
+    """ Stand-in for a recorded task: provides the subscribe methods of
+    IPyTask (and IPyInteractiveTask) and get_name / get_state, with the events
+    fed by TaskEventReplayer.
+    """
+
+    def __init__(self, task_id: int, task_name: str):
+        self.task_id = task_id
+        self.task_name = task_name
+        self._state = PyTaskState.Idle
+        self._broadcasters = {kind: EventBroadcaster() for kind in EventKind
+                              if kind != EventKind.Task}
+
+    def get_name(self) -> str:
+        return self.task_name
+
+    def get_state(self) -> PyTaskState:
+        return self._state
+
+    def subscribe_progress(self, progress_callback: Callable[[float], None],
+                           weak: bool = False) -> Subscription:
+        return self._broadcasters[EventKind.Progress].add_handler(progress_callback, weak)
+
+    def subscribe_message(self, message_callback: Callable[[str], None],
+                          weak: bool = False) -> Subscription:
+        return self._broadcasters[EventKind.Message].add_handler(message_callback, weak)
+
+    def subscribe_state_change(self, state_change_callback: Callable[[PyTaskState], None],
+                               weak: bool = False) -> Subscription:
+        return self._broadcasters[EventKind.StateChange].add_handler(state_change_callback, weak)
+
+    def subscribe_user_response_requested(self, user_response_requested_callback:
+                                          Callable[[str], None],
+                                          weak: bool = False) -> Subscription:
+        return self._broadcasters[EventKind.UserRequest].add_handler(
+            user_response_requested_callback, weak)
+
+    def _deliver(self, event: RecordedEvent) -> None:
+        if event.kind == EventKind.StateChange:
+            self._state = event.value
+        self._broadcasters[event.kind].emit(event.value)
+
+
+class TaskEventReplayer:
+    """ Feeds the events of a recorded log to the subscribers of ReplayedTasks,
+    e.g. to load test UI consumers without running the tasks.
+    """
+
+    def __init__(self, file_name: str):
+        """ Initializer.
+
+        :param file_name: log written by TaskEventRecorder
+        """
+        self._events: List[RecordedEvent] = []
+        self._tasks: Dict[int, ReplayedTask] = {}
+        for event in read_events(file_name):
+            if event.kind == EventKind.Task:
+                self._tasks[event.task_id] = ReplayedTask(event.task_id, event.value)
+            else:
+                self._events.append(event)
+
+    def get_tasks(self) -> List[ReplayedTask]:
+        """ Return the recorded tasks, subscribe to them before replaying. """
+        return list(self._tasks.values())
+
+    def replay(self, speed: float = 1.0) -> int:
+        """ Deliver all recorded events, on the calling thread.
+
+        :param speed: 1. for real time, e.g. 10. for 10 times faster, 0. for
+            no delays at all
+        :return: the number of events delivered
+        """
+        start = time.monotonic()
+        first = self._events[0].timestamp if self._events else 0.0
+        for event in self._events:
+            if speed > 0.0:
+                delay = start + (event.timestamp - first) / speed - time.monotonic()
+                if delay > 0.0:
+                    time.sleep(delay)
+            self._tasks[event.task_id]._deliver(event)
+        return len(self._events)
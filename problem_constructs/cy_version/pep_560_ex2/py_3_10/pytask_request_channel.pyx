@@ -0,0 +1,108 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, TypeVar
+
+Request_type = TypeVar("Request_type")
+Response_type = TypeVar("Response_type")
+
+
+class UserRequest:
+    """ A request for a user response: its ID, the instruction for the user
+    and the future that receives the response.
+
+    asyncio code can await the response via asyncio.wrap_future(request.future).
+    """
+
+    def __init__(self, request_id: int, instruction: Request_type):
+        self.request_id = request_id
+        self.instruction = instruction
+        self.future: Future = Future()
+
+
+class UserRequestChannel:
+    """ The outstanding user requests of a task, matched to responses by ID.
+
+    * A request is registered before the user is asked, so a response can
+      never arrive too early.
+    * Any number of requests can be outstanding.
+
+    This class is thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        # Request ID -> request, in the order opened.
+        self._pending: Dict[int, UserRequest] = {}
+
+    def open(self, instruction: Request_type) -> UserRequest:
+        """ Register a new request.
+
+        :param instruction: the instruction for the user
+        :return: the request
+        """
+        with self._lock:
+            request = UserRequest(next(self._request_ids), instruction)
+            self._pending[request.request_id] = request
+        return request
+
+    def respond(self, response: Response_type, request_id: Optional[int] = None
+                ) -> Optional[UserRequest]:
+        """ Complete a request with the response supplied.
+
+        :param response: the response of the user
+        :param request_id: ID of the request, None for the oldest outstanding one
+        :return: the request completed, None if there is no such request
+        """
+        with self._lock:
+            while True:
+                request = self._pending.pop(
+                    next(iter(self._pending), None) if request_id is None else request_id, None)
+                if request is None:
+                    return None
+                # Skip a request whose future has been cancelled by its waiter,
+                # e.g. by asyncio.wait_for.
+                if request.future.set_running_or_notify_cancel():
+                    break
+                if request_id is not None:
+                    return None
+        request.future.set_result(response)
+        return request
+
+    def discard(self, request: UserRequest) -> bool:
+        """ Remove a request without a response and cancel its future, e.g. on
+        a timeout.
+
+        :return: False if the request has been completed already
+        """
+        with self._lock:
+            if self._pending.pop(request.request_id, None) is None:
+                return False
+        request.future.cancel()
+        return True
+
+    def cancel_all(self, exception: BaseException) -> int:
+        """ Complete all outstanding requests with the exception supplied.
+
+        :return: the number of requests cancelled
+        """
+        with self._lock:
+            requests = [request for request in self._pending.values()
+                        if request.future.set_running_or_notify_cancel()]
+            self._pending.clear()
+        for request in requests:
+            request.future.set_exception(exception)
+        return len(requests)
+
+    def get_pending(self) -> List[UserRequest]:
+        """ Return the outstanding requests, oldest first. """
+        with self._lock:
+            return list(self._pending.values())
+
+    def has_pending(self) -> bool:
+        """ Return True if any request is outstanding. """
+        return bool(self._pending)
@@ -0,0 +1,33 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+#
+# Augmenting declarations for pytask_state_machine.py: compiled,
+# TaskStateMachine is an extension type with typed attributes, its internal
+# helpers are C methods and the interruption checks (called by each task on
+# its hot path) are cpdef, their fast path a read of the C flag
+# _interrupt_pending. The .py file stays plain Python; the methods declared
+# here are not annotated there, as Cython 3 rejects annotations that differ
+# from these declarations.
+cimport cython
+
+from .pytask_event_bus cimport EventBus
+
+
+cdef class TaskStateMachine:
+    cdef readonly object _lock
+    cdef readonly dict _waiters
+    cdef object _internal_state
+    cdef tuple _versioned_state
+    cdef readonly bint _interrupt_pending
+    cdef public EventBus event_bus
+    cdef object _tracer
+
+    cdef _set_state_locked(self, new_state)
+    cdef _wait_for_states_locked(self, frozenset states, timeout=*)
+    @cython.locals(new_state=int)
+    cdef _handle_event(self, int event)
+    cpdef handle_interruption_request(self)
+    cdef _handle_interruption_request_locked(self)
+    cpdef poll_interruption_request(self)
+    cpdef interruptable_delay(self, delay_ms)
@@ -0,0 +1,331 @@
+# Copyright (c) 2012-2019 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+
+import time
+from threading import Condition, Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .pytask_dispatcher import EventDispatcher
+from .pytask_event import Subscription
+from .pytask_event_bus import EventBus, TaskEventKind
+from .pytask_exceptions import (PyTaskAbortedException, PyTaskInvalidStateException,
+                                PyTaskTimeoutException)
+from .pytask_state import PyTaskState
+from .pytask_tracing import TaskTracer
+
+_INACTIVE_STATES = frozenset(state for state in PyTaskState if state not in [
+    PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Aborting])
+_STARTED_STATES = frozenset(state for state in PyTaskState if state != PyTaskState.Idle)
+_NOT_PAUSED_STATES = frozenset(state for state in PyTaskState if state != PyTaskState.Paused)
+_INTERRUPTING_STATES = frozenset([PyTaskState.Pausing, PyTaskState.Aborting])
+_EXECUTING_STATES = frozenset([PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Aborting])
+# States in which handle_interruption_request has something to do.
+_INTERRUPT_PENDING_STATES = _INTERRUPTING_STATES | frozenset([PyTaskState.Paused])
+
+# Events of the state machine, one per handle_* method.
+_EXECUTE = 0
+_PAUSE = 1
+_RESUME = 2
+_ABORT = 3
+_COMPLETED = 4
+_FAILED = 5
+_ABORTED = 6
+_PAUSED = 7
+_EVENT_COUNT = 8
+
+# State each event transitions to, e.g. for the PyTaskInvalidStateException message.
+_EVENT_TARGETS: Tuple[PyTaskState, ...] = (
+    PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Running, PyTaskState.Aborting,
+    PyTaskState.Completed, PyTaskState.Failed, PyTaskState.Aborted, PyTaskState.Paused)
+
+# The state model: (event, states it is valid in, new state or None if it has no effect).
+# Events in states not listed raise PyTaskInvalidStateException.
+_TRANSITION_RULES: Tuple[Tuple[int, Tuple[PyTaskState, ...], Optional[PyTaskState]], ...] = (
+    (_EXECUTE, (PyTaskState.Idle, PyTaskState.Completed, PyTaskState.Failed,
+                PyTaskState.Aborted), PyTaskState.Running),
+    (_PAUSE, (PyTaskState.Running,), PyTaskState.Pausing),
+    (_PAUSE, (PyTaskState.Pausing, PyTaskState.Paused, PyTaskState.Completed,
+              PyTaskState.Failed), None),
+    (_RESUME, (PyTaskState.Paused, PyTaskState.Pausing), PyTaskState.Running),
+    (_RESUME, (PyTaskState.Completed, PyTaskState.Failed), None),
+    (_ABORT, (PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Paused),
+     PyTaskState.Aborting),
+    (_ABORT, (PyTaskState.Aborting, PyTaskState.Aborted, PyTaskState.Completed,
+              PyTaskState.Failed), None),
+    (_COMPLETED, (PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Aborting),
+     PyTaskState.Completed),
+    (_FAILED, (PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Aborting),
+     PyTaskState.Failed),
+    (_ABORTED, (PyTaskState.Aborting,), PyTaskState.Aborted),
+    (_PAUSED, (PyTaskState.Pausing,), PyTaskState.Paused),
+)
+
+# Entries of the transition table other than the int value of the new state.
+_IGNORED = 0
+_INVALID = -1
+
+
+def _build_transition_table() -> Tuple[int, ...]:
+    """ Return _TRANSITION_RULES as a flat table of ints, indexed by
+        int(state) * _EVENT_COUNT + event.
+    """
+    table = [_INVALID] * ((max(PyTaskState) + 1) * _EVENT_COUNT)
+    for event, states, new_state in _TRANSITION_RULES:
+        for state in states:
+            table[state * _EVENT_COUNT + event] = _IGNORED if new_state is None else int(new_state)
+    return tuple(table)
+
+
+_TRANSITIONS = _build_transition_table()
+# PyTaskState by int value.
+_STATES: Dict[int, PyTaskState] = {int(state): state for state in PyTaskState}
+
+
+class TaskStateMachine(object):
+    """ This class implements the state machine for PyTask derived classes.
+
+    This class handles the state transitions and verifies preconditions.
+    Precondition violations result in a TaskInvalidStateException. The
+    transitions are a lookup in a precomputed table, see _TRANSITION_RULES.
+
+    Threads waiting for a state are registered against the states they wait
+    for, so a state change only wakes up the threads waiting for that state.
+
+    The interruption checks a task makes at every step read a flag, set on
+    each state change, without locking: they only take the lock when a pause
+    or abort is pending.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, dispatcher: Optional[EventDispatcher] = None,
+                 event_bus: Optional[EventBus] = None):
+        """ Initializer.
+
+        :param dispatcher: if supplied, state changes are broadcast via it, so
+            not while the lock is held
+        :param event_bus: bus to emit the state changes on, e.g. the one of the
+            task; None for a bus of its own (with the dispatcher supplied)
+        """
+        self._lock = Lock()
+        # State -> conditions of the threads waiting for that state.
+        self._waiters: Dict[PyTaskState, List[Condition]] = {}
+
+        self._internal_state = PyTaskState.Idle
+        # (version, state): replaced as a whole on each state change, so can be read without lock.
+        self._versioned_state: Tuple[int, PyTaskState] = (0, PyTaskState.Idle)
+        # True in _INTERRUPT_PENDING_STATES. Written with the lock held, read without.
+        self._interrupt_pending = False
+        self.event_bus = event_bus if event_bus is not None else EventBus(dispatcher)
+        self._tracer: Optional[TaskTracer] = None
+
+    @property
+    def _state(self):
+        return self._internal_state
+
+    @_state.setter
+    def _state(self, new_state):
+        self._set_state_locked(new_state)
+
+    def _set_state_locked(self, new_state):
+        """ If the task state changes, save the new state, notify all subscribers and
+            notify the threads waiting for the new state.
+            Must be called with lock held.
+        """
+        if new_state != self._internal_state:
+            if self._tracer is not None:
+                self._tracer.on_transition(self._internal_state, new_state, time.perf_counter())
+            self._internal_state = new_state
+            self._versioned_state = (self._versioned_state[0] + 1, new_state)
+            self._interrupt_pending = new_state in _INTERRUPT_PENDING_STATES
+            self.event_bus.emit(TaskEventKind.StateChange, new_state)
+            for waiter in self._waiters.get(new_state, ()):
+                waiter.notify()
+
+    def set_tracer(self, tracer: Optional[TaskTracer]) -> None:
+        """ Record the state transitions with the tracer supplied, None to stop.
+        """
+        with self._lock:
+            self._tracer = tracer
+
+    def get_versioned_state(self) -> Tuple[int, PyTaskState]:
+        """ Return the current state and its version, without locking. The
+            version is incremented on every state change, e.g. to detect changes
+            between two reads.
+
+        :return: (version, state)
+        """
+        return self._versioned_state
+
+    def wait_for_states(self, states: Iterable[PyTaskState],
+                        timeout: Optional[float] = None) -> bool:
+        """ Block until the task is in one of the states supplied.
+
+        :param states: states to wait for
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :return: True if in one of the states, False on timeout
+        """
+        states = frozenset(states)
+        if self._versioned_state[1] in states:
+            return True
+        with self._lock:
+            return self._wait_for_states_locked(states, timeout)
+
+    def _wait_for_states_locked(self, states, timeout=None):
+        """ See wait_for_states. Must be called with lock held.
+        """
+        if self._internal_state in states:
+            return True
+
+        waiter = Condition(self._lock)
+        for state in states:
+            self._waiters.setdefault(state, []).append(waiter)
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._internal_state not in states:
+                if deadline is None:
+                    waiter.wait()
+                else:
+                    time_left = deadline - time.monotonic()
+                    if time_left <= 0:
+                        return False
+                    waiter.wait(time_left)
+            return True
+        finally:
+            for state in states:
+                self._waiters[state].remove(waiter)
+
+    def _handle_event(self, event):
+        """ Make the transition of the event supplied, see _TRANSITION_RULES.
+        """
+        with self._lock:
+            new_state = _TRANSITIONS[self._internal_state * _EVENT_COUNT + event]
+            if new_state > 0:
+                self._set_state_locked(_STATES[new_state])
+            elif new_state == _INVALID:
+                raise PyTaskInvalidStateException('Cannot transition from {0} to {1}'.format(
+                    str(self._internal_state), str(_EVENT_TARGETS[event])))
+
+    def handle_execute_request(self):
+        self._handle_event(_EXECUTE)
+
+    def handle_pause_request(self):
+        self._handle_event(_PAUSE)
+
+    def handle_resume_request(self):
+        self._handle_event(_RESUME)
+
+    def handle_abort_request(self):
+        self._handle_event(_ABORT)
+
+    def handle_task_completed(self):
+        self._handle_event(_COMPLETED)
+
+    def handle_task_failed(self):
+        self._handle_event(_FAILED)
+
+    def handle_task_aborted(self):
+        self._handle_event(_ABORTED)
+
+    def handle_task_paused(self):
+        self._handle_event(_PAUSED)
+
+    def handle_interruption_request(self):
+        """ Handle pause and abort requests from the client:
+
+            Blocks the current thread when pause has been requested until the
+            task is requested to resume.
+            Throws a PyTaskAbortedException when abort has been requested.
+            If no pause or abort has been requested this method returns immediately.
+        """
+        # Fast path: reading the flag is atomic, a request made concurrently
+        # is handled by the next call, as if made just after this one.
+        if not self._interrupt_pending:
+            return
+        with self._lock:
+            self._handle_interruption_request_locked()
+
+    def _handle_interruption_request_locked(self):
+        """ See handle_interruption_request. Must be called with lock held.
+        """
+        if self._internal_state == PyTaskState.Pausing:
+            self._set_state_locked(PyTaskState.Paused)
+
+        self._wait_for_states_locked(_NOT_PAUSED_STATES)
+
+        if self._internal_state == PyTaskState.Aborting:
+            raise PyTaskAbortedException('Task has been aborted')
+
+    def poll_interruption_request(self):
+        """ Non-blocking variant of handle_interruption_request, e.g. for tasks
+            running on an event loop.
+
+            Moves a pausing task to the paused state and throws a
+            PyTaskAbortedException when abort has been requested. Returns True if
+            the task is paused: the caller must wait for a state change, then poll
+            again.
+        """
+        if not self._interrupt_pending:
+            return False
+        with self._lock:
+            if self._internal_state == PyTaskState.Pausing:
+                self._set_state_locked(PyTaskState.Paused)
+
+            if self._internal_state == PyTaskState.Aborting:
+                raise PyTaskAbortedException('Task has been aborted')
+
+            return self._internal_state == PyTaskState.Paused
+
+    def interruptable_delay(self, delay_ms):
+        """ Wait for the specified amount of time to pass.
+
+            If a pause request is received this method will block until a resume request is
+            received. If the resume request is received before the delay period has passed this
+            method will wait for the remaining amount of time to pass. If the delay period has
+            passed while paused, a resume request will cause this method to return immediately.
+
+            If an abort request is received this method will throw a TaskAbortedException
+
+            Event driven: sleeps until the deadline or the next state change, i.e.
+            only wakes up when there is something to do.
+        """
+        if self._internal_state not in _EXECUTING_STATES:
+            raise RuntimeError("This function may only be called while in the 'Running', "
+                               "'Aborting' or 'Pausing' state.")
+
+        deadline = time.monotonic() + delay_ms / 1000
+
+        with self._lock:
+            time_left = deadline - time.monotonic()
+            while time_left > 0:
+                self._wait_for_states_locked(_INTERRUPTING_STATES, time_left)
+                self._handle_interruption_request_locked()
+                time_left = deadline - time.monotonic()
+
+    def subscribe_state_change(self, handler, weak=False) -> Subscription:
+        with self._lock:
+            return self.event_bus.add_value_handler(TaskEventKind.StateChange, handler, weak)
+
+    def wait_inactive(self, timeout=None):
+        """ Block until an inactive state has been reached.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises PyTaskTimeoutException: on timeout
+        """
+        with self._lock:
+            if not self._wait_for_states_locked(_INACTIVE_STATES, timeout):
+                raise PyTaskTimeoutException('task did not become inactive within {0} s'.format(
+                    timeout))
+
+            return self._internal_state
+
+    def wait_has_started(self, timeout=None):
+        """ Block until the task has left the PyTaskState::Idle state.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises PyTaskTimeoutException: on timeout
+        """
+        with self._lock:
+            if not self._wait_for_states_locked(_STARTED_STATES, timeout):
+                raise PyTaskTimeoutException('task did not start within {0} s'.format(timeout))
@@ -0,0 +1,309 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import os
+import struct
+import sys
+import threading
+from functools import partial
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional
+
+from .i_pytask import IPyTask
+from .pytask_event import Subscription
+from .pytask_state import PyTaskState
+
+# Shared memory layout: header, then fixed size slots of one cache line each.
+_MAGIC = b'PYTASKST'
+_VERSION = 1
+_HEADER = struct.Struct('<8sIII')  # magic, version, slot count, slot size
+_SLOTS_OFFSET = 64
+_SLOT_SIZE = 64
+# Slot: sequence number, state (0 for a free slot), progress, message sequence number, task name.
+_SEQUENCE = struct.Struct('<Q')
+_PAYLOAD = struct.Struct('<B7xdQ32s')
+_SLOT = struct.Struct('<QB7xdQ32s')
+_FREE = 0
+
+# Number of attempts to read a slot that is being written, before skipping it.
+_MAX_READ_ATTEMPTS = 100
+# Offset of the state in a slot, the sequence number is little endian.
+_STATE_OFFSET = _SEQUENCE.size
+_STATES = {int(state): state for state in PyTaskState}
+
+# Readers attach without the resource tracker of their process, see _attach.
+_ATTACH_UNTRACKED = sys.version_info >= (3, 13)
+_UNREGISTER_ON_ATTACH = not _ATTACH_UNTRACKED and os.name == 'posix'
+
+
+# Not a typing.NamedTuple, see typing_namedtuple/README.rst.
+class TaskStatus:
+    """ Status of a published task, see TaskStatusReader.
+
+    slot:               index of the slot in the table.
+    task_name:          name of the task, UTF-8 truncated to 32 bytes.
+    state:              state of the task.
+    progress:           last reported progress (percentage).
+    message_sequence:   number of messages the task reported, e.g. to detect new ones.
+    """
+    __slots__ = ('slot', 'task_name', 'state', 'progress', 'message_sequence')
+
+    def __init__(self, slot: int, task_name: str, state: PyTaskState, progress: float,
+                 message_sequence: int):
+        self.slot = slot
+        self.task_name = task_name
+        self.state = state
+        self.progress = progress
+        self.message_sequence = message_sequence
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TaskStatus):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return 'TaskStatus({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+
+class _Slot:
+    """ Publisher side of a slot: the values of the task and the lock that
+    serializes its writers (the task thread and the threads pausing, resuming
+    or aborting it).
+    """
+    __slots__ = ('index', 'offset', 'lock', 'sequence', 'task_name', 'state', 'progress',
+                 'message_sequence', 'subscriptions')
+
+    def __init__(self, index: int, task_name: bytes):
+        self.index = index
+        self.offset = _SLOTS_OFFSET + index * _SLOT_SIZE
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.task_name = task_name
+        self.state = _FREE
+        self.progress = 0.0
+        self.message_sequence = 0
+        self.subscriptions: List[Subscription] = []
+
+
+class TaskStatusPublisher:
+    """ Mirrors the state, progress and message count of tasks into a table
+    in shared memory, which other processes read with TaskStatusReader.
+
+    * Each task has a fixed slot, written as a seqlock: the sequence number of
+      the slot is odd while it is written. Readers never block the writers,
+      they retry (or skip) a slot that changed while they read it.
+    * The table has a fixed number of slots: publish raises a ValueError if
+      all are in use.
+    * The state of a task stays in the table until it is unpublished, e.g.
+      so monitors see it completed.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = 256):
+        """ Initializer, creates the shared memory.
+
+        :param name: name of the shared memory, None for a unique name, see get_name
+        :param slots: maximum number of tasks published at the same time
+        """
+        self._shm = SharedMemory(name=name, create=True, size=_SLOTS_OFFSET + slots * _SLOT_SIZE)
+        self._buffer = self._shm.buf
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, _VERSION, slots, _SLOT_SIZE)
+        self._lock = threading.Lock()
+        self._free = list(range(slots - 1, -1, -1))
+        self._slots: Dict[int, _Slot] = {}
+
+    def __enter__(self) -> 'TaskStatusPublisher':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_name(self) -> str:
+        """ Return the name of the shared memory, for TaskStatusReader. """
+        return self._shm.name
+
+    def publish(self, task: IPyTask) -> int:
+        """ Mirror the status of the task supplied into the table.
+
+        :param task: the task
+        :return: the index of its slot
+        """
+        with self._lock:
+            if not self._free:
+                raise ValueError('no free slot in task status table {0}'.format(self.get_name()))
+            slot = _Slot(self._free.pop(), task.get_name().encode('utf-8')[:32])
+            self._slots[slot.index] = slot
+        # Subscribed with the lock of the slot held: the handlers wait until the
+        # slot has been initialized.
+        with slot.lock:
+            # Continue the sequence of the previous use of the slot: a reader
+            # must never see the same sequence number for different contents.
+            slot.sequence = _SEQUENCE.unpack_from(self._buffer, slot.offset)[0]
+            slot.subscriptions = [
+                task.subscribe_state_change(partial(self._on_state_change, slot)),
+                task.subscribe_progress(partial(self._on_progress, slot)),
+                task.subscribe_message(partial(self._on_message, slot)),
+            ]
+            # Read once subscribed, so a concurrent state change cannot be lost.
+            slot.state = int(task.get_state())
+            self._write_locked(slot)
+        return slot.index
+
+    def unpublish(self, index: int) -> None:
+        """ Stop mirroring a task and free its slot.
+
+        :param index: slot index returned by publish
+        """
+        with self._lock:
+            slot = self._slots.pop(index, None)
+        if slot is None:
+            return
+        for subscription in slot.subscriptions:
+            subscription.unsubscribe()
+        with slot.lock:
+            slot.state = _FREE
+            self._write_locked(slot)
+        with self._lock:
+            self._free.append(index)
+
+    def close(self) -> None:
+        """ Unpublish all tasks and remove the shared memory. """
+        for index in list(self._slots):
+            self.unpublish(index)
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+            self._shm.close()
+            if _UNREGISTER_ON_ATTACH:
+                # A reader in this process (tree) shares the resource tracker and
+                # unregistered the shared memory, unlink unregisters it again.
+                resource_tracker.register(self._shm._name, 'shared_memory')
+            self._shm.unlink()
+
+    def _write_locked(self, slot: _Slot) -> None:
+        """ Write the values of a slot to the table. Must be called with the
+        lock of the slot held.
+        """
+        buffer = self._buffer
+        if buffer is None:
+            return  # closed
+        sequence = slot.sequence + 1
+        _SEQUENCE.pack_into(buffer, slot.offset, sequence)
+        _PAYLOAD.pack_into(buffer, slot.offset + _SEQUENCE.size, slot.state, slot.progress,
+                           slot.message_sequence, slot.task_name)
+        slot.sequence = sequence + 1
+        _SEQUENCE.pack_into(buffer, slot.offset, slot.sequence)
+
+    def _on_state_change(self, slot: _Slot, state: PyTaskState) -> None:
+        with slot.lock:
+            slot.state = int(state)
+            self._write_locked(slot)
+
+    def _on_progress(self, slot: _Slot, percentage: float) -> None:
+        with slot.lock:
+            slot.progress = percentage
+            self._write_locked(slot)
+
+    def _on_message(self, slot: _Slot, message: str) -> None:
+        with slot.lock:
+            slot.message_sequence += 1
+            self._write_locked(slot)
+
+
+def _attach(name: str) -> SharedMemory:
+    """ Attach to existing shared memory without registering it with the
+    resource tracker (POSIX), which would remove it when this process exits.
+    """
+    if _ATTACH_UNTRACKED:
+        return SharedMemory(name=name, track=False)
+    shm = SharedMemory(name=name)
+    if _UNREGISTER_ON_ATTACH:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class TaskStatusReader:
+    """ Reads the table of a TaskStatusPublisher, from any process, without
+    locking: see read.
+    """
+
+    def __init__(self, name: str):
+        """ Initializer, attaches to the shared memory.
+
+        :param name: name of the table, see TaskStatusPublisher.get_name
+        """
+        self._shm = _attach(name)
+        self._buffer = self._shm.buf
+        magic, version, self._slot_count, slot_size = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION or slot_size != _SLOT_SIZE:
+            self.close()
+            raise ValueError('{0} is not a task status table of version {1}'.format(
+                name, _VERSION))
+        self._end = _SLOTS_OFFSET + self._slot_count * _SLOT_SIZE
+
+    def __enter__(self) -> 'TaskStatusReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """ Detach from the shared memory. """
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+            self._shm.close()
+
+    def read(self) -> List[TaskStatus]:
+        """ Return the status of all published tasks, by slot.
+
+        The table is copied twice: a slot is consistent if its sequence number
+        is even and the same in both copies. Slots written in between are read
+        again one at a time; a slot still being written after a number of
+        attempts is left out. Only the slots in use are unpacked: the parity
+        and state of all slots are taken from the copy as byte strings.
+        """
+        buffer = self._buffer
+        first = bytes(buffer[_SLOTS_OFFSET:self._end])
+        second = bytes(buffer[_SLOTS_OFFSET:self._end])
+        changed = first != second
+        statuses = []
+        for index, (low_byte, state) in enumerate(zip(first[::_SLOT_SIZE],
+                                                      first[_STATE_OFFSET::_SLOT_SIZE])):
+            offset = index * _SLOT_SIZE
+            if low_byte & 1 or (changed and first[offset:offset + _STATE_OFFSET]
+                                != second[offset:offset + _STATE_OFFSET]):
+                status = self._read_slot(index)
+                if status is not None:
+                    statuses.append(status)
+            elif state != _FREE:
+                _, _, progress, message_sequence, task_name = _SLOT.unpack_from(first, offset)
+                statuses.append(TaskStatus(index, task_name.rstrip(b'\0').decode('utf-8', 'ignore'),
+                                           _STATES[state], progress, message_sequence))
+        return statuses
+
+    def _read_slot(self, index: int) -> Optional[TaskStatus]:
+        """ Read a single slot as a seqlock reader. Return None if free, or
+        still being written after _MAX_READ_ATTEMPTS.
+        """
+        buffer = self._buffer
+        offset = _SLOTS_OFFSET + index * _SLOT_SIZE
+        for _ in range(_MAX_READ_ATTEMPTS):
+            sequence = _SEQUENCE.unpack_from(buffer, offset)[0]
+            if sequence & 1:
+                continue
+            state, progress, message_sequence, task_name = _PAYLOAD.unpack_from(
+                buffer, offset + _SEQUENCE.size)
+            if _SEQUENCE.unpack_from(buffer, offset)[0] != sequence:
+                continue
+            if state == _FREE:
+                return None
+            return TaskStatus(index, task_name.rstrip(b'\0').decode('utf-8', 'ignore'),
+                              _STATES[state], progress, message_sequence)
+        return None
@@ -0,0 +1,188 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .pytask_state import PyTaskState
+
+# Upper bounds (seconds) of the histogram buckets: 1-2-5 steps from 100 ns to 500 s.
+_BUCKET_BOUNDS: Tuple[float, ...] = tuple(
+    mantissa * 10.0 ** exponent for exponent in range(-7, 3) for mantissa in (1, 2, 5)
+) + (float('inf'),)
+
+
+class Histogram:
+    """ Distribution of durations (seconds), in fixed logarithmic buckets.
+
+    Recording is a bisect and a few additions, so it can be used on hot paths.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+
+    This class is thread safe.
+    """
+    __slots__ = ('_lock', '_counts', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * len(_BUCKET_BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = 0.0
+
+    def record(self, value: float) -> None:
+        """ Add a duration.
+
+        :param value: duration in seconds
+        """
+        index = bisect_left(_BUCKET_BOUNDS, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value < self.minimum:
+                self.minimum = value
+            if value > self.maximum:
+                self.maximum = value
+
+    def percentile(self, fraction: float) -> float:
+        """ Estimate a percentile.
+
+        :param fraction: e.g. 0.99 for the 99th percentile
+        :return: the estimate in seconds, 0. if nothing recorded
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = fraction * self.count
+            seen = 0
+            for bound, count in zip(_BUCKET_BOUNDS, self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return min(bound, self.maximum)
+            return self.maximum
+
+    def to_dict(self) -> Dict:
+        """ Return the statistics and the non-empty buckets, e.g. for JSON export. """
+        with self._lock:
+            count = self.count
+            result = {
+                'count': count,
+                'total': self.total,
+                'min': self.minimum if count else 0.0,
+                'max': self.maximum,
+                'mean': self.total / count if count else 0.0,
+                'buckets': {repr(bound): n for bound, n in zip(_BUCKET_BOUNDS, self._counts) if n},
+            }
+        for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            result[name] = self.percentile(fraction)
+        return result
+
+
+class HistogramRegistry:
+    """ Named histograms, created on first use. A single registry per process
+    is available as default_registry.
+
+    This class is thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def get(self, name: str) -> Histogram:
+        """ Return the histogram with the name supplied, create it if needed. """
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """ Wrap a function, so the duration of each call is recorded in the
+        histogram with the name supplied.
+        """
+        histogram = self.get(name)
+
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter() - start)
+        return timed_function
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """ Return the statistics of all histograms, by name. """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        return {name: histogram.to_dict() for name, histogram in histograms}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """ Return the snapshot as JSON. """
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def reset(self) -> None:
+        """ Remove all histograms. """
+        with self._lock:
+            self._histograms.clear()
+
+
+default_registry = HistogramRegistry()
+
+
+class TaskTracer:
+    """ Records the state transitions of a task, see PyTaskBase.enable_tracing.
+
+    Into the histograms of the registry, named '<name>.<metric>':
+        state.<state>:  time spent in a state, per visit
+        pause_latency:  time from the pause request (Pausing) until Paused
+        abort_latency:  time from the abort request (Aborting) until Aborted
+    The latest transitions are kept as the trace, see get_trace.
+    """
+
+    def __init__(self, name: str, registry: Optional[HistogramRegistry] = None,
+                 max_events: int = 1000):
+        """ Initializer.
+
+        :param name: prefix of the histogram names, e.g. the class of the task
+        :param registry: registry for the histograms, None for default_registry
+        :param max_events: number of transitions kept in the trace
+        """
+        self.name = name
+        self.registry = registry or default_registry
+        self._state_histograms = {state: self.registry.get('{0}.state.{1}'.format(name, state.name))
+                                  for state in PyTaskState}
+        self._pause_latency = self.registry.get('{0}.pause_latency'.format(name))
+        self._abort_latency = self.registry.get('{0}.abort_latency'.format(name))
+        self._events: Deque[Tuple[float, PyTaskState]] = deque(maxlen=max_events)
+        self._entered: Optional[float] = None
+
+    def on_transition(self, old_state: PyTaskState, new_state: PyTaskState,
+                      timestamp: float) -> None:
+        """ Called by TaskStateMachine on each state change, with its lock held.
+
+        :param old_state: state left
+        :param new_state: state entered
+        :param timestamp: time.perf_counter() of the transition
+        """
+        entered = self._entered
+        if entered is not None:
+            elapsed = timestamp - entered
+            self._state_histograms[old_state].record(elapsed)
+            if old_state == PyTaskState.Pausing and new_state == PyTaskState.Paused:
+                self._pause_latency.record(elapsed)
+            elif old_state == PyTaskState.Aborting and new_state == PyTaskState.Aborted:
+                self._abort_latency.record(elapsed)
+        self._entered = timestamp
+        self._events.append((timestamp, new_state))
+
+    def get_trace(self) -> List[Tuple[float, PyTaskState]]:
+        """ Return the latest transitions: (time.perf_counter(), state entered). """
+        return list(self._events)
@@ -0,0 +1,129 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cancelled watches are removed from the heap once they are more than half of
+# it (and at least this many), rather than one by one.
+_MIN_COMPACT_SIZE = 64
+
+
+class DeadlineWatch:
+    """ A deadline being watched, see TaskWatchdog.watch. """
+    __slots__ = ('deadline', 'callback', 'cancelled', 'expired', '_watchdog')
+
+    def __init__(self, deadline: float, callback: Callable[[], None],
+                 watchdog: 'TaskWatchdog'):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+        # Set before the callback is called.
+        self.expired = False
+        self._watchdog = watchdog
+
+    def cancel(self) -> None:
+        """ Stop watching the deadline. No effect if expired already. """
+        self._watchdog._cancel(self)
+
+
+class TaskWatchdog:
+    """ Calls a callback when its deadline passes, e.g. to abort a task.
+
+    All deadlines are kept in a heap and watched by a single thread (started
+    on first use), rather than a timer per deadline. A single watchdog per
+    process is available as default_watchdog.
+
+    * Callbacks are called on the watchdog thread, so must be quick: e.g.
+      IPyTask.abort, which only makes a request.
+    * Exceptions raised by callbacks are logged.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, name: str = 'TaskWatchdog'):
+        """ Initializer.
+
+        :param name: name of the watchdog thread
+        """
+        self._name = name
+        self._condition = threading.Condition()
+        self._heap: List[Tuple[float, int, DeadlineWatch]] = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, deadline: float, callback: Callable[[], None]) -> DeadlineWatch:
+        """ Call the callback supplied when the deadline passes, unless cancelled.
+
+        :param deadline: time.monotonic() value
+        :param callback: called without arguments, on the watchdog thread
+        :return: the watch, to cancel it
+        """
+        watch = DeadlineWatch(deadline, callback, self)
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._counter), watch))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is watch:
+                self._condition.notify()
+        return watch
+
+    def get_pending_count(self) -> int:
+        """ Return the number of deadlines being watched. """
+        with self._condition:
+            return len(self._heap) - self._cancelled
+
+    def _cancel(self, watch: DeadlineWatch) -> None:
+        with self._condition:
+            if watch.cancelled:
+                return
+            watch.cancelled = True
+            self._cancelled += 1
+            if self._cancelled > max(len(self._heap) // 2, _MIN_COMPACT_SIZE):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _pop_expired_locked(self) -> List[DeadlineWatch]:
+        """ Remove the expired (and cancelled) watches from the top of the heap.
+        Must be called with the condition held.
+        """
+        expired = []
+        now = time.monotonic()
+        heap = self._heap
+        while heap and (heap[0][0] <= now or heap[0][2].cancelled):
+            watch = heapq.heappop(heap)[2]
+            if watch.cancelled:
+                self._cancelled -= 1
+            else:
+                # Cancelling an expired watch has no effect.
+                watch.cancelled = True
+                watch.expired = True
+                expired.append(watch)
+        return expired
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                expired = self._pop_expired_locked()
+                while not expired:
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap
+                                         else None)
+                    expired = self._pop_expired_locked()
+
+            for watch in expired:
+                try:
+                    watch.callback()
+                except Exception:
+                    logger.exception('deadline callback %r failed', watch.callback)
+
+
+default_watchdog = TaskWatchdog()
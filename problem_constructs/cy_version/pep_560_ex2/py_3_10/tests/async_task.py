@@ -0,0 +1,59 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import asyncio
+
+from ..async_pytask_base import AsyncPyTaskBase
+
+
+class AsyncSimpleTask(AsyncPyTaskBase):
+    """ Task gets the common task behavior from AsyncPyTaskBase.
+
+    * Simulates I/O bound work by awaiting asyncio.sleep.
+    """
+
+    def __init__(self, delay_s=0.01):
+        super(AsyncSimpleTask, self).__init__('Async Simple Task')
+        self.delay_s = delay_s
+
+    async def on_execute(self):
+        self.report_message('AsyncSimpleTask: starting execution...')
+        await asyncio.sleep(self.delay_s)
+        self.report_progress(50.0)
+        await asyncio.sleep(self.delay_s)
+        self.report_message('AsyncSimpleTask: finished execution')
+
+
+class AsyncInterruptableTask(AsyncPyTaskBase):
+    """ Task with interruption points and an interruptable delay.
+    """
+
+    def __init__(self, delay_ms):
+        super(AsyncInterruptableTask, self).__init__('Async Interruptable Task')
+        self.delay_ms = delay_ms
+        self.steps_done = 0
+
+    async def on_execute(self):
+        await self.interruptable_delay(self.delay_ms)
+        self.steps_done += 1
+        self.report_progress(50.0)
+        await self.handle_interruption_request()
+
+        await self.interruptable_delay(self.delay_ms)
+        self.steps_done += 1
+        await self.handle_interruption_request()
+
+
+class AsyncBusyThenDelayTask(AsyncPyTaskBase):
+    """ Awaits other work, without interruption points, before an
+    interruptable delay.
+    """
+
+    def __init__(self, busy_s, delay_ms):
+        super(AsyncBusyThenDelayTask, self).__init__('Async Busy Then Delay Task')
+        self.busy_s = busy_s
+        self.delay_ms = delay_ms
+
+    async def on_execute(self):
+        await asyncio.sleep(self.busy_s)
+        await self.interruptable_delay(self.delay_ms)
@@ -17,9 +17,10 @@ class InteractiveTask(PyInteractiveTaskBase[str, str]):
     method.
     """
 
-    def __init__(self, task_name=None):
+    def __init__(self, task_name=None, timeout=None):
         super(InteractiveTask, self).__init__(task_name or 'Interactive Task')
         self._user_response = None
+        self._timeout = timeout
 
     def on_execute(self):
         # Execution of task can report progress, messages, and state: these will only be received
@@ -28,7 +29,8 @@ class InteractiveTask(PyInteractiveTaskBase[str, str]):
         self.report_message('\nInteractiveTask: starting execution...')
         self.report_progress(10.0)
 
-        self._user_response = self.request_user_response('Instruction for the user')
+        self._user_response = self.request_user_response('Instruction for the user',
+                                                         self._timeout)
         self.report_message('...busy executing InteractiveTask...')
         self.report_progress(33.0)
 
@@ -41,3 +43,18 @@ class InteractiveTask(PyInteractiveTaskBase[str, str]):
 
     def get_user_response_received(self):
         return self._user_response
+
+
+class MultiRequestTask(PyInteractiveTaskBase):
+    """ Interactive task with several user requests outstanding at once.
+    This class is implemented for use in unit tests only.
+    """
+
+    def __init__(self, instructions):
+        super(MultiRequestTask, self).__init__('Multi Request Task')
+        self.instructions = instructions
+        self.responses = []
+
+    def on_execute(self):
+        requests = [self.submit_user_request(instruction) for instruction in self.instructions]
+        self.responses = [request.future.result() for request in requests]
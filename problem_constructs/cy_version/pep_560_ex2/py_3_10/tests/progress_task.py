@@ -0,0 +1,26 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+from ..pytask_base import PyTaskBase
+from ..pytask_exceptions import PyTaskFailedException
+
+
+class ProgressTask(PyTaskBase):
+    """ Task that reports progress in a tight loop, e.g. to exercise progress
+    coalescing.
+    """
+
+    def __init__(self, iterations, interruption_points=(), fail_at=None):
+        super(ProgressTask, self).__init__('Progress Task')
+        self.iterations = iterations
+        self.interruption_points = set(interruption_points)
+        self.fail_at = fail_at
+
+    def on_execute(self):
+        scale = 100.0 / self.iterations
+        for i in range(1, self.iterations):
+            if i == self.fail_at:
+                raise PyTaskFailedException('ProgressTask: failed at iteration {0}'.format(i))
+            self.report_progress(i * scale)
+            if i in self.interruption_points:
+                self.handle_interruption_request()
@@ -14,6 +14,7 @@ from .interruptable_task import (
             InterruptableTask,
             InterruptableTaskWithCallbacksSink,
             TaskWithInterruptableDelay)
+from .progress_task import ProgressTask
 from .simple_task import SimpleTask
 from .simple_task_with_callback import SimpleTaskWithCallbacks, SimpleTaskWithCallbacksSink
 from .task_with_cleanup import TaskWithCleanup
@@ -106,9 +107,7 @@ def test_simple_task_with_callbacks_context_manager():
     assert PyTaskState.Running in task_sink.state_change_callbacks
     assert PyTaskState.Completed in task_sink.state_change_callbacks
     assert len(task_sink.message_callbacks) == 6
-    assert not task._message_broadcaster._subscriptions
-    assert not task._progress_broadcaster._subscriptions
-    assert not task._task_state_machine.state_broadcaster._subscriptions
+    assert not task._event_bus._entries
 
 
 def test_multiple_subscribe():
@@ -285,6 +284,25 @@ def test_interruptable_delay_paused():
     assert task.get_state() == PyTaskState.Completed
 
 
+def test_interruptable_delay_deadline():
+    # Deadline is fixed: time paused before the deadline counts towards the delay.
+    task = TaskWithInterruptableDelay(400)
+    thread = threading.Thread(target=task.execute)
+    start = time.monotonic()
+    thread.start()
+
+    task.wait_has_started()
+    time.sleep(0.1)
+    task.pause()
+    time.sleep(0.1)
+    assert task.get_state() == PyTaskState.Paused
+    task.resume()
+    thread.join()
+
+    assert task.get_state() == PyTaskState.Completed
+    assert 0.4 <= time.monotonic() - start < 0.6
+
+
 def test_parallel_run():
     def show_progress(percentage):
         thread_name = threading.current_thread().name
@@ -316,3 +334,31 @@ def test_parallel_run():
     assert task1.get_state() == PyTaskState.Completed
     assert task2.get_state() == PyTaskState.Completed
     assert task3.get_state() == PyTaskState.Completed
+
+
+def test_progress_coalescing_min_delta():
+    task = ProgressTask(1000)
+    task.configure_progress_coalescing(min_delta=10.0)
+    progress = []
+    task.subscribe_progress(progress.append)
+    task.execute()
+    assert progress == [0.0] + [i * 0.1 for i in range(100, 1000, 100)] + [100.0]
+
+
+def test_progress_coalescing_max_rate():
+    # Rate so low that only 0%, 100% and the flushed values get through.
+    task = ProgressTask(1000, interruption_points=[250, 500])
+    task.configure_progress_coalescing(max_rate=0.001)
+    progress = []
+    task.subscribe_progress(progress.append)
+    task.execute()
+    assert progress == [0.0, 25.0, 50.0, 100.0]
+
+    # Latest value is delivered when the task ends.
+    task = ProgressTask(1000, fail_at=300)
+    task.configure_progress_coalescing(max_rate=0.001)
+    progress.clear()
+    task.subscribe_progress(progress.append)
+    with pytest.raises(PyTaskFailedException):
+        task.execute()
+    assert progress == [0.0, 299 * 0.1]
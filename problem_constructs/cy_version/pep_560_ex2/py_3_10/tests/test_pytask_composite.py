@@ -0,0 +1,121 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+import time
+
+import pytest
+
+from ..pytask_composite import ParallelTask, SequenceTask, TaskGraph
+from ..pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from ..pytask_executor import TaskExecutor
+from ..pytask_state import PyTaskState
+from .failing_task import TaskFailsWithPyTaskFailedException
+from .interruptable_task import TaskWithInterruptableDelay
+from .recording_task import RecordingTask
+
+
+def wait_for_state(task, state):
+    deadline = time.monotonic() + 5
+    while task.get_state() != state:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_sequence_weighted_progress():
+    log = []
+    sequence = SequenceTask('sequence', [RecordingTask('first', log), RecordingTask('second', log)],
+                            weights=[1.0, 3.0])
+    progress = []
+    sequence.subscribe_progress(progress.append)
+    sequence.execute()
+
+    assert log == ['first', 'second']
+    assert progress[0] == 0.0 and 25.0 in progress and progress[-1] == 100.0
+    assert progress == sorted(progress)
+    assert sequence.get_state() == PyTaskState.Completed
+
+
+def test_parallel_runs_concurrently():
+    running = [0, 0]
+    tasks = [RecordingTask(str(i), [], running, 0.2) for i in range(3)]
+    ParallelTask('parallel', tasks).execute()
+    assert running[1] == 3
+
+
+def test_graph_dependencies():
+    log = []
+    graph = TaskGraph('graph', executor=TaskExecutor(max_workers=2))
+    a = graph.add_task(RecordingTask('a', log))
+    b = graph.add_task(RecordingTask('b', log), [a])
+    c = graph.add_task(RecordingTask('c', log), [a])
+    graph.add_task(RecordingTask('d', log), [b, c])
+    graph.execute()
+    assert log[0] == 'a' and sorted(log[1:3]) == ['b', 'c'] and log[3] == 'd'
+
+    with pytest.raises(ValueError):
+        graph.add_task(RecordingTask('e', log), [RecordingTask('unknown', log)])
+    with pytest.raises(ValueError):
+        graph.add_task(a)
+
+
+def test_child_failure_aborts_others():
+    slow = TaskWithInterruptableDelay(5000)
+    parallel = ParallelTask('parallel', [slow, TaskFailsWithPyTaskFailedException('fails')])
+    start = time.monotonic()
+    with pytest.raises(PyTaskFailedException):
+        parallel.execute()
+    assert time.monotonic() - start < 2
+    assert parallel.get_state() == PyTaskState.Failed
+    assert slow.get_state() == PyTaskState.Aborted
+
+
+def test_pause_resume_abort_propagate():
+    children = [TaskWithInterruptableDelay(5000) for _ in range(2)]
+    queued = TaskWithInterruptableDelay(5000)
+    executor = TaskExecutor(max_workers=2)
+    graph = TaskGraph('graph', executor)
+    for child in children:
+        graph.add_task(child)
+    graph.add_task(queued, children)
+    thread = threading.Thread(target=lambda: pytest.raises(PyTaskAbortedException, graph.execute))
+    thread.start()
+    for child in children:
+        wait_for_state(child, PyTaskState.Running)
+
+    graph.pause()
+    wait_for_state(graph, PyTaskState.Paused)
+    for child in children:
+        wait_for_state(child, PyTaskState.Paused)
+    graph.resume()
+    for child in children:
+        wait_for_state(child, PyTaskState.Running)
+
+    graph.abort()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert graph.get_state() == PyTaskState.Aborted
+    assert all(child.get_state() == PyTaskState.Aborted for child in children)
+    assert queued.get_state() == PyTaskState.Idle
+    executor.shutdown()
+
+
+def test_execute_again_after_abort_while_paused():
+    child = TaskWithInterruptableDelay(5000)
+    executor = TaskExecutor(max_workers=2)
+    graph = TaskGraph('graph', executor)
+    graph.add_task(child)
+    thread = threading.Thread(target=lambda: pytest.raises(PyTaskAbortedException, graph.execute))
+    thread.start()
+    wait_for_state(child, PyTaskState.Running)
+    graph.pause()
+    wait_for_state(child, PyTaskState.Paused)
+    graph.abort()
+    thread.join(5)
+    assert not thread.is_alive()
+
+    child.delay = 10
+    graph.execute(deadline=time.monotonic() + 5)
+    assert graph.get_state() == PyTaskState.Completed
+    assert child.get_state() == PyTaskState.Completed
+    executor.shutdown()
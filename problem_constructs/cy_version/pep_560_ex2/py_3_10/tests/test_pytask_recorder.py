@@ -0,0 +1,106 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+import time
+
+import pytest
+
+from ..pytask_recorder import EventKind, TaskEventRecorder, TaskEventReplayer, read_events
+from ..pytask_state import PyTaskState
+from .interactive_task import MultiRequestTask
+from .interruptable_task import TaskWithInterruptableDelay
+from .progress_task import ProgressTask
+
+
+def record_events(task, sink):
+    task.subscribe_progress(lambda value: sink.append((EventKind.Progress, value)))
+    task.subscribe_message(lambda value: sink.append((EventKind.Message, value)))
+    task.subscribe_state_change(lambda value: sink.append((EventKind.StateChange, value)))
+
+
+def test_record_and_read(tmp_path):
+    log = str(tmp_path / 'events.bin')
+    progress_task = ProgressTask(1000)
+    interactive_task = MultiRequestTask(['first instruction', 'second instruction'])
+    interactive_task.subscribe_user_response_requested(
+        lambda instruction: interactive_task.provide_user_response(instruction.upper()))
+    live = []
+    record_events(progress_task, live)
+
+    with TaskEventRecorder(log, buffer_size=256) as recorder:
+        progress_id = recorder.record(progress_task)
+        interactive_id = recorder.record(interactive_task)
+        flusher = threading.Thread(target=lambda: [recorder.flush() for _ in range(100)])
+        flusher.start()
+        progress_task.execute()
+        interactive_task.execute()
+        flusher.join()
+
+    events = list(read_events(log))
+    assert [event.timestamp for event in events] == sorted(event.timestamp for event in events)
+    assert events[0].kind == EventKind.Task and events[0].value == 'Progress Task'
+    # Progress is recorded in steps of 0.001%.
+    assert [(event.kind, event.value) for event in events if event.task_id == progress_id][1:] == [
+        (kind, round(value, 3) if kind == EventKind.Progress else value) for kind, value in live]
+    assert [event.value for event in events
+            if event.task_id == interactive_id and event.kind == EventKind.UserRequest] == [
+        'first instruction', 'second instruction']
+    # Compact: kind, time, task ID and value of a progress event take at most 6 bytes.
+    assert (tmp_path / 'events.bin').stat().st_size < 7 * len(events)
+
+
+def test_append_sessions(tmp_path):
+    log = str(tmp_path / 'events.bin')
+    for _ in range(2):
+        with TaskEventRecorder(log) as recorder:
+            recorder.record(ProgressTask(10))
+    events = list(read_events(log))
+    assert [event.task_id for event in events if event.kind == EventKind.Task] == [1, 2]
+
+    with open(log, 'ab') as f:
+        f.write(bytes([EventKind.Message, 0x81]))  # truncated record
+    assert list(read_events(log)) == events
+
+
+def test_replay(tmp_path):
+    log = str(tmp_path / 'events.bin')
+    task = TaskWithInterruptableDelay(200)
+    live = []
+    record_events(task, live)
+    with TaskEventRecorder(log) as recorder:
+        recorder.record(task)
+        task.execute()
+
+    replayer = TaskEventReplayer(log)
+    replayed_task, = replayer.get_tasks()
+    assert replayed_task.get_name() == task.get_name()
+    replayed = []
+    record_events(replayed_task, replayed)
+
+    start = time.monotonic()
+    assert replayer.replay(speed=2.0) == len(live)
+    assert 0.09 < time.monotonic() - start < 0.5
+    assert replayed == live
+    assert replayed_task.get_state() == PyTaskState.Completed
+
+    start = time.monotonic()
+    replayer.replay(speed=0.0)
+    assert time.monotonic() - start < 0.05
+    assert replayed == live + live
+
+
+def test_events_during_close_ignored(tmp_path):
+    log = str(tmp_path / 'events.bin')
+    task = ProgressTask(10)
+    # Every record is written at once, e.g. also one appended after close.
+    recorder = TaskEventRecorder(log, buffer_size=1)
+    # Subscribed before the recorder: closes it while the message is emitted.
+    task.subscribe_message(lambda message: recorder.close())
+    recorder.record(task)
+    task.report_message('closing')
+    task.report_message('after close')
+    with pytest.raises(ValueError):
+        recorder.record(task)
+    recorder.flush()
+    assert [event.kind for event in read_events(log)] == [EventKind.Task]
@@ -160,3 +160,86 @@ class TestButton(unittest.TestCase):
         sm.handle_resume_request()
         t.join()
         assert sm._state == PyTaskState.Completed
+
+    def test_wait_for_states(self):
+        sm = TaskStateMachine()
+        assert sm.get_versioned_state() == (0, PyTaskState.Idle)
+        assert sm.wait_for_states([PyTaskState.Idle], timeout=0)
+        assert not sm.wait_for_states([PyTaskState.Completed], timeout=0.1)
+        assert not sm._waiters[PyTaskState.Completed]
+
+        def work():
+            sm.handle_execute_request()
+            sleep(0.2)
+            sm.handle_task_completed()
+
+        t = Thread(target=work)
+        t.start()
+        assert sm.wait_for_states([PyTaskState.Completed, PyTaskState.Failed], timeout=5)
+        t.join()
+        assert sm.get_versioned_state() == (2, PyTaskState.Completed)
+
+    def test_wait_for_states_targeted(self):
+        sm = TaskStateMachine()
+        t = Thread(target=sm.wait_for_states, args=([PyTaskState.Completed],))
+        t.start()
+        while not sm._waiters.get(PyTaskState.Completed):
+            sleep(0.01)
+        # Only registered against the state waited for.
+        assert [state for state, waiters in sm._waiters.items() if waiters] == \
+            [PyTaskState.Completed]
+
+        sm.handle_execute_request()
+        sm.handle_task_completed()
+        t.join(5)
+        assert not t.is_alive()
+        assert not sm._waiters[PyTaskState.Completed]
+
+    def test_ignored_and_invalid_requests(self):
+        sm = TaskStateMachine()
+        sm.subscribe_state_change(self._handler)
+        with pytest.raises(PyTaskInvalidStateException, match='Cannot transition from {0} to {1}'
+                           .format(str(PyTaskState.Idle), str(PyTaskState.Pausing))):
+            sm.handle_pause_request()
+
+        sm.handle_execute_request()
+        sm.handle_task_completed()
+        self.returned_state = None
+        # No effect and no state change broadcast.
+        sm.handle_pause_request()
+        sm.handle_resume_request()
+        sm.handle_abort_request()
+        assert sm._state == PyTaskState.Completed
+        assert self.returned_state is None
+
+        with pytest.raises(PyTaskInvalidStateException, match='Cannot transition from {0} to {1}'
+                           .format(str(PyTaskState.Completed), str(PyTaskState.Aborted))):
+            sm.handle_task_aborted()
+
+    def test_interruption_check_fast_path(self):
+        sm = TaskStateMachine()
+        sm.handle_execute_request()
+        assert not sm._interrupt_pending
+
+        # Nothing pending: returns without taking the lock.
+        with sm._lock:
+            t = Thread(target=sm.handle_interruption_request)
+            t.start()
+            t.join(5)
+            assert not t.is_alive()
+            assert sm.poll_interruption_request() is False
+
+        sm.handle_pause_request()
+        assert sm._interrupt_pending
+        assert sm.poll_interruption_request() is True
+        assert sm._state == PyTaskState.Paused
+        sm.handle_resume_request()
+        assert not sm._interrupt_pending
+        sm.handle_interruption_request()
+
+        sm.handle_abort_request()
+        assert sm._interrupt_pending
+        with pytest.raises(PyTaskAbortedException):
+            sm.handle_interruption_request()
+        sm.handle_task_aborted()
+        assert not sm._interrupt_pending
@@ -0,0 +1,98 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import multiprocessing
+import threading
+
+import pytest
+
+from ..pytask_state import PyTaskState
+from ..pytask_status_table import TaskStatus, TaskStatusPublisher, TaskStatusReader
+from .progress_task import ProgressTask
+
+
+def read_in_process(name, queue):
+    with TaskStatusReader(name) as reader:
+        queue.put(reader.read())
+
+
+def test_publish_and_read():
+    with TaskStatusPublisher(slots=2) as publisher, \
+            TaskStatusReader(publisher.get_name()) as reader:
+        task = ProgressTask(10)
+        index = publisher.publish(task)
+        assert reader.read() == [TaskStatus(index, 'Progress Task', PyTaskState.Idle, 0.0, 0)]
+
+        task.execute()
+        task.report_message('first')
+        task.report_message('second')
+        assert reader.read() == [TaskStatus(index, 'Progress Task', PyTaskState.Completed,
+                                            100.0, 2)]
+
+        other_index = publisher.publish(ProgressTask(10))
+        with pytest.raises(ValueError):
+            publisher.publish(ProgressTask(10))
+
+        # A freed slot is reused.
+        publisher.unpublish(index)
+        assert [status.slot for status in reader.read()] == [other_index]
+        assert publisher.publish(ProgressTask(10)) == index
+        assert len(reader.read()) == 2
+
+
+def test_slot_being_written_is_skipped():
+    with TaskStatusPublisher(slots=2) as publisher, \
+            TaskStatusReader(publisher.get_name()) as reader:
+        publisher.publish(ProgressTask(10))
+        slot = publisher._slots[0]
+        with slot.lock:
+            # As if the writer stopped halfway through a write.
+            publisher._buffer[slot.offset] += 1
+            assert reader.read() == []
+            publisher._buffer[slot.offset] -= 1
+        assert len(reader.read()) == 1
+
+
+def test_reads_are_consistent_while_written():
+    with TaskStatusPublisher(slots=1) as publisher, \
+            TaskStatusReader(publisher.get_name()) as reader:
+        task = ProgressTask(10)
+        publisher.publish(task)
+        stop = threading.Event()
+
+        def write():
+            count = 0
+            while not stop.is_set():
+                count += 1
+                task.report_message('message')
+                task.report_progress(float(count))
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(20000):
+                for status in reader.read():
+                    # Message and progress are written in turn: a torn read would mix them up.
+                    assert status.message_sequence - 1 <= status.progress <= status.message_sequence
+        finally:
+            stop.set()
+            writer.join()
+
+
+def test_read_from_other_process():
+    context = multiprocessing.get_context('spawn')
+    with TaskStatusPublisher(slots=4) as publisher:
+        task = ProgressTask(10)
+        index = publisher.publish(task)
+        task.execute()
+
+        queue = context.Queue()
+        process = context.Process(target=read_in_process, args=(publisher.get_name(), queue))
+        process.start()
+        statuses = queue.get(timeout=30)
+        process.join()
+        assert statuses == [TaskStatus(index, 'Progress Task', PyTaskState.Completed, 100.0, 0)]
+
+        # Still there after the reader process exited.
+        with TaskStatusReader(publisher.get_name()) as reader:
+            assert len(reader.read()) == 1
@@ -0,0 +1,196 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import asyncio
+from abc import abstractmethod
+from typing import Callable, List, Optional
+
+from .pytask_base import PyTaskBase
+from .pytask_dispatcher import EventDispatcher
+from .pytask_exceptions import PyTaskAbortedException, PyTaskTimeoutException
+from .pytask_state import PyTaskState
+
+
+class AsyncPyTaskBase(PyTaskBase):
+    """ asyncio counterpart of PyTaskBase: the task runs as a coroutine on an
+    event loop rather than on a dedicated thread, so many (I/O bound) tasks can
+    share a single thread.
+
+    * execute, wait_inactive, wait_has_started, handle_interruption_request
+      and interruptable_delay are coroutines, all other methods are as for
+      PyTaskBase. E.g. pause, resume and abort can be called from any thread.
+    * The state machine is the same TaskStateMachine, so pause & abort
+      semantics are identical. State changes wake the waiting coroutines via
+      the event loop instead of a threading.Condition.
+    * A task runs on a single event loop, the one it is first awaited on.
+    * Cancelling execute aborts the task, e.g. asyncio.wait_for(task.execute(), timeout)
+      aborts it on timeout. Alternatively execute takes a deadline, as PyTaskBase.execute.
+    """
+
+    def __init__(self, task_name: str, dispatcher: Optional[EventDispatcher] = None):
+        """ Initializer.
+
+        :param task_name: Name of the task (e.g. for display purposes).
+        :param dispatcher: if supplied, progress, message and state change
+            callbacks are called via it rather than on the event loop.
+        """
+        super().__init__(task_name, dispatcher)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._state_waiters: List[asyncio.Future] = []
+        self._task_state_machine.subscribe_state_change(self._on_state_change)
+
+    @abstractmethod
+    async def on_execute(self) -> None:
+        """ This MUST be overridden in the specialization that implements the
+        actual functionality.
+        """
+
+    async def execute(self, deadline: Optional[float] = None) -> None:
+        """ Execute the task, see IPyTask.execute.
+        """
+        self._get_loop()
+        self._task_state_machine.handle_execute_request()
+        watch = self._watch_deadline(deadline)
+
+        try:
+            self.report_progress(0.0)
+            await self.on_execute()
+            self.report_progress(100.0)
+
+            self._task_state_machine.handle_task_completed()
+
+        except PyTaskAbortedException as e:
+            self.flush_progress()
+            self._task_state_machine.handle_task_aborted()
+            self._raise_if_deadline_expired(watch, e)
+            raise
+
+        except asyncio.CancelledError:
+            self.flush_progress()
+            self._task_state_machine.handle_abort_request()
+            self._task_state_machine.handle_task_aborted()
+            raise
+
+        except Exception:
+            self.flush_progress()
+            self._task_state_machine.handle_task_failed()
+            raise
+
+        finally:
+            if watch is not None:
+                watch.cancel()
+
+    async def handle_interruption_request(self) -> None:
+        """ Handle a request to interrupt the task, see
+        PyTaskBase.handle_interruption_request. Waits without blocking the
+        event loop while the task is paused.
+        """
+        self.flush_progress()
+        while self._task_state_machine.poll_interruption_request():
+            await self._wait_state_change()
+
+    async def interruptable_delay(self, delay_ms: float) -> None:
+        """ Wait for the specified amount of time to pass. Interruptible, see
+        TaskStateMachine.interruptable_delay.
+        """
+        self.flush_progress()
+        if self.get_state() not in [PyTaskState.Running, PyTaskState.Pausing,
+                                    PyTaskState.Aborting]:
+            raise RuntimeError("This function may only be called while in the 'Running', "
+                               "'Aborting' or 'Pausing' state.")
+
+        loop = self._get_loop()
+        deadline = loop.time() + delay_ms / 1000
+
+        while True:
+            # Checked before waiting: a request made while the task awaited
+            # something else is handled at once, not when the delay ends.
+            await self.handle_interruption_request()
+            time_left = deadline - loop.time()
+            if time_left <= 0:
+                return
+            await self._wait_state_change(time_left)
+
+    async def wait_inactive(self, timeout: Optional[float] = None) -> PyTaskState:
+        """ Wait until an inactive state has been reached.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises PyTaskTimeoutException: on timeout
+        """
+        return await self._wait_state(lambda state: state not in [
+            PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Aborting], timeout,
+            'task did not become inactive')
+
+    async def wait_has_started(self, timeout: Optional[float] = None) -> None:
+        """ Wait until the task has left the PyTaskState::Idle state.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :raises PyTaskTimeoutException: on timeout
+        """
+        await self._wait_state(lambda state: state != PyTaskState.Idle, timeout,
+                               'task did not start')
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def _wait_state(self, predicate: Callable[[PyTaskState], bool],
+                          timeout: Optional[float] = None,
+                          description: str = '') -> PyTaskState:
+        """ Wait until predicate(state) holds.
+
+        :raises PyTaskTimeoutException: '<description> within <timeout> s', on timeout
+        """
+        loop = self._get_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        state = self.get_state()
+        while not predicate(state):
+            time_left = None if deadline is None else deadline - loop.time()
+            if time_left is not None and time_left <= 0:
+                raise PyTaskTimeoutException('{0} within {1} s'.format(description, timeout))
+            await self._wait_state_change(time_left)
+            state = self.get_state()
+        return state
+
+    async def _wait_state_change(self, timeout: Optional[float] = None) -> None:
+        """ Wait for the next state change, or the timeout (seconds) to pass.
+
+        Must be called directly after checking the state, i.e. without awaiting
+        anything in between, so no state change can be missed: notifications
+        are delivered via the event loop.
+        """
+        loop = self._get_loop()
+        waiter = loop.create_future()
+        self._state_waiters.append(waiter)
+        # Not asyncio.wait_for: that can swallow a cancellation when the waiter is
+        # notified at the same time.
+        timer = loop.call_later(timeout, _wake, waiter) if timeout is not None else None
+        try:
+            await waiter
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if waiter in self._state_waiters:
+                self._state_waiters.remove(waiter)
+
+    def _on_state_change(self, state: PyTaskState) -> None:
+        """ State change callback, from any thread (with the state machine lock
+        held). Wakes the waiting coroutines on the event loop.
+        """
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._notify_state_waiters)
+            except RuntimeError:
+                pass  # loop closed, nobody can be waiting
+
+    def _notify_state_waiters(self) -> None:
+        waiters, self._state_waiters = self._state_waiters, []
+        for waiter in waiters:
+            _wake(waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
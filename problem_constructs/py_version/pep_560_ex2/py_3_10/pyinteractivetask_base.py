@@ -2,15 +2,20 @@
 # All rights reserved. This file includes confidential and proprietary
 # information of FEI Company.
 
+import asyncio
 import logging
 from abc import ABC
-from threading import Condition, Lock
+from concurrent.futures import TimeoutError
 from typing import Callable, List, Optional, TypeVar
 
 from .i_pyinteractivetask import IPyInteractiveTask
 from .pytask_base import PyTaskBase
-from .pytask_event import EventBroadcaster, Subscription
-from .pytask_exceptions import PyTaskFailedException
+from .pytask_dispatcher import EventDispatcher
+from .pytask_event import Subscription
+from .pytask_event_bus import TaskEventKind
+from .pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from .pytask_request_channel import UserRequest, UserRequestChannel
+from .pytask_state import PyTaskState
 
 logger = logging.getLogger(__name__)
 
@@ -23,41 +28,104 @@ class PyInteractiveTaskBase(PyTaskBase,
     """ Implements common base behavior of the IPyInteractiveTask interface.
         Supplements automated task functionality provided by PyTaskBase with interactive behaviour
         A task that needs interactive behaviour should derive from PyInteractiveTaskBase
+
+        Each request for a user response is a UserRequest with an ID and a
+        future, kept in a UserRequestChannel: a response is never lost, also
+        when it is provided before the task waits for it, several requests can
+        be outstanding, waiting can time out and abort cancels all requests.
     """
-    def __init__(self, task_name: str):
+    def __init__(self, task_name: str, dispatcher: Optional[EventDispatcher] = None):
         """ Initializer.
 
         :param task_name: Name of the task (e.g. for display purposes).
+        :param dispatcher: if supplied, all callbacks are called via it rather
+            than on the task's thread.
         """
-        super().__init__(task_name)
-        self.__user_response_requested_broadcaster = EventBroadcaster()
-        self.__lock = Lock()
-        self.__condition_variable = Condition(self.__lock)
-        self.__waiting_for_user_response = False
-        self.__user_response_received: Optional[Response_type] = None
+        super().__init__(task_name, dispatcher)
+        self.__user_requests: UserRequestChannel[Request_type, Response_type] = \
+            UserRequestChannel()
         self.__valid_user_actions: List[Response_type] = []
 
     def subscribe_user_response_requested(self, user_response_requested_handler:
-                                          Callable[[Request_type], None]) -> Subscription:
+                                          Callable[[Request_type], None],
+                                          weak: bool = False) -> Subscription:
+        """ See IPyInteractiveTask.subscribe_user_response_requested.
+
+        :param weak: if True, the task only keeps a weak reference to the
+            handler, see EventBroadcaster.add_handler
+        """
         logger.info('Client subscribed to "user response requested callback"')
-        return self.__user_response_requested_broadcaster.add_handler(
-            user_response_requested_handler)
+        return self._event_bus.add_value_handler(TaskEventKind.UserResponseRequested,
+                                                 user_response_requested_handler, weak)
 
-    def provide_user_response(self, user_response: Response_type) -> None:
-        self.__user_response_received = user_response
+    def provide_user_response(self, user_response: Response_type,
+                              request_id: Optional[int] = None) -> None:
+        """ See IPyInteractiveTask.provide_user_response.
+
+        :param request_id: ID of the request responded to, None for the oldest
+            outstanding request, see get_pending_user_requests
+        """
+        # Before responding: the task may set the valid actions of its next request.
         self.__reset_valid_user_actions()
-        self.__end_wait_for_user_response()
+        if self.__user_requests.respond(user_response, request_id) is None:
+            logger.warning('User response ignored: no matching request outstanding')
+
+    def request_user_response(self, user_instruction: Request_type,
+                              timeout: Optional[float] = None) -> Response_type:
+        """ See IPyInteractiveTask.request_user_response.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever.
+            A PyTaskFailedException is raised when it expires.
+        """
+        request = self.submit_user_request(user_instruction)
+        try:
+            user_response = request.future.result(timeout)
+        except TimeoutError:
+            if self.__user_requests.discard(request):
+                raise PyTaskFailedException('No user response received by the interactive '
+                                            'task within {0} s'.format(timeout)) from None
+            user_response = request.future.result()  # responded just in time
+        super().handle_interruption_request()
+        return self.__check_user_response(user_response)
 
-    def request_user_response(self, user_instruction: Request_type) -> Response_type:
-        if not self.__user_response_requested_broadcaster.is_subscribed():
+    async def request_user_response_async(self, user_instruction: Request_type,
+                                          timeout: Optional[float] = None) -> Response_type:
+        """ Variant of request_user_response for tasks running on an event
+        loop: waits without blocking the loop. Pause and abort requests made
+        after the response has been received are left to the task.
+        """
+        request = self.submit_user_request(user_instruction)
+        try:
+            user_response = await asyncio.wait_for(asyncio.wrap_future(request.future), timeout)
+        except asyncio.TimeoutError:
+            self.__user_requests.discard(request)
+            raise PyTaskFailedException('No user response received by the interactive '
+                                        'task within {0} s'.format(timeout)) from None
+        return self.__check_user_response(user_response)
+
+    def submit_user_request(self, user_instruction: Request_type
+                            ) -> UserRequest[Request_type, Response_type]:
+        """ Ask the user for a response without waiting for it, e.g. to have
+        several requests outstanding. Used from within the task.
+
+        :param user_instruction: Instruction for the user to perform an action
+        :return: the request, its future receives the response
+        """
+        if not self._event_bus.is_subscribed(TaskEventKind.UserResponseRequested):
             raise PyTaskFailedException('Client not subscribed to "user response '
                                         'requested callback". Potential task hangup possible')
+        # Registered before the client is told, so an early response is not lost.
+        request = self.__user_requests.open(user_instruction)
+        if self.get_state() == PyTaskState.Aborting:
+            self.__user_requests.discard(request)
+            raise PyTaskAbortedException('Task has been aborted')
         self.__report_user_instruction(user_instruction)
-        self.__wait_for_user_response()
-        super().handle_interruption_request()
-        if self.__user_response_received is None:
-            raise PyTaskFailedException('No user response received by the interactive task')
-        return self.__user_response_received
+        return request
+
+    def get_pending_user_requests(self) -> List[UserRequest[Request_type, Response_type]]:
+        """ Return the requests waiting for a user response, oldest first.
+        """
+        return self.__user_requests.get_pending()
 
     def get_valid_user_actions(self) -> List[Response_type]:
         return self.__valid_user_actions
@@ -66,30 +134,22 @@ class PyInteractiveTaskBase(PyTaskBase,
         self.__valid_user_actions = actions[:]
 
     def pause(self) -> None:
-        if not self.__is_waiting_for_user_response():
+        # Pausing has no effect while waiting for the user.
+        if not self.__user_requests.has_pending():
             super().pause()
 
     def abort(self) -> None:
         super().abort()
-        if self.__is_waiting_for_user_response():
-            self.__end_wait_for_user_response()
+        self.__user_requests.cancel_all(PyTaskAbortedException('Task has been aborted'))
 
-    def __is_waiting_for_user_response(self) -> bool:
-        with self.__condition_variable:
-            return self.__waiting_for_user_response
+    @staticmethod
+    def __check_user_response(user_response: Optional[Response_type]) -> Response_type:
+        if user_response is None:
+            raise PyTaskFailedException('No user response received by the interactive task')
+        return user_response
 
     def __report_user_instruction(self, message: Request_type) -> None:
-        self.__user_response_requested_broadcaster.emit(message)
+        self._event_bus.emit(TaskEventKind.UserResponseRequested, message)
 
     def __reset_valid_user_actions(self) -> None:
         self.__valid_user_actions.clear()
-
-    def __wait_for_user_response(self):
-        with self.__condition_variable:
-            self.__waiting_for_user_response = True
-            self.__condition_variable.wait()
-
-    def __end_wait_for_user_response(self):
-        with self.__condition_variable:
-            self.__condition_variable.notify_all()
-            self.__waiting_for_user_response = False
@@ -4,31 +4,43 @@
 
 from abc import abstractmethod
 import logging
-from typing import Callable
+import time
+from typing import Callable, Iterable, List, Optional
 
 from .i_pytask import IPyTask
-from .pytask_event import EventBroadcaster, Subscription
-from .pytask_exceptions import PyTaskAbortedException
+from .pytask_dispatcher import EventDispatcher
+from .pytask_event import Subscription
+from .pytask_event_bus import EventBus, TaskEvent, TaskEventKind
+from .pytask_exceptions import PyTaskAbortedException, PyTaskTimeoutException
 from .pytask_state import PyTaskState
 from .pytask_state_machine import TaskStateMachine
+from .pytask_tracing import HistogramRegistry, TaskTracer
+from .pytask_watchdog import DeadlineWatch, default_watchdog
 
 
 class PyTaskBase(IPyTask):
     """ Implements common base behavior of the IPyTask interface.
     """
 
-    def __init__(self, task_name: str):
+    def __init__(self, task_name: str, dispatcher: Optional[EventDispatcher] = None):
         """ Initializer.
 
         :param task_name: Name of the task (e.g. for display purposes).
+        :param dispatcher: if supplied, progress, message and state change
+            callbacks are called via it rather than on the task's thread.
         """
         super().__init__()
         self._logger = logging.getLogger(self.__class__.__name__)
 
-        self._task_state_machine = TaskStateMachine()
+        # Single bus for all events of the task, see subscribe_events.
+        self._event_bus = EventBus(dispatcher)
+        self._task_state_machine = TaskStateMachine(event_bus=self._event_bus)
         self._last_reported_progress = -1.0
-        self._progress_broadcaster = EventBroadcaster()
-        self._message_broadcaster = EventBroadcaster()
+        self._last_reported_progress_time = 0.0
+        self._pending_progress: Optional[float] = None
+        self._progress_coalescing = False
+        self._progress_min_interval = 0.0
+        self._progress_min_delta = 0.0
         self.task_name = task_name
 
     @abstractmethod
@@ -60,7 +72,7 @@ class PyTaskBase(IPyTask):
 
         :param message: message to broadcast
         """
-        self._message_broadcaster.emit(message)
+        self._event_bus.emit(TaskEventKind.Message, message)
 
     def report_progress(self, percentage: float) -> None:
         """ Provide progress update to the client regarding the execution of
@@ -72,11 +84,76 @@ class PyTaskBase(IPyTask):
         The parameter can be any float value, though it is expected to be a
         percentage value indicating the current progress.
 
+        If progress coalescing is configured, updates that come too soon or are
+        too small are held back, see configure_progress_coalescing.
+
         :param percentage: New progress, expected to be between 0. and 100.
         """
-        if self._last_reported_progress != percentage:
+        if not self._progress_coalescing:
+            if self._last_reported_progress != percentage:
+                self._last_reported_progress = percentage
+                self._event_bus.emit(TaskEventKind.Progress, percentage)
+            return
+
+        if percentage == self._last_reported_progress:
+            self._pending_progress = None
+            return
+        now = time.monotonic()
+        if (percentage == 0.0 or percentage == 100.0
+                or (now - self._last_reported_progress_time >= self._progress_min_interval
+                    and abs(percentage - self._last_reported_progress)
+                    >= self._progress_min_delta)):
+            self._pending_progress = None
             self._last_reported_progress = percentage
-            self._progress_broadcaster.emit(percentage)
+            self._last_reported_progress_time = now
+            self._event_bus.emit(TaskEventKind.Progress, percentage)
+        else:
+            self._pending_progress = percentage
+
+    def configure_progress_coalescing(self, max_rate: float = 0.0, min_delta: float = 0.0) -> None:
+        """ Limit the number of progress callbacks, e.g. for a task that reports
+        progress in a tight loop. By default every change is reported.
+
+        * 0% and 100% are always reported.
+        * A progress update that is held back is reported later if it is still
+          the latest value: by the next update that passes the limits, or by
+          flush_progress. The latter is called when the task handles interruption
+          requests, waits via interruptable_delay, and when it ends.
+
+        :param max_rate: maximum number of progress callbacks per second, 0. for no limit
+        :param min_delta: minimum change since the last progress callback, 0. for any change
+        """
+        self._progress_min_interval = 1.0 / max_rate if max_rate > 0.0 else 0.0
+        self._progress_min_delta = min_delta
+        self._progress_coalescing = max_rate > 0.0 or min_delta > 0.0
+
+    def enable_tracing(self, name: Optional[str] = None,
+                       registry: Optional[HistogramRegistry] = None) -> TaskTracer:
+        """ Record the state transitions of the task and the time its
+        callbacks take, in histograms, see TaskTracer. Tracing is off by default.
+
+        The callback histograms are '<name>.emit.<kind>.<handler>', e.g. kind
+        progress or state_change, see EventBus.enable_timing.
+
+        :param name: prefix of the histogram names, default the class name
+        :param registry: registry for the histograms, None for the default one
+        :return: the tracer, e.g. for its trace
+        """
+        tracer = TaskTracer(name or self.__class__.__name__, registry)
+        self._event_bus.enable_timing(tracer.registry, tracer.name + '.emit')
+        self._task_state_machine.set_tracer(tracer)
+        return tracer
+
+    def flush_progress(self) -> None:
+        """ Report the latest progress update held back by progress coalescing,
+        if any.
+        """
+        percentage = self._pending_progress
+        if percentage is not None:
+            self._pending_progress = None
+            self._last_reported_progress = percentage
+            self._last_reported_progress_time = time.monotonic()
+            self._event_bus.emit(TaskEventKind.Progress, percentage)
 
     def handle_interruption_request(self) -> None:
         """ Handle a request to interrupt the task.
@@ -84,11 +161,15 @@ class PyTaskBase(IPyTask):
         The specialization of PyTaskBase calls this method at a appropriate
         time when the interrupt can be handled.
         """
+        # Called at every step of a task: avoid the call if there is nothing to flush.
+        if self._pending_progress is not None:
+            self.flush_progress()
         self._task_state_machine.handle_interruption_request()
 
     def interruptable_delay(self, delay_ms: float) -> None:
         """ Wait for the specified amount of time to pass. Interruptible
         """
+        self.flush_progress()
         self._task_state_machine.interruptable_delay(delay_ms)
 
     def get_name(self) -> str:
@@ -98,10 +179,14 @@ class PyTaskBase(IPyTask):
         """
         return self.task_name
 
-    def execute(self) -> None:
+    def execute(self, deadline: Optional[float] = None) -> None:
         """ Start the execution of the task
+
+        :param deadline: time.monotonic() value at which the task is aborted,
+            see IPyTask.execute
         """
         self._task_state_machine.handle_execute_request()
+        watch = self._watch_deadline(deadline)
 
         try:
             self.report_progress(0.0)
@@ -110,14 +195,37 @@ class PyTaskBase(IPyTask):
 
             self._task_state_machine.handle_task_completed()
 
-        except PyTaskAbortedException:
+        except PyTaskAbortedException as e:
+            self.flush_progress()
             self._task_state_machine.handle_task_aborted()
+            self._raise_if_deadline_expired(watch, e)
             raise
 
         except Exception:
+            self.flush_progress()
             self._task_state_machine.handle_task_failed()
             raise
 
+        finally:
+            if watch is not None:
+                watch.cancel()
+
+    def _watch_deadline(self, deadline: Optional[float]) -> Optional[DeadlineWatch]:
+        """ Abort the task when the deadline supplied passes, see execute.
+        """
+        if deadline is None:
+            return None
+        return default_watchdog.watch(deadline, self.abort)
+
+    def _raise_if_deadline_expired(self, watch: Optional[DeadlineWatch],
+                                   aborted: PyTaskAbortedException) -> None:
+        """ Raise a PyTaskTimeoutException if the task was aborted because of
+        its deadline.
+        """
+        if watch is not None and watch.expired:
+            raise PyTaskTimeoutException('{0} did not complete before its deadline'.format(
+                self.task_name)) from aborted
+
     def pause(self) -> None:
         if self.can_pause:
             self._task_state_machine.handle_pause_request()
@@ -129,25 +237,66 @@ class PyTaskBase(IPyTask):
         if self.can_abort:
             self._task_state_machine.handle_abort_request()
 
-    def wait_inactive(self) -> PyTaskState:
-        return self._task_state_machine.wait_inactive()
+    def wait_inactive(self, timeout: Optional[float] = None) -> PyTaskState:
+        return self._task_state_machine.wait_inactive(timeout)
 
-    def wait_has_started(self) -> None:
-        return self._task_state_machine.wait_has_started()
+    def wait_has_started(self, timeout: Optional[float] = None) -> None:
+        return self._task_state_machine.wait_has_started(timeout)
 
     def get_state(self) -> PyTaskState:
         return self._task_state_machine._state
 
-    def subscribe_progress(self, progress_callback: Callable[[float], None]) -> Subscription:
+    def subscribe_progress(self, progress_callback: Callable[[float], None],
+                           weak: bool = False) -> Subscription:
+        """ See IPyTask.subscribe_progress.
+
+        :param weak: if True, the task only keeps a weak reference to the
+            callback, see EventBroadcaster.add_handler
+        """
         self._logger.info('client subscribed to "progress callbacks"')
-        return self._progress_broadcaster.add_handler(progress_callback)
+        return self._event_bus.add_value_handler(TaskEventKind.Progress, progress_callback, weak)
 
-    def subscribe_message(self, message_callback: Callable[[str], None]) -> Subscription:
+    def subscribe_message(self, message_callback: Callable[[str], None],
+                          weak: bool = False) -> Subscription:
+        """ See IPyTask.subscribe_message and subscribe_progress. """
         self._logger.info('client subscribed to "message callbacks"')
-        return self._message_broadcaster.add_handler(message_callback)
+        return self._event_bus.add_value_handler(TaskEventKind.Message, message_callback, weak)
 
     def subscribe_state_change(self,
                                state_change_callback: Callable[[PyTaskState], None],
-                               ) -> Subscription:
+                               weak: bool = False) -> Subscription:
+        """ See IPyTask.subscribe_state_change and subscribe_progress. """
         self._logger.info('client subscribed to "state change callbacks"')
-        return self._task_state_machine.subscribe_state_change(state_change_callback)
+        return self._task_state_machine.subscribe_state_change(state_change_callback, weak)
+
+    def subscribe_events(self, event_callback: Callable[[TaskEvent], None],
+                         kinds: Optional[Iterable[TaskEventKind]] = None,
+                         states: Optional[Iterable[PyTaskState]] = None,
+                         weak: bool = False) -> Subscription:
+        """ Subscribe to the events of the task with a single callback, e.g.
+        all of them, or only the state changes to an inactive state.
+
+        :param event_callback: called with each event, a TaskEvent
+        :param kinds: kinds of events, None for all
+        :param states: for state changes, the new states, None for all
+        :param weak: see subscribe_progress
+        """
+        self._logger.info('client subscribed to "event callbacks"')
+        return self._event_bus.add_handler(event_callback, kinds, states, weak)
+
+    def subscribe_event_batches(self, batch_callback: Callable[[List[TaskEvent]], None],
+                                kinds: Optional[Iterable[TaskEventKind]] = None,
+                                states: Optional[Iterable[PyTaskState]] = None,
+                                max_batch: int = 64, max_latency: float = 0.1,
+                                weak: bool = False) -> Subscription:
+        """ As subscribe_events, but the events are delivered in batches
+        (lists), e.g. for a UI that refreshes once per batch. See
+        EventBus.add_batch_handler for when a batch is delivered.
+
+        :param batch_callback: called with each batch of events
+        :param max_batch: maximum number of events per batch
+        :param max_latency: maximum delay of an event in seconds
+        """
+        self._logger.info('client subscribed to "event batch callbacks"')
+        return self._event_bus.add_batch_handler(batch_callback, kinds, states, max_batch,
+                                                 max_latency, weak)
@@ -0,0 +1,220 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import queue
+from concurrent.futures import Future, wait
+from functools import partial
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .i_pytask import IPyTask
+from .pytask_base import PyTaskBase
+from .pytask_dispatcher import EventDispatcher
+from .pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from .pytask_executor import TaskExecutor
+
+
+class _Node:
+    """ A child task of a TaskGraph. """
+    __slots__ = ('task', 'weight', 'dependents', 'num_dependencies', 'progress', 'future')
+
+    def __init__(self, task: IPyTask, weight: float):
+        self.task = task
+        self.weight = weight
+        self.dependents: List['_Node'] = []
+        self.num_dependencies = 0
+        self.progress = 0.0
+        self.future: Optional[Future] = None
+
+
+class TaskGraph(PyTaskBase):
+    """ Task that executes child tasks, each as soon as the tasks it depends
+    on have completed, i.e. independent children run concurrently.
+
+    * The children run on a TaskExecutor: the one supplied, e.g. shared by
+      several graphs, or else one created for each execution. Note: when a
+      graph itself runs on the executor it uses for its children, the executor
+      needs more workers than the nesting depth of the graphs.
+    * pause, resume and abort of the graph are propagated to all its running
+      children in one step, queued children are held back / cancelled.
+    * If a child fails, the other children are aborted and the graph fails.
+    * Progress is the progress of the children weighted by their cost.
+    """
+
+    def __init__(self, task_name: str, executor: Optional[TaskExecutor] = None,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """ Initializer.
+
+        :param task_name: Name of the task (e.g. for display purposes).
+        :param executor: executor to run the children on, None for a private one
+        :param dispatcher: see PyTaskBase
+        """
+        super().__init__(task_name, dispatcher)
+        self._executor = executor
+        self._nodes: Dict[int, _Node] = {}
+        # Completed children and pause / abort wake-ups, a new queue per execution.
+        self._events: queue.Queue = queue.Queue()
+        self._group = 'TaskGraph-{0}'.format(id(self))
+        self._active_executor: Optional[TaskExecutor] = None
+        self._progress_lock = Lock()
+        self._weighted_progress = 0.0
+        self._total_weight = 0.0
+
+    def add_task(self, task: IPyTask, depends_on: Iterable[IPyTask] = (),
+                 weight: float = 1.0) -> IPyTask:
+        """ Add a child task. Dependencies must have been added before, so the
+        graph cannot contain cycles.
+
+        :param task: the child task
+        :param depends_on: tasks that must have completed before it starts
+        :param weight: cost of the task relative to the others, for progress
+        :return: the task added
+        """
+        if weight <= 0.0:
+            raise ValueError('weight must be positive')
+        if id(task) in self._nodes:
+            raise ValueError("task '{0}' already added".format(task.get_name()))
+        node = _Node(task, weight)
+        for dependency in depends_on:
+            dependency_node = self._nodes.get(id(dependency))
+            if dependency_node is None:
+                raise ValueError("dependency '{0}' must be added first".format(
+                    dependency.get_name()))
+            dependency_node.dependents.append(node)
+            node.num_dependencies += 1
+        self._nodes[id(task)] = node
+        return task
+
+    def pause(self) -> None:
+        super().pause()
+        executor = self._active_executor
+        if executor is not None:
+            executor.pause(self._group)
+        self._events.put(None)
+
+    def resume(self) -> None:
+        super().resume()
+        executor = self._active_executor
+        if executor is not None:
+            executor.resume(self._group)
+
+    def abort(self) -> None:
+        super().abort()
+        executor = self._active_executor
+        if executor is not None:
+            executor.abort(self._group)
+        self._events.put(None)
+
+    def on_execute(self) -> None:
+        nodes = list(self._nodes.values())
+        executor = self._executor or TaskExecutor(max_workers=max(1, min(len(nodes), 32)))
+        events: queue.Queue = queue.Queue()
+        self._events = events
+        self._active_executor = executor
+        self._weighted_progress = 0.0
+        self._total_weight = sum(node.weight for node in nodes)
+        waiting = {id(node): node.num_dependencies for node in nodes}
+        submitted: List[_Node] = []
+        subscriptions = []
+        for node in nodes:
+            node.progress = 0.0
+            node.future = None
+            subscriptions.append(node.task.subscribe_progress(
+                partial(self._on_child_progress, node)))
+
+        try:
+            self.handle_interruption_request()
+            for node in nodes:
+                if node.num_dependencies == 0:
+                    self._submit(executor, node, submitted, events)
+
+            num_done = 0
+            while num_done < len(nodes):
+                node = events.get()
+                self.handle_interruption_request()
+                if node is None:
+                    continue  # woken up for a pause / abort request
+                num_done += 1
+                if node.future.cancelled():
+                    raise PyTaskAbortedException('Task has been aborted')
+                exception = node.future.exception()
+                if exception is not None:
+                    raise PyTaskFailedException("child task '{0}' failed: {1}".format(
+                        node.task.get_name(), exception)) from exception
+
+                self._on_child_progress(node, 100.0)
+                for dependent in node.dependents:
+                    waiting[id(dependent)] -= 1
+                    if waiting[id(dependent)] == 0:
+                        self._submit(executor, dependent, submitted, events)
+
+        except BaseException:
+            executor.abort(self._group)
+            wait([node.future for node in submitted])
+            raise
+
+        finally:
+            for subscription in subscriptions:
+                subscription.unsubscribe()
+            self._active_executor = None
+            if executor is self._executor:
+                # A pause of the graph must not hold back its next execution.
+                executor.resume(self._group)
+            else:
+                executor.shutdown(wait=False)
+
+    def _submit(self, executor: TaskExecutor, node: _Node, submitted: List[_Node],
+                events: queue.Queue) -> None:
+        node.future = executor.submit(node.task, group=self._group)
+        submitted.append(node)
+        node.future.add_done_callback(lambda future: events.put(node))
+
+    def _on_child_progress(self, node: _Node, percentage: float) -> None:
+        with self._progress_lock:
+            self._weighted_progress += node.weight * (percentage - node.progress)
+            node.progress = percentage
+            progress = self._weighted_progress / self._total_weight
+            # 100% is reported by the graph itself once all children completed.
+            if progress < 100.0:
+                self.report_progress(progress)
+
+
+class SequenceTask(TaskGraph):
+    """ Task that executes child tasks one after the other. """
+
+    def __init__(self, task_name: str, tasks: Sequence[IPyTask],
+                 weights: Optional[Sequence[float]] = None,
+                 executor: Optional[TaskExecutor] = None,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """ Initializer.
+
+        :param task_name: Name of the task (e.g. for display purposes).
+        :param tasks: the child tasks, in execution order
+        :param weights: cost of each child task, None for equal costs
+        :param executor: see TaskGraph
+        :param dispatcher: see PyTaskBase
+        """
+        super().__init__(task_name, executor, dispatcher)
+        previous: List[IPyTask] = []
+        for task, weight in zip(tasks, weights or [1.0] * len(tasks)):
+            previous = [self.add_task(task, previous, weight)]
+
+
+class ParallelTask(TaskGraph):
+    """ Task that executes child tasks concurrently. """
+
+    def __init__(self, task_name: str, tasks: Sequence[IPyTask],
+                 weights: Optional[Sequence[float]] = None,
+                 executor: Optional[TaskExecutor] = None,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """ Initializer.
+
+        :param task_name: Name of the task (e.g. for display purposes).
+        :param tasks: the child tasks
+        :param weights: cost of each child task, None for equal costs
+        :param executor: see TaskGraph
+        :param dispatcher: see PyTaskBase
+        """
+        super().__init__(task_name, executor, dispatcher)
+        for task, weight in zip(tasks, weights or [1.0] * len(tasks)):
+            self.add_task(task, weight=weight)
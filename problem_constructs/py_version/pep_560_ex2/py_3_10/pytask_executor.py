@@ -0,0 +1,317 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .i_pytask import IPyTask
+from .pytask_exceptions import PyTaskInvalidStateException
+from .pytask_state import PyTaskState
+
+logger = logging.getLogger(__name__)
+
+
+class AggregatedState(NamedTuple):
+    """ Combined view of all tasks submitted to a TaskExecutor.
+
+    queued:     tasks waiting for a worker.
+    running:    tasks started but not yet finished (includes pausing, paused
+                and aborting tasks).
+    states:     number of started tasks per current state.
+    progress:   mean progress (%) of all tasks submitted and not cancelled.
+    """
+    queued: int
+    running: int
+    states: Dict[PyTaskState, int]
+    progress: float
+
+
+class _TaskEntry:
+    """ Book keeping of a single submitted task. """
+    __slots__ = ('task', 'group', 'future', 'state', 'progress', 'subscriptions')
+
+    def __init__(self, task: IPyTask, group: Optional[str]):
+        self.task = task
+        self.group = group
+        self.future: Future = Future()
+        self.state = PyTaskState.Idle
+        self.progress = 0.0
+        self.subscriptions: List = []
+
+
+class TaskExecutor:
+    """ Executes IPyTask instances on a bounded pool of worker threads.
+
+    * Tasks with a higher priority are started first, equal priorities in
+      submission order.
+    * Tasks can be put in a group, the number of tasks of a group running at
+      the same time can be limited.
+    * Bulk pause, resume and abort, for all tasks or a single group.
+    * get_aggregated_state: a single view of all tasks, based on the state
+      change and progress subscriptions of the tasks.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, max_workers: int = 4, group_limits: Optional[Dict[str, int]] = None):
+        """ Initializer.
+
+        :param max_workers: maximum number of tasks running at the same time
+        :param group_limits: maximum number of running tasks per group
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self._max_workers = max_workers
+        self._group_limits = dict(group_limits or {})
+
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._workers: List[threading.Thread] = []
+        self._idle_workers = 0
+        self._shutdown = False
+        self._paused_groups: set = set()
+        self._all_paused = False
+
+        # Queued entries per group: heap of (-priority, sequence number, entry).
+        self._queues: Dict[Optional[str], List] = {}
+        self._sequence = itertools.count()
+        self._running: Dict[Optional[str], List[_TaskEntry]] = {}
+        self._num_queued = 0
+        self._num_running = 0
+
+        self._state_counts: Dict[PyTaskState, int] = {}
+        self._num_tasks = 0
+        self._progress_sum = 0.0
+
+    def submit(self, task: IPyTask, priority: int = 0, group: Optional[str] = None) -> Future:
+        """ Queue a task for execution.
+
+        :param task: task to execute, in the Idle (or an inactive) state
+        :param priority: tasks with a higher priority are started first
+        :param group: name of the group of the task, see group_limits
+        :return: future with the result of the execution: None or the exception
+            raised by the task. Cancelled if the task is aborted before it starts.
+        """
+        entry = _TaskEntry(task, group)
+        entry.subscriptions = [
+            task.subscribe_state_change(lambda state: self._on_state_change(entry, state)),
+            task.subscribe_progress(lambda percentage: self._on_progress(entry, percentage)),
+        ]
+        with self._lock:
+            if not self._shutdown:
+                heapq.heappush(self._queues.setdefault(group, []),
+                               (-priority, next(self._sequence), entry))
+                self._num_queued += 1
+                self._num_tasks += 1
+                if self._idle_workers:
+                    self._work_available.notify()
+                elif len(self._workers) < self._max_workers:
+                    worker = threading.Thread(target=self._run_worker, daemon=True,
+                                              name='TaskExecutor-{0}'.format(len(self._workers)))
+                    self._workers.append(worker)
+                    worker.start()
+                return entry.future
+        # Shut down, possibly while subscribing: the task is not kept subscribed.
+        self._finish(entry)
+        raise RuntimeError('TaskExecutor has been shut down')
+
+    def pause(self, group: Optional[str] = None) -> None:
+        """ Pause the running tasks and do not start queued tasks until resumed.
+
+        :param group: only the tasks of this group, None for all tasks
+        """
+        with self._lock:
+            if group is None:
+                self._all_paused = True
+            else:
+                self._paused_groups.add(group)
+            entries = self._running_entries(group)
+        for entry in entries:
+            self._request(entry, entry.task.pause)
+
+    def resume(self, group: Optional[str] = None) -> None:
+        """ Resume paused tasks and the starting of queued tasks.
+
+        :param group: only the tasks of this group, None for all tasks
+        """
+        with self._lock:
+            if group is None:
+                self._all_paused = False
+                self._paused_groups.clear()
+            else:
+                self._paused_groups.discard(group)
+            entries = self._running_entries(group)
+            self._work_available.notify_all()
+        for entry in entries:
+            if entry.task.get_state() in [PyTaskState.Pausing, PyTaskState.Paused]:
+                self._request(entry, entry.task.resume)
+
+    def abort(self, group: Optional[str] = None) -> None:
+        """ Abort the running tasks and cancel the queued tasks.
+
+        :param group: only the tasks of this group, None for all tasks
+        """
+        with self._lock:
+            cancelled = []
+            for queue_group in list(self._queues):
+                if group is None or queue_group == group:
+                    cancelled.extend(entry for _, _, entry in self._queues.pop(queue_group))
+            self._num_queued -= len(cancelled)
+            self._num_tasks -= len(cancelled)
+            entries = self._running_entries(group)
+        for entry in cancelled:
+            self._finish(entry)
+            entry.future.cancel()
+        for entry in entries:
+            self._request(entry, entry.task.abort)
+        with self._lock:
+            self._idle.notify_all()
+
+    def get_aggregated_state(self) -> AggregatedState:
+        """ Return the combined state of all tasks submitted.
+        """
+        with self._lock:
+            progress = self._progress_sum / self._num_tasks if self._num_tasks else 0.0
+            return AggregatedState(self._num_queued, self._num_running,
+                                   dict(self._state_counts), progress)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """ Wait until no tasks are queued or running.
+
+        :param timeout: maximum time to wait in seconds, None to wait forever
+        :return: True if all tasks are done, False on timeout
+        """
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: self._num_queued == 0 and self._num_running == 0, timeout)
+
+    def shutdown(self, wait: bool = True, abort: bool = False) -> None:
+        """ Stop accepting tasks, stop the workers once all queued tasks are done.
+
+        Paused tasks and groups are resumed, or aborted if abort is True.
+
+        :param wait: wait for the workers to finish
+        :param abort: abort all running and queued tasks first
+        """
+        with self._lock:
+            self._shutdown = True
+            workers = list(self._workers)
+        if abort:
+            self.abort()
+        self.resume()
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _running_entries(self, group: Optional[str]) -> List[_TaskEntry]:
+        """ Must be called with lock held. """
+        if group is None:
+            return [entry for entries in self._running.values() for entry in entries]
+        return list(self._running.get(group, []))
+
+    @staticmethod
+    def _request(entry: _TaskEntry, request: Callable[[], None]) -> None:
+        """ Make a pause / resume / abort request to a running task.
+
+        A task handed to a worker may not have left the Idle state yet, in which
+        case the request is made once it has. A task that finished, or was paused
+        or aborted in the meantime, is skipped.
+        """
+        try:
+            request()
+        except PyTaskInvalidStateException:
+            if entry.task.get_state() != PyTaskState.Idle:
+                return
+            entry.task.wait_has_started()
+            TaskExecutor._request(entry, request)
+
+    def _next_entry(self) -> Optional[_TaskEntry]:
+        """ Pop the highest priority entry that may start. Must be called with
+        lock held.
+        """
+        if self._all_paused:
+            return None
+        best_group = None
+        best_key = None
+        for group, queue in self._queues.items():
+            if not queue or group in self._paused_groups:
+                continue
+            limit = self._group_limits.get(group)
+            if limit is not None and len(self._running.get(group, ())) >= limit:
+                continue
+            if best_key is None or queue[0][:2] < best_key:
+                best_group, best_key = group, queue[0][:2]
+        if best_key is None:
+            return None
+
+        queue = self._queues[best_group]
+        entry = heapq.heappop(queue)[2]
+        if not queue:
+            del self._queues[best_group]
+        return entry
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._lock:
+                entry = self._next_entry()
+                while entry is None:
+                    if self._shutdown and not self._queues:
+                        return
+                    self._idle_workers += 1
+                    self._work_available.wait()
+                    self._idle_workers -= 1
+                    entry = self._next_entry()
+                self._num_queued -= 1
+                started = entry.future.set_running_or_notify_cancel()
+                if started:
+                    self._num_running += 1
+                    self._running.setdefault(entry.group, []).append(entry)
+                else:
+                    # Cancelled by the caller while queued: not executed, nor
+                    # counted in the progress, as for abort.
+                    self._num_tasks -= 1
+                    self._progress_sum -= entry.progress
+                    if self._num_queued == 0 and self._num_running == 0:
+                        self._idle.notify_all()
+            if not started:
+                self._finish(entry)
+                continue
+
+            try:
+                entry.task.execute()
+            except BaseException as e:
+                entry.future.set_exception(e)
+            else:
+                entry.future.set_result(None)
+            finally:
+                self._finish(entry)
+                with self._lock:
+                    self._running[entry.group].remove(entry)
+                    self._num_running -= 1
+                    # A slot of the group became available.
+                    self._work_available.notify()
+                    if self._num_queued == 0 and self._num_running == 0:
+                        self._idle.notify_all()
+
+    @staticmethod
+    def _finish(entry: _TaskEntry) -> None:
+        for subscription in entry.subscriptions:
+            subscription.unsubscribe()
+        entry.subscriptions = []
+
+    def _on_state_change(self, entry: _TaskEntry, state: PyTaskState) -> None:
+        with self._lock:
+            if entry.state != PyTaskState.Idle:
+                self._state_counts[entry.state] -= 1
+            self._state_counts[state] = self._state_counts.get(state, 0) + 1
+            entry.state = state
+
+    def _on_progress(self, entry: _TaskEntry, percentage: float) -> None:
+        with self._lock:
+            self._progress_sum += percentage - entry.progress
+            entry.progress = percentage
@@ -0,0 +1,367 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import multiprocessing
+import os
+import pickle
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+from .pytask_base import PyTaskBase
+from .pytask_dispatcher import EventDispatcher
+from .pytask_event_bus import TaskEventKind
+from .pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from .pytask_state import PyTaskState
+
+# Control word values, written by the parent, read by the worker process.
+_RUN = 0
+_PAUSE = 1
+_ABORT = 2
+
+# Control word per task state, _RUN for the others.
+_STATE_CONTROLS = {
+    PyTaskState.Pausing: _PAUSE,
+    PyTaskState.Paused: _PAUSE,
+    PyTaskState.Aborting: _ABORT,
+}
+
+# Record kinds, written by the worker process, read by the parent.
+_PROGRESS = 1
+_MESSAGE = 2
+_PAUSED = 3
+_COMPLETED = 4
+_EXCEPTION = 5
+
+# Shared memory layout: control word, write index, read index, ring buffer data.
+# The indices count bytes since the start, the position in the ring is index % capacity.
+_CONTROL = struct.Struct('<i')
+_INDEX = struct.Struct('<Q')
+_CONTROL_OFFSET = 0
+_WRITE_OFFSET = 8
+_READ_OFFSET = 16
+_DATA_OFFSET = 64
+_RECORD_HEADER = struct.Struct('<IB')  # payload size, kind
+_PROGRESS_PAYLOAD = struct.Struct('<d')
+
+# Maximum time to wait for a doorbell before checking again, see _Channel.
+_POLL_INTERVAL = 0.05
+
+# The worker process attaches without the resource tracker, see _attach.
+_ATTACH_UNTRACKED = sys.version_info >= (3, 13)
+_UNREGISTER_ON_ATTACH = not _ATTACH_UNTRACKED and os.name == 'posix'
+
+
+class _Channel:
+    """ Single producer (worker process), single consumer (parent) ring buffer
+    of records in shared memory, plus the control word.
+
+    The doorbell semaphores only save polling: the producer rings the parent's
+    when it writes to an empty ring, the parent rings the worker's when it
+    changes the control word. A doorbell missed due to memory reordering costs
+    at most _POLL_INTERVAL of latency, every wait is bounded by it.
+    """
+
+    def __init__(self, shm: SharedMemory, capacity: int, parent_doorbell, worker_doorbell):
+        self.shm = shm
+        self.capacity = capacity
+        self.parent_doorbell = parent_doorbell
+        self.worker_doorbell = worker_doorbell
+        self._buffer = shm.buf
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def get_control(self) -> int:
+        return _CONTROL.unpack_from(self._buffer, _CONTROL_OFFSET)[0]
+
+    def set_control(self, value: int) -> None:
+        _CONTROL.pack_into(self._buffer, _CONTROL_OFFSET, value)
+        self.worker_doorbell.release()
+
+    def put(self, kind: int, payload: bytes) -> None:
+        """ Write a record, waits while the ring is full. Worker process only. """
+        record = _RECORD_HEADER.pack(len(payload), kind) + payload
+        size = len(record)
+        if size > self.capacity:
+            raise ValueError('record of {0} bytes does not fit the ring buffer'.format(size))
+        write = _INDEX.unpack_from(self._buffer, _WRITE_OFFSET)[0]
+        while self.capacity - (write - _INDEX.unpack_from(self._buffer, _READ_OFFSET)[0]) < size:
+            time.sleep(0.001)
+
+        position = write % self.capacity
+        first = min(size, self.capacity - position)
+        start = _DATA_OFFSET + position
+        self._buffer[start:start + first] = record[:first]
+        if first < size:
+            self._buffer[_DATA_OFFSET:_DATA_OFFSET + size - first] = record[first:]
+        _INDEX.pack_into(self._buffer, _WRITE_OFFSET, write + size)
+
+        if _INDEX.unpack_from(self._buffer, _READ_OFFSET)[0] == write:
+            self.parent_doorbell.release()
+
+    def get_all(self) -> List[Tuple[int, bytes]]:
+        """ Read all records written so far. Parent only. """
+        read = _INDEX.unpack_from(self._buffer, _READ_OFFSET)[0]
+        write = _INDEX.unpack_from(self._buffer, _WRITE_OFFSET)[0]
+        records = []
+        while read < write:
+            payload_size, kind = _RECORD_HEADER.unpack(self._read(read, _RECORD_HEADER.size))
+            records.append((kind, self._read(read + _RECORD_HEADER.size, payload_size)))
+            read += _RECORD_HEADER.size + payload_size
+        _INDEX.pack_into(self._buffer, _READ_OFFSET, read)
+        return records
+
+    def _read(self, index: int, size: int) -> bytes:
+        position = index % self.capacity
+        first = min(size, self.capacity - position)
+        start = _DATA_OFFSET + position
+        data = bytes(self._buffer[start:start + first])
+        if first < size:
+            data += bytes(self._buffer[_DATA_OFFSET:_DATA_OFFSET + size - first])
+        return data
+
+
+class _WorkerEventBus:
+    """ Stands in for the event bus of the task in the worker process: sends
+    the progress and message events to the parent. Progress coalescing of the
+    task applies before, in the worker process.
+    """
+    __slots__ = ('_channel',)
+
+    def __init__(self, channel: _Channel):
+        self._channel = channel
+
+    def emit(self, kind: TaskEventKind, value) -> None:
+        if kind == TaskEventKind.Progress:
+            self._channel.put(_PROGRESS, _PROGRESS_PAYLOAD.pack(value))
+        elif kind == TaskEventKind.Message:
+            self._channel.put(_MESSAGE, value.encode('utf-8'))
+
+
+class ProcessPyTask(PyTaskBase):
+    """ PyTaskBase whose on_execute runs in a worker process, e.g. for CPU
+    bound tasks that would otherwise serialize on the GIL.
+
+    * The parent side behaves like PyTaskBase: execute blocks until the worker
+      process is done, callbacks are called on the thread calling execute (or
+      via the dispatcher), the states and exceptions are the same.
+    * In on_execute only report_progress, report_message,
+      handle_interruption_request and interruptable_delay may be used. Progress
+      and messages are sent to the parent via a ring buffer in shared memory,
+      pause and abort requests via a control word in shared memory.
+    * The task is pickled to the worker process (with the 'spawn' start
+      method), so its own attributes must be picklable and the class importable.
+      Changes on_execute makes to them are not seen by the parent.
+    * An exception raised by on_execute is re-raised by execute, pickled, i.e.
+      without traceback.
+    """
+
+    # Attributes of the parent side only, not pickled to the worker process.
+    _PARENT_ONLY = frozenset(['_task_state_machine', '_event_bus', '_mp_context', '_channel'])
+
+    def __init__(self, task_name: str, ring_buffer_size: int = 65536,
+                 mp_context: Optional[multiprocessing.context.BaseContext] = None,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """ Initializer.
+
+        :param task_name: Name of the task (e.g. for display purposes).
+        :param ring_buffer_size: size in bytes of the ring buffer for the events
+            of the worker process, it blocks while the buffer is full
+        :param mp_context: multiprocessing context to start the worker process
+            with, default 'spawn'
+        :param dispatcher: see PyTaskBase
+        """
+        super().__init__(task_name, dispatcher)
+        self._ring_buffer_size = ring_buffer_size
+        self._mp_context = mp_context or multiprocessing.get_context('spawn')
+        self._channel: Optional[_Channel] = None
+        self._in_worker = False
+
+    def __getstate__(self):
+        return {name: value for name, value in self.__dict__.items()
+                if name not in self._PARENT_ONLY}
+
+    def handle_interruption_request(self) -> None:
+        if not self._in_worker:
+            super().handle_interruption_request()
+            return
+
+        if self._pending_progress is not None:
+            self.flush_progress()
+        channel = self._channel
+        control = channel.get_control()
+        if control == _PAUSE:
+            channel.put(_PAUSED, b'')
+            while control == _PAUSE:
+                channel.worker_doorbell.acquire(timeout=_POLL_INTERVAL)
+                control = channel.get_control()
+        if control == _ABORT:
+            raise PyTaskAbortedException('Task has been aborted')
+
+    def interruptable_delay(self, delay_ms: float) -> None:
+        if not self._in_worker:
+            super().interruptable_delay(delay_ms)
+            return
+
+        deadline = time.monotonic() + delay_ms / 1000
+        self.handle_interruption_request()
+        remaining = deadline - time.monotonic()
+        while remaining > 0:
+            self._channel.worker_doorbell.acquire(timeout=min(remaining, _POLL_INTERVAL))
+            self.handle_interruption_request()
+            remaining = deadline - time.monotonic()
+
+    def pause(self) -> None:
+        super().pause()
+        self._update_control()
+
+    def resume(self) -> None:
+        super().resume()
+        self._update_control()
+
+    def abort(self) -> None:
+        super().abort()
+        self._update_control()
+
+    def execute(self, deadline: Optional[float] = None) -> None:
+        """ Start the execution of the task, on_execute runs in a worker process.
+
+        :param deadline: time.monotonic() value at which the task is aborted,
+            see IPyTask.execute
+        """
+        self._task_state_machine.handle_execute_request()
+        watch = self._watch_deadline(deadline)
+
+        try:
+            self.report_progress(0.0)
+            self._execute_in_worker()
+            self.report_progress(100.0)
+
+            self._task_state_machine.handle_task_completed()
+
+        except PyTaskAbortedException as e:
+            self.flush_progress()
+            self._task_state_machine.handle_task_aborted()
+            self._raise_if_deadline_expired(watch, e)
+            raise
+
+        except Exception:
+            self.flush_progress()
+            self._task_state_machine.handle_task_failed()
+            raise
+
+        finally:
+            if watch is not None:
+                watch.cancel()
+
+    def _update_control(self) -> None:
+        """ Write the control word of the current state, if the worker process
+        runs. Done with the state machine lock held, after each request: the
+        last write is that of the latest state, e.g. a resume racing an abort
+        cannot overwrite the abort.
+        """
+        with self._task_state_machine._lock:
+            channel = self._channel
+            if channel is not None:
+                channel.set_control(_STATE_CONTROLS.get(self.get_state(), _RUN))
+
+    def _execute_in_worker(self) -> None:
+        shm = SharedMemory(create=True, size=_DATA_OFFSET + self._ring_buffer_size)
+        channel = _Channel(shm, self._ring_buffer_size,
+                           self._mp_context.Semaphore(0), self._mp_context.Semaphore(0))
+        process = None
+        try:
+            process = self._mp_context.Process(
+                target=_run_worker, name='ProcessPyTask-{0}'.format(self.task_name), daemon=True,
+                args=(self, shm.name, channel.capacity, channel.parent_doorbell,
+                      channel.worker_doorbell))
+            self._channel = channel
+            # A request made before the channel was published must not be lost.
+            self._update_control()
+            process.start()
+            self._pump(channel, process)
+        finally:
+            self._channel = None
+            if process is not None and process.is_alive():
+                process.terminate()
+            if process is not None and process.pid is not None:
+                process.join()
+            channel.close()
+            if _UNREGISTER_ON_ATTACH:
+                # The worker process shares the resource tracker and unregistered
+                # the shared memory, unlink unregisters it again.
+                resource_tracker.register(shm._name, 'shared_memory')
+            shm.unlink()
+
+    def _pump(self, channel: _Channel, process) -> None:
+        """ Handle the records of the worker process until it is done. """
+        while True:
+            # Checked before reading: all records of an exited process are read.
+            alive = process.is_alive()
+            for kind, payload in channel.get_all():
+                if kind == _PROGRESS:
+                    # Coalesced by the worker process already.
+                    percentage = _PROGRESS_PAYLOAD.unpack(payload)[0]
+                    self._last_reported_progress = percentage
+                    self._event_bus.emit(TaskEventKind.Progress, percentage)
+                elif kind == _MESSAGE:
+                    super().report_message(payload.decode('utf-8'))
+                elif kind == _PAUSED:
+                    try:
+                        # Paused here as well until resumed or aborted.
+                        super().handle_interruption_request()
+                    except PyTaskAbortedException:
+                        pass  # raised by the worker process, which sees the control word
+                elif kind == _COMPLETED:
+                    return
+                elif kind == _EXCEPTION:
+                    raise pickle.loads(payload)
+
+            if not alive:
+                raise PyTaskFailedException('worker process of {0} exited with code {1}'.format(
+                    self.task_name, process.exitcode))
+            channel.parent_doorbell.acquire(timeout=_POLL_INTERVAL)
+
+
+def _attach(name: str) -> SharedMemory:
+    """ Attach to the shared memory of the parent without registering it with
+    the resource tracker (POSIX): the parent unlinks it, the worker process
+    must not report it leaked, or remove it, when it exits.
+    """
+    if _ATTACH_UNTRACKED:
+        return SharedMemory(name=name, track=False)
+    shm = SharedMemory(name=name)
+    if _UNREGISTER_ON_ATTACH:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _run_worker(task: ProcessPyTask, shm_name: str, capacity: int,
+                parent_doorbell, worker_doorbell) -> None:
+    """ Entry point of the worker process. """
+    shm = _attach(shm_name)
+    channel = _Channel(shm, capacity, parent_doorbell, worker_doorbell)
+    task._channel = channel
+    task._event_bus = _WorkerEventBus(channel)
+    task._in_worker = True
+    try:
+        try:
+            task.on_execute()
+        except BaseException as e:
+            task.flush_progress()
+            try:
+                payload = pickle.dumps(e)
+            except Exception:
+                payload = pickle.dumps(PyTaskFailedException(repr(e)))
+            if _RECORD_HEADER.size + len(payload) > capacity:
+                payload = pickle.dumps(PyTaskFailedException(repr(e)[:capacity // 2]))
+            channel.put(_EXCEPTION, payload)
+        else:
+            channel.put(_COMPLETED, b'')
+    finally:
+        task._channel = None
+        channel.close()
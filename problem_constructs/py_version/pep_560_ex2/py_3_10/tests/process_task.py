@@ -0,0 +1,63 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import os
+
+from ..pytask_process import ProcessPyTask
+
+
+class CpuProcessTask(ProcessPyTask):
+    """ Task that does CPU bound steps in a worker process, reporting a
+    message and progress per step.
+    """
+
+    def __init__(self, steps, step_size=1000, ring_buffer_size=65536, fail_at=None):
+        super(CpuProcessTask, self).__init__('CPU Process Task', ring_buffer_size)
+        self.steps = steps
+        self.step_size = step_size
+        self.fail_at = fail_at
+
+    def on_execute(self):
+        for step in range(self.steps):
+            if step == self.fail_at:
+                raise ValueError('CpuProcessTask: failed at step {0}'.format(step))
+            sum(i * i for i in range(self.step_size))
+            self.report_message('step {0} pid {1}'.format(step, os.getpid()))
+            self.report_progress(100.0 * (step + 1) / self.steps)
+            self.handle_interruption_request()
+
+
+class ProgressProcessTask(ProcessPyTask):
+    """ Task that reports progress in a tight loop, in a worker process.
+    """
+
+    def __init__(self, steps):
+        super(ProgressProcessTask, self).__init__('Progress Process Task')
+        self.steps = steps
+
+    def on_execute(self):
+        for step in range(self.steps):
+            self.report_progress(100.0 * (step + 1) / self.steps)
+
+
+class DelayProcessTask(ProcessPyTask):
+    """ Task that contains an interruptible delay, in a worker process.
+    """
+
+    def __init__(self, delay_ms):
+        super(DelayProcessTask, self).__init__('Delay Process Task')
+        self.delay = delay_ms
+
+    def on_execute(self):
+        self.interruptable_delay(self.delay)
+
+
+class ExitingProcessTask(ProcessPyTask):
+    """ Task whose worker process exits without reporting a result.
+    """
+
+    def __init__(self):
+        super(ExitingProcessTask, self).__init__('Exiting Process Task')
+
+    def on_execute(self):
+        os._exit(3)
@@ -0,0 +1,28 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+import time
+
+from ..pytask_base import PyTaskBase
+
+
+class RecordingTask(PyTaskBase):
+    """ Records its name when executed, tracks the number running at once. """
+    lock = threading.Lock()
+
+    def __init__(self, name, log, running=None, duration=0.0):
+        super().__init__(name)
+        self.log = log
+        self.running = running
+        self.duration = duration
+
+    def on_execute(self):
+        self.log.append(self.get_name())
+        if self.running is not None:
+            with self.lock:
+                self.running[0] += 1
+                self.running[1] = max(self.running)
+            time.sleep(self.duration)
+            with self.lock:
+                self.running[0] -= 1
@@ -0,0 +1,104 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..pytask_exceptions import PyTaskAbortedException
+from ..pytask_state import PyTaskState
+from .async_task import AsyncBusyThenDelayTask, AsyncInterruptableTask, AsyncSimpleTask
+
+
+def test_async_simple_task():
+    task = AsyncSimpleTask()
+    states = []
+    progress = []
+    task.subscribe_state_change(states.append)
+    task.subscribe_progress(progress.append)
+    assert task.get_state() == PyTaskState.Idle
+
+    asyncio.run(task.execute())
+    assert states == [PyTaskState.Running, PyTaskState.Completed]
+    assert progress == [0.0, 50.0, 100.0]
+
+
+def test_many_async_tasks_on_one_loop():
+    tasks = [AsyncSimpleTask(delay_s=0.05) for _ in range(1000)]
+
+    async def run_all():
+        await asyncio.gather(*(task.execute() for task in tasks))
+        return await asyncio.gather(*(task.wait_inactive() for task in tasks))
+
+    start = time.monotonic()
+    assert asyncio.run(run_all()) == [PyTaskState.Completed] * 1000
+    assert time.monotonic() - start < 10.0  # concurrent, not 1000 * 0.1 s
+    assert threading.active_count() < 100
+
+
+def test_async_task_pause_resume():
+    task = AsyncInterruptableTask(delay_ms=100)
+
+    async def client():
+        execution = asyncio.ensure_future(task.execute())
+        await task.wait_has_started()
+        task.pause()
+        await asyncio.sleep(0.3)
+        assert task.get_state() == PyTaskState.Paused
+        assert task.steps_done == 0
+        task.resume()
+        await execution
+        return await task.wait_inactive()
+
+    assert asyncio.run(client()) == PyTaskState.Completed
+    assert task.steps_done == 2
+
+
+def test_async_task_abort_from_other_thread():
+    task = AsyncInterruptableTask(delay_ms=5000)
+
+    async def client():
+        execution = asyncio.ensure_future(task.execute())
+        await task.wait_has_started()
+        threading.Timer(0.1, task.abort).start()
+        with pytest.raises(PyTaskAbortedException):
+            await execution
+        return await task.wait_inactive()
+
+    start = time.monotonic()
+    assert asyncio.run(client()) == PyTaskState.Aborted
+    assert time.monotonic() - start < 2.0
+    assert task.steps_done == 0
+
+
+def test_async_task_cancelled():
+    task = AsyncInterruptableTask(delay_ms=5000)
+
+    async def client():
+        execution = asyncio.ensure_future(task.execute())
+        await task.wait_has_started()
+        execution.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await execution
+
+    asyncio.run(client())
+    assert task.get_state() == PyTaskState.Aborted
+
+
+def test_async_delay_handles_pending_request():
+    task = AsyncBusyThenDelayTask(busy_s=0.2, delay_ms=5000)
+
+    async def client():
+        execution = asyncio.ensure_future(task.execute())
+        await task.wait_has_started()
+        # Requested while the task awaits asyncio.sleep, before the delay starts.
+        task.abort()
+        with pytest.raises(PyTaskAbortedException):
+            await execution
+        return await task.wait_inactive()
+
+    start = time.monotonic()
+    assert asyncio.run(client()) == PyTaskState.Aborted
+    assert time.monotonic() - start < 2.0
@@ -2,14 +2,17 @@
 # All rights reserved. This file includes confidential and proprietary
 # information of FEI Company.
 
+import asyncio
 import pytest
 import threading
+import time
 
 from unittest.mock import Mock
 
 from ..pytask_state import PyTaskState
 from ..pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
-from .interactive_task import InteractiveTask
+from ..pytask_request_channel import UserRequestChannel
+from .interactive_task import InteractiveTask, MultiRequestTask
 from .simple_task_with_callback import SimpleTaskWithCallbacksSink
 from .exception_raising_thread import ExceptionRaisingThread
 
@@ -267,3 +270,105 @@ def test_valid_users_responses(interactive_task, event, user_response):
     assert [] == interactive_task.get_valid_user_actions()
 
     thread.join()
+
+
+def test_user_response_provided_before_wait():
+    interactive_task = InteractiveTask()
+    # Responds from within the callback, i.e. before the task waits for it.
+    interactive_task.subscribe_user_response_requested(
+        lambda _: interactive_task.provide_user_response('Accept'))
+    interactive_task.execute()
+    assert interactive_task.get_user_response_received() == 'Accept'
+    assert interactive_task.get_state() == PyTaskState.Completed
+
+
+def test_user_response_timeout():
+    interactive_task = InteractiveTask(timeout=0.1)
+    requests = []
+    interactive_task.subscribe_user_response_requested(
+        lambda _: requests.extend(interactive_task.get_pending_user_requests()))
+    with pytest.raises(PyTaskFailedException, match='within 0.1 s'):
+        interactive_task.execute()
+    assert interactive_task.get_state() == PyTaskState.Failed
+    assert not interactive_task.get_pending_user_requests()
+    assert requests[0].future.cancelled()
+
+    interactive_task.provide_user_response('Too late')  # ignored
+    assert interactive_task.get_user_response_received() is None
+
+
+def test_user_requests_matched_by_id():
+    task = MultiRequestTask(['first', 'second', 'third'])
+    task.subscribe_user_response_requested(lambda _: None)
+    thread = ExceptionRaisingThread(target=task.execute)
+    thread.start()
+    while len(task.get_pending_user_requests()) < 3:
+        assert thread.is_alive()
+        time.sleep(0.01)
+
+    requests = task.get_pending_user_requests()
+    assert [request.instruction for request in requests] == ['first', 'second', 'third']
+    assert len({request.request_id for request in requests}) == 3
+    for request in reversed(requests[1:]):
+        task.provide_user_response(request.instruction.upper(), request.request_id)
+    task.provide_user_response('FIRST')  # the oldest outstanding request
+    thread.join()
+    assert task.responses == ['FIRST', 'SECOND', 'THIRD']
+
+
+def test_user_request_awaited_by_async_client():
+    task = MultiRequestTask([])
+    task.subscribe_user_response_requested(lambda _: None)
+
+    async def client():
+        request = task.submit_user_request('instruction')
+        asyncio.get_running_loop().call_soon(task.provide_user_response, 'Accept')
+        response = await asyncio.wrap_future(request.future)
+
+        with pytest.raises(PyTaskFailedException, match='within 0.05 s'):
+            await task.request_user_response_async('instruction', timeout=0.05)
+        return response
+
+    assert asyncio.run(client()) == 'Accept'
+    assert not task.get_pending_user_requests()
+
+
+def test_cancelled_user_requests_skipped():
+    task = MultiRequestTask([])
+    task.subscribe_user_response_requested(lambda _: None)
+    cancelled = task.submit_user_request('cancelled')
+    request = task.submit_user_request('instruction')
+    assert cancelled.future.cancel()
+    task.provide_user_response('Accept')
+    assert request.future.result(0) == 'Accept'
+
+    channel = UserRequestChannel()
+    cancelled = channel.open('cancelled')
+    request = channel.open('instruction')
+    assert cancelled.future.cancel()
+    assert channel.respond('Too late', cancelled.request_id) is None
+    assert channel.cancel_all(PyTaskAbortedException('Task has been aborted')) == 1
+    assert isinstance(request.future.exception(0), PyTaskAbortedException)
+    assert not channel.discard(request)
+
+
+def test_abort_cancels_user_requests():
+    task = MultiRequestTask(['first', 'second'])
+    task.subscribe_user_response_requested(lambda _: None)
+
+    def task_execute():
+        with pytest.raises(PyTaskAbortedException):
+            task.execute()
+
+    thread = ExceptionRaisingThread(target=task_execute)
+    thread.start()
+    while len(task.get_pending_user_requests()) < 2:
+        assert thread.is_alive()
+        time.sleep(0.01)
+    requests = task.get_pending_user_requests()
+    task.abort()
+    thread.join()
+    assert task.get_state() == PyTaskState.Aborted
+    assert all(isinstance(request.future.exception(), PyTaskAbortedException)
+               for request in requests)
+    assert not task.get_pending_user_requests()
@@ -0,0 +1,135 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ..pytask_base import PyTaskBase
+from ..pytask_dispatcher import EventDispatcher, OverflowPolicy
+from ..pytask_event import EventBroadcaster
+from ..pytask_state import PyTaskState
+
+
+class DispatchedTask(PyTaskBase):
+    def __init__(self, dispatcher):
+        super().__init__('Dispatched Task', dispatcher)
+
+    def on_execute(self):
+        self.report_message('DispatchedTask: executing')
+        self.report_progress(50.0)
+
+
+class BlockingSink(object):
+    """ Records the events received, the first one blocks until released. """
+    def __init__(self):
+        self.received = []
+        self.threads = set()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def handler(self, value):
+        self.started.set()
+        self.release.wait(5)
+        self.threads.add(threading.current_thread())
+        self.received.append(value)
+
+
+def test_dispatch_order_and_thread():
+    dispatcher = EventDispatcher()
+    radio = EventBroadcaster(dispatcher)
+    sink = BlockingSink()
+    sink.release.set()
+    radio.add_handler(sink.handler)
+
+    for value in range(100):
+        radio.emit(value)
+    assert dispatcher.flush(5)
+    assert sink.received == list(range(100))
+    assert threading.current_thread() not in sink.threads
+    dispatcher.close(5)
+
+    with pytest.raises(RuntimeError):
+        radio.emit(100)
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (OverflowPolicy.DropNewest, [0, 1, 2]),
+    (OverflowPolicy.DropOldest, [0, 3, 4]),
+])
+def test_overflow_policy(policy, expected):
+    dispatcher = EventDispatcher(max_queue_size=2, overflow_policy=policy)
+    radio = EventBroadcaster(dispatcher)
+    sink = BlockingSink()
+    radio.add_handler(sink.handler)
+
+    radio.emit(0)
+    assert sink.started.wait(5)  # 0 is being delivered, queue is empty
+    for value in range(1, 5):
+        radio.emit(value)
+    sink.release.set()
+    assert dispatcher.flush(5)
+    assert sink.received == expected
+    assert dispatcher.dropped == 2
+    dispatcher.close(5)
+
+
+def test_overflow_policy_block():
+    dispatcher = EventDispatcher(max_queue_size=1)
+    radio = EventBroadcaster(dispatcher)
+    sink = BlockingSink()
+    radio.add_handler(sink.handler)
+
+    radio.emit(0)
+    assert sink.started.wait(5)
+    radio.emit(1)
+    emitter = threading.Thread(target=radio.emit, args=(2,))
+    emitter.start()
+    emitter.join(0.2)
+    assert emitter.is_alive()  # blocked: queue is full
+
+    sink.release.set()
+    emitter.join(5)
+    assert dispatcher.flush(5)
+    assert sink.received == [0, 1, 2]
+    assert dispatcher.dropped == 0
+    dispatcher.close(5)
+
+
+def test_dispatch_via_executor_and_failing_handler():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        dispatcher = EventDispatcher(executor=executor)
+        radio = EventBroadcaster(dispatcher)
+        received = []
+
+        def failing_handler(value):
+            raise ValueError(value)
+
+        radio.add_handler(failing_handler)
+        radio.add_handler(received.append)
+        for value in range(100):
+            radio.emit(value)
+        assert dispatcher.flush(5)
+        assert received == list(range(100))
+
+
+def test_task_with_dispatcher():
+    dispatcher = EventDispatcher()
+    task = DispatchedTask(dispatcher)
+    received = []
+    threads = set()
+
+    def callback(value):
+        received.append(value)
+        threads.add(threading.current_thread())
+
+    task.subscribe_state_change(callback)
+    task.subscribe_progress(callback)
+    task.subscribe_message(callback)
+    task.execute()
+    assert dispatcher.flush(5)
+    assert received == [PyTaskState.Running, 0.0, 'DispatchedTask: executing', 50.0, 100.0,
+                        PyTaskState.Completed]
+    assert threading.current_thread() not in threads
+    dispatcher.close(5)
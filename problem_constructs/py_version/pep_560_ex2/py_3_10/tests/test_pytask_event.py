@@ -1,7 +1,10 @@
 # Copyright (c) 2012-2019 by FEI Company
 # All rights reserved. This file includes confidential and proprietary
 # information of FEI Company.
+import gc
+
 from ..pytask_event import EventBroadcaster, Subscription
+from ..pytask_tracing import HistogramRegistry
 
 
 class EventTester(object):
@@ -68,3 +71,87 @@ def test_subscription_context_manager():
 
     assert len(radio._subscriptions) == 0
     assert not radio.is_subscribed()
+
+
+def test_emit_order_and_unsubscribe_while_emitting():
+    radio = EventBroadcaster()
+    calls = []
+
+    def handler_1(param):
+        calls.append(1)
+        sub_2.unsubscribe()
+
+    def handler_2(param):
+        calls.append(2)
+
+    def handler_3(param):
+        calls.append(3)
+        radio.add_handler(handler_2)
+
+    radio.add_handler(handler_1)
+    sub_2 = radio.add_handler(handler_2)
+    radio.add_handler(handler_3)
+
+    # Emit works on the snapshot taken when it started.
+    radio.emit(3)
+    assert calls == [1, 2, 3]
+
+    calls.clear()
+    radio.emit(3)
+    assert calls == [1, 3, 2]
+    assert len(radio._subscriptions) == 4
+
+
+def test_unsubscribe_after_broadcaster_deleted():
+    radio = EventBroadcaster()
+    sub = radio.add_handler(test_unsubscribe_after_broadcaster_deleted)
+    del radio
+    sub.unsubscribe()
+
+
+def test_weak_subscription():
+    radio = EventBroadcaster()
+    tester = EventTester()
+    calls = []
+
+    def handler(param):
+        calls.append(param)
+
+    radio.add_handler(tester.method_1, weak=True)
+    sub = radio.add_handler(handler, weak=True)
+    radio.emit(3)
+    assert tester.call_count == 1
+    assert calls == [3]
+    assert sub.handler is handler
+
+    # The subscription does not keep the object of a bound method alive.
+    del tester
+    gc.collect()
+    assert len(radio._subscriptions) == 2
+    radio.emit(3)
+    assert calls == [3, 3]
+    assert len(radio._subscriptions) == 1  # pruned by emit
+
+    del handler
+    gc.collect()
+    assert sub.handler is None
+    assert not radio.is_subscribed()
+    radio.emit(3)
+    assert not radio._subscriptions
+    sub.unsubscribe()
+
+
+def test_weak_subscription_timed():
+    radio = EventBroadcaster()
+    registry = HistogramRegistry()
+    tester = EventTester()
+    radio.add_handler(tester.method_2, weak=True)
+    radio.enable_timing(registry, 'radio')
+    radio.emit(3)
+    assert tester.call_count == 2
+    assert registry.get('radio.EventTester.method_2').count == 1
+
+    del tester
+    gc.collect()
+    radio.emit(3)
+    assert not radio._subscriptions
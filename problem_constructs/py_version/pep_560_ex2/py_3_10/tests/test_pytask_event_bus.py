@@ -0,0 +1,144 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import threading
+
+import pytest
+
+from ..pytask_dispatcher import EventDispatcher
+from ..pytask_event_bus import EventBus, TaskEvent, TaskEventKind
+from ..pytask_exceptions import PyTaskAbortedException
+from ..pytask_state import PyTaskState
+from .exception_raising_thread import ExceptionRaisingThread
+from .interruptable_task import TaskWithInterruptableDelay
+from .progress_task import ProgressTask
+
+
+def test_filtered_subscriptions():
+    bus = EventBus()
+    events = []
+    inactive = []
+    progress = []
+    bus.add_handler(events.append)
+    bus.add_handler(inactive.append, kinds=[TaskEventKind.StateChange],
+                    states=[PyTaskState.Completed, PyTaskState.Failed])
+    with bus.add_value_handler(TaskEventKind.Progress, progress.append):
+        bus.emit(TaskEventKind.StateChange, PyTaskState.Running)
+        bus.emit(TaskEventKind.Progress, 50.0)
+        bus.emit(TaskEventKind.Message, 'message')
+        bus.emit(TaskEventKind.StateChange, PyTaskState.Completed)
+    bus.emit(TaskEventKind.Progress, 100.0)
+
+    assert events == [TaskEvent(TaskEventKind.StateChange, PyTaskState.Running),
+                      TaskEvent(TaskEventKind.Progress, 50.0),
+                      TaskEvent(TaskEventKind.Message, 'message'),
+                      TaskEvent(TaskEventKind.StateChange, PyTaskState.Completed),
+                      TaskEvent(TaskEventKind.Progress, 100.0)]
+    assert inactive == [TaskEvent(TaskEventKind.StateChange, PyTaskState.Completed)]
+    assert progress == [50.0]
+    assert bus.is_subscribed(TaskEventKind.Progress)
+
+
+def test_is_subscribed():
+    bus = EventBus()
+    assert not bus.is_subscribed()
+    with bus.add_value_handler(TaskEventKind.Progress, lambda percentage: None):
+        assert bus.is_subscribed()
+        assert bus.is_subscribed(TaskEventKind.Progress)
+        assert not bus.is_subscribed(TaskEventKind.UserResponseRequested)
+    assert not bus.is_subscribed()
+
+
+def test_emit_only_touches_matching_subscribers():
+    bus = EventBus()
+    for _ in range(100):
+        bus.add_value_handler(TaskEventKind.Message, lambda message: None)
+    completed = []
+    bus.add_handler(completed.append, kinds=[TaskEventKind.StateChange],
+                    states=[PyTaskState.Completed])
+    assert bus._routes[TaskEventKind.Progress] == ()
+    bus.emit(TaskEventKind.StateChange, PyTaskState.Running)
+    bus.emit(TaskEventKind.StateChange, PyTaskState.Completed)
+    assert completed == [TaskEvent(TaskEventKind.StateChange, PyTaskState.Completed)]
+
+
+def test_batches():
+    bus = EventBus()
+    batches = []
+    bus.add_batch_handler(batches.append, max_batch=3, max_latency=60.0)
+    for percentage in range(4):
+        bus.emit(TaskEventKind.Progress, float(percentage))
+    assert [len(batch) for batch in batches] == [3]
+
+    # A state change ends a batch.
+    bus.emit(TaskEventKind.StateChange, PyTaskState.Paused)
+    assert [len(batch) for batch in batches] == [3, 2]
+    assert batches[1][1] == TaskEvent(TaskEventKind.StateChange, PyTaskState.Paused)
+
+    bus.emit(TaskEventKind.Message, 'message')
+    bus.flush()
+    assert batches[2] == [TaskEvent(TaskEventKind.Message, 'message')]
+
+
+def test_batch_latency():
+    bus = EventBus()
+    delivered = threading.Event()
+    batches = []
+
+    def on_batch(batch):
+        batches.append(batch)
+        delivered.set()
+
+    bus.add_batch_handler(on_batch, kinds=[TaskEventKind.Message], max_latency=0.05)
+    bus.emit(TaskEventKind.Message, 'first')
+    bus.emit(TaskEventKind.Message, 'second')
+    assert delivered.wait(5.0)
+    assert batches == [[TaskEvent(TaskEventKind.Message, 'first'),
+                        TaskEvent(TaskEventKind.Message, 'second')]]
+
+
+def test_batches_via_dispatcher():
+    dispatcher = EventDispatcher()
+    bus = EventBus(dispatcher)
+    batches = []
+    bus.add_batch_handler(batches.append, max_batch=2)
+    for percentage in range(4):
+        bus.emit(TaskEventKind.Progress, float(percentage))
+    assert dispatcher.flush(5.0)
+    assert [[event.value for event in batch] for batch in batches] == [[0.0, 1.0], [2.0, 3.0]]
+    dispatcher.close()
+
+
+def test_invalid_max_batch():
+    with pytest.raises(ValueError):
+        EventBus().add_batch_handler(lambda batch: None, max_batch=0)
+
+
+def test_task_events():
+    task = ProgressTask(10)
+    events = []
+    batches = []
+    with task.subscribe_events(events.append), \
+            task.subscribe_event_batches(batches.append, kinds=[TaskEventKind.StateChange]):
+        task.execute()
+    assert events[0] == TaskEvent(TaskEventKind.StateChange, PyTaskState.Running)
+    assert events[-1] == TaskEvent(TaskEventKind.StateChange, PyTaskState.Completed)
+    assert [event.value for event in events if event.kind == TaskEventKind.Progress][-1] == 100.0
+    assert batches == [[TaskEvent(TaskEventKind.StateChange, PyTaskState.Running)],
+                       [TaskEvent(TaskEventKind.StateChange, PyTaskState.Completed)]]
+    assert not task._event_bus._entries
+
+
+def test_task_state_filter():
+    task = TaskWithInterruptableDelay(5000)
+    aborted = threading.Event()
+    task.subscribe_events(lambda event: aborted.set(), kinds=[TaskEventKind.StateChange],
+                          states=[PyTaskState.Aborted])
+    thread = ExceptionRaisingThread(target=task.execute)
+    thread.start()
+    task.wait_has_started(5.0)
+    assert not aborted.is_set()
+    task.abort()
+    assert aborted.wait(5.0)
+    with pytest.raises(PyTaskAbortedException):
+        thread.join()
@@ -0,0 +1,139 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import time
+
+import pytest
+
+from ..pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from ..pytask_executor import TaskExecutor
+from ..pytask_state import PyTaskState
+from .failing_task import TaskFailsWithPyTaskFailedException
+from .interruptable_task import TaskWithInterruptableDelay
+from .recording_task import RecordingTask
+
+
+def test_priorities():
+    executor = TaskExecutor(max_workers=1)
+    log = []
+    executor.pause()
+    futures = [executor.submit(RecordingTask(name, log), priority=priority)
+               for name, priority in [('low', 0), ('high', 2), ('mid', 1), ('high2', 2)]]
+    assert executor.get_aggregated_state().queued == 4
+    executor.resume()
+    assert executor.join(5)
+    assert log == ['high', 'high2', 'mid', 'low']
+    assert all(future.result() is None for future in futures)
+
+    state = executor.get_aggregated_state()
+    assert state.queued == state.running == 0
+    assert state.states == {PyTaskState.Running: 0, PyTaskState.Completed: 4}
+    assert state.progress == 100.0
+    executor.shutdown()
+
+
+def test_group_limit():
+    executor = TaskExecutor(max_workers=4, group_limits={'camera': 1})
+    log = []
+    camera = [0, 0]
+    other = [0, 0]
+    for i in range(4):
+        executor.submit(RecordingTask('camera', log, camera, 0.05), group='camera')
+        executor.submit(RecordingTask('other', log, other, 0.05))
+    assert executor.join(5)
+    assert camera[1] == 1
+    assert other[1] > 1
+    executor.shutdown()
+
+
+def test_failing_task():
+    executor = TaskExecutor()
+    future = executor.submit(TaskFailsWithPyTaskFailedException('Failing Task'))
+    with pytest.raises(PyTaskFailedException):
+        future.result(5)
+    assert executor.get_aggregated_state().states[PyTaskState.Failed] == 1
+    executor.shutdown()
+
+
+def test_bulk_pause_resume_abort():
+    executor = TaskExecutor(max_workers=2)
+    running = [executor.submit(TaskWithInterruptableDelay(300), group='a') for _ in range(2)]
+    queued = executor.submit(TaskWithInterruptableDelay(300), group='b')
+    for future in running:
+        while not future.running():
+            time.sleep(0.01)
+
+    executor.pause()
+    deadline = time.monotonic() + 5
+    while executor.get_aggregated_state().states.get(PyTaskState.Paused) != 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert executor.get_aggregated_state().queued == 1
+    executor.resume()
+    assert executor.join(5)
+    assert all(future.result() is None for future in running + [queued])
+
+    running = [executor.submit(TaskWithInterruptableDelay(5000)) for _ in range(2)]
+    queued = executor.submit(TaskWithInterruptableDelay(5000))
+    for future in running:
+        while not future.running():
+            time.sleep(0.01)
+    executor.abort()
+    assert executor.join(5)
+    for future in running:
+        with pytest.raises(PyTaskAbortedException):
+            future.result()
+    assert queued.cancelled()
+    state = executor.get_aggregated_state()
+    assert state.states[PyTaskState.Aborted] == 2
+    assert state.states[PyTaskState.Completed] == 3
+    executor.shutdown()
+
+
+def test_pause_skips_finished_tasks():
+    executor = TaskExecutor(max_workers=2)
+    tasks = [TaskWithInterruptableDelay(5000), TaskWithInterruptableDelay(5000)]
+    futures = [executor.submit(task) for task in tasks]
+    for task in tasks:
+        task.wait_has_started(5.0)
+    tasks[0].abort()
+    tasks[0].wait_inactive(5.0)
+
+    # The aborted task is still with its worker, pausing it would be invalid.
+    executor.pause()
+    executor.shutdown(abort=True)
+    for future in futures:
+        with pytest.raises(PyTaskAbortedException):
+            future.result(5)
+
+
+def test_shutdown_resumes_paused_groups():
+    executor = TaskExecutor(max_workers=1)
+    executor.pause('a')
+    futures = [executor.submit(TaskWithInterruptableDelay(10), group='a') for _ in range(2)]
+    executor.shutdown()
+    assert all(future.result(0) is None for future in futures)
+
+
+def test_cancelled_queued_task_skipped():
+    executor = TaskExecutor(max_workers=1)
+    log = []
+    executor.pause()
+    cancelled = executor.submit(RecordingTask('cancelled', log))
+    later = executor.submit(RecordingTask('later', log))
+    assert cancelled.cancel()
+    executor.resume()
+    assert later.result(5) is None
+    assert executor.join(5)
+    assert log == ['later']
+    assert executor.get_aggregated_state().progress == 100.0
+    executor.shutdown()
+
+
+def test_submit_after_shutdown():
+    executor = TaskExecutor()
+    executor.shutdown()
+    task = RecordingTask('task', [])
+    with pytest.raises(RuntimeError):
+        executor.submit(task)
+    assert not task._event_bus.is_subscribed()
@@ -0,0 +1,82 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import os
+import threading
+import time
+
+import pytest
+
+from ..pytask_exceptions import PyTaskAbortedException, PyTaskFailedException
+from ..pytask_state import PyTaskState
+from .process_task import CpuProcessTask, DelayProcessTask, ExitingProcessTask, ProgressProcessTask
+
+
+def wait_for_state(task, state):
+    deadline = time.monotonic() + 10
+    while task.get_state() != state:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_events_from_worker_process():
+    task = CpuProcessTask(10)
+    messages = []
+    progress = []
+    task.subscribe_message(messages.append)
+    task.subscribe_progress(progress.append)
+    task.execute()
+
+    assert task.get_state() == PyTaskState.Completed
+    assert [message.split()[1] for message in messages] == [str(i) for i in range(10)]
+    assert all(message.split()[3] != str(os.getpid()) for message in messages)
+    assert progress == [0.0] + [10.0 * (i + 1) for i in range(10)]
+
+
+def test_progress_coalescing_in_worker_process():
+    task = ProgressProcessTask(1000)
+    task.configure_progress_coalescing(min_delta=25.0)
+    progress = []
+    task.subscribe_progress(progress.append)
+    task.execute()
+    assert progress == [0.0, 25.0, 50.0, 75.0, 100.0]
+
+
+def test_ring_buffer_wraps():
+    # Each message record is larger than a quarter of the ring buffer.
+    task = CpuProcessTask(1000, step_size=1, ring_buffer_size=64)
+    messages = []
+    task.subscribe_message(messages.append)
+    task.execute()
+    assert [message.split()[1] for message in messages] == [str(i) for i in range(1000)]
+
+
+def test_worker_exception():
+    task = CpuProcessTask(10, fail_at=3)
+    with pytest.raises(ValueError, match='failed at step 3'):
+        task.execute()
+    assert task.get_state() == PyTaskState.Failed
+
+    task = ExitingProcessTask()
+    with pytest.raises(PyTaskFailedException, match='exited with code 3'):
+        task.execute()
+    assert task.get_state() == PyTaskState.Failed
+
+
+def test_pause_resume_abort():
+    task = DelayProcessTask(30000)
+    thread = threading.Thread(target=lambda: pytest.raises(PyTaskAbortedException, task.execute))
+    thread.start()
+    wait_for_state(task, PyTaskState.Running)
+
+    task.pause()
+    wait_for_state(task, PyTaskState.Paused)
+    task.resume()
+    wait_for_state(task, PyTaskState.Running)
+
+    start = time.monotonic()
+    task.abort()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 2
+    assert task.get_state() == PyTaskState.Aborted
@@ -0,0 +1,88 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import json
+import threading
+import time
+
+import pytest
+
+from ..pytask_exceptions import PyTaskAbortedException
+from ..pytask_state import PyTaskState
+from ..pytask_tracing import Histogram, HistogramRegistry
+from .interruptable_task import TaskWithInterruptableDelay
+from .simple_task import SimpleTask
+
+
+def wait_for_state(task, state):
+    deadline = time.monotonic() + 5
+    while task.get_state() != state:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) == 0.0
+    for value in [0.001] * 90 + [0.3] * 10:
+        histogram.record(value)
+    assert histogram.count == 100
+    assert histogram.minimum == 0.001 and histogram.maximum == 0.3
+    assert histogram.percentile(0.5) == 0.001
+    assert histogram.percentile(0.99) == 0.3
+
+    statistics = histogram.to_dict()
+    assert statistics['mean'] == pytest.approx(0.0309)
+    assert sum(statistics['buckets'].values()) == 100
+
+
+def test_registry_json_export():
+    registry = HistogramRegistry()
+    registry.get('a').record(0.5)
+    timed = registry.timed('b', lambda x: x * 2)
+    assert timed(21) == 42
+    assert registry.get('a') is registry.get('a')
+
+    exported = json.loads(registry.to_json())
+    assert sorted(exported) == ['a', 'b']
+    assert exported['a']['count'] == exported['b']['count'] == 1
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_task_tracing():
+    registry = HistogramRegistry()
+    task = SimpleTask()
+    task.subscribe_progress(lambda percentage: time.sleep(0.001))
+    tracer = task.enable_tracing(registry=registry)
+    task.execute()
+
+    assert [state for _, state in tracer.get_trace()] == [PyTaskState.Running,
+                                                          PyTaskState.Completed]
+    statistics = registry.snapshot()
+    assert statistics['SimpleTask.state.Running']['count'] == 1
+    handler_name = 'SimpleTask.emit.progress.test_task_tracing.<locals>.<lambda>'
+    assert statistics[handler_name]['min'] >= 0.001
+
+
+def test_pause_and_abort_latency():
+    registry = HistogramRegistry()
+    task = TaskWithInterruptableDelay(5000)
+    tracer = task.enable_tracing('delay', registry)
+    thread = threading.Thread(target=lambda: pytest.raises(PyTaskAbortedException, task.execute))
+    thread.start()
+    wait_for_state(task, PyTaskState.Running)
+    task.pause()
+    wait_for_state(task, PyTaskState.Paused)
+    task.resume()
+    task.abort()
+    thread.join(5)
+
+    assert [state for _, state in tracer.get_trace()] == [
+        PyTaskState.Running, PyTaskState.Pausing, PyTaskState.Paused, PyTaskState.Running,
+        PyTaskState.Aborting, PyTaskState.Aborted]
+    statistics = registry.snapshot()
+    assert statistics['delay.pause_latency']['count'] == 1
+    assert statistics['delay.abort_latency']['count'] == 1
+    assert statistics['delay.abort_latency']['max'] < 1.0
+    assert statistics['delay.state.Running']['count'] == 2
@@ -0,0 +1,93 @@
+# Copyright (c) 2026 by FEI Company
+# All rights reserved. This file includes confidential and proprietary
+# information of FEI Company.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..pytask_exceptions import PyTaskAbortedException, PyTaskTimeoutException
+from ..pytask_state import PyTaskState
+from ..pytask_watchdog import TaskWatchdog
+from .async_task import AsyncInterruptableTask
+from .exception_raising_thread import ExceptionRaisingThread
+from .interruptable_task import TaskWithInterruptableDelay
+from .simple_task import SimpleTask
+
+
+def test_watchdog_calls_back_in_deadline_order():
+    watchdog = TaskWatchdog()
+    expired = []
+    done = threading.Event()
+    now = time.monotonic()
+    watchdog.watch(now + 0.2, lambda: (expired.append(2), done.set()))
+    watchdog.watch(now + 0.1, lambda: expired.append(1))
+    cancelled = watchdog.watch(now + 0.05, lambda: expired.append(0))
+    cancelled.cancel()
+    assert watchdog.get_pending_count() == 2
+
+    assert done.wait(5.0)
+    assert expired == [1, 2]
+    assert watchdog.get_pending_count() == 0
+    assert not cancelled.expired
+
+
+def test_watchdog_compacts_cancelled_watches():
+    watchdog = TaskWatchdog()
+    watches = [watchdog.watch(time.monotonic() + 60.0, lambda: None) for _ in range(1000)]
+    for watch in watches[:900]:
+        watch.cancel()
+    assert len(watchdog._heap) < 1000
+    assert watchdog.get_pending_count() == 100
+
+
+def test_watchdog_survives_failing_callback():
+    watchdog = TaskWatchdog()
+    done = threading.Event()
+    watchdog.watch(time.monotonic(), lambda: 1 / 0)
+    watchdog.watch(time.monotonic() + 0.05, done.set)
+    assert done.wait(5.0)
+
+
+def test_execute_deadline_aborts_task():
+    task = TaskWithInterruptableDelay(5000)
+    start = time.monotonic()
+    with pytest.raises(PyTaskTimeoutException):
+        task.execute(deadline=start + 0.1)
+    assert time.monotonic() - start < 2.0
+    assert task.get_state() == PyTaskState.Aborted
+
+
+def test_execute_within_deadline():
+    task = SimpleTask()
+    task.execute(deadline=time.monotonic() + 60.0)
+    assert task.get_state() == PyTaskState.Completed
+
+
+def test_wait_timeouts():
+    task = TaskWithInterruptableDelay(5000)
+    with pytest.raises(PyTaskTimeoutException):
+        task.wait_has_started(timeout=0.05)
+
+    thread = ExceptionRaisingThread(target=task.execute)
+    thread.start()
+    task.wait_has_started(timeout=5.0)
+    with pytest.raises(PyTaskTimeoutException):
+        task.wait_inactive(timeout=0.05)
+    task.abort()
+    assert task.wait_inactive(timeout=5.0) == PyTaskState.Aborted
+    with pytest.raises(PyTaskAbortedException):
+        thread.join()
+
+
+def test_async_deadline_and_wait_timeout():
+    async def run():
+        task = AsyncInterruptableTask(5000)
+        with pytest.raises(PyTaskTimeoutException):
+            await task.wait_has_started(timeout=0.05)
+        with pytest.raises(PyTaskTimeoutException):
+            await task.execute(deadline=time.monotonic() + 0.1)
+        return await task.wait_inactive(timeout=1.0)
+
+    assert asyncio.run(run()) == PyTaskState.Aborted
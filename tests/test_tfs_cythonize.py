@@ -1,6 +1,6 @@
 from pathlib import PurePath
 
-from tfs_cythonize import find_dist_base
+from tfs_cythonize import find_dist_base, find_sources
 
 diagnostic_print = True
 
@@ -68,3 +68,12 @@ def test_find_dist_base_autostar():
             print(f"checking: {autostar_dir}")
             print(f"    base_dir:       {base_dir}")
             print(f"    package_root:   {package_root}")
+
+
+def test_find_sources(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ["__init__.py", "plain.py", "compiled.pyx", "sub/augmented.py",
+                 "sub/augmented.pxd", "sub/declarations.pxd"]:
+        (tmp_path / name).touch()
+
+    assert find_sources(tmp_path) == [tmp_path / "compiled.pyx", tmp_path / "sub" / "augmented.py"]
@@ -2,7 +2,9 @@
 command line script published by the Cython package.
 
 Summary:
-Transpiles (cythonizes) all .pyx files in the directory given as input.
+Transpiles (cythonizes) all .pyx files in the directory given as input, plus
+the .py files augmented by a .pxd file of the same name (pure Python source
+that compiles to extension types, see find_sources).
 'tfs_cythonize --help' to show options:
     * --annotate: generate annotated HTML page for C source files, DO NOT USE
                   in production since it disables mapping back to .pyx files
@@ -13,6 +15,10 @@ Transpiles (cythonizes) all .pyx files in the directory given as input.
     * --quiet: less verbose during Cython compile (no effect on C compile)
     * --single_keyword_arg: set directive always_allow_keywords true, DO NOT
                             USE in production code builds for now
+    * --hotspot_report: in parallel with the real build, transpile with
+                        annotate into a throwaway directory and report the
+                        lines & functions that use the Python C-API the most,
+                        safe to use in production builds
 
 Prerequisites:
 * Visual Studio 2017 must be installed on the system.
@@ -131,6 +137,7 @@ class TranspileDirectives:
         self.force = False
         self.quiet = False
         self.single_keyword_arg = False
+        self.hotspot_report = False
 
 
 def create_extension(target: str, package_root: str) -> Extension:
@@ -144,7 +151,7 @@ def create_extension(target: str, package_root: str) -> Extension:
       the full dotted name for the module. For example:
       'fei_common.infra.tem_service.api'.
 
-    :param target: .pyx file to be processed
+    :param target: .pyx (or augmented .py) file to be processed
     :param package_root: root name of the package
     :return: object defining how the file will be built
     """
@@ -155,7 +162,7 @@ def create_extension(target: str, package_root: str) -> Extension:
     # E.g. "C:\\work_dir\\fei_some_comp\\a\\b\\hello.pyx" -> "fei_some_comp\\a\\b\\hello.pyx"
     mod_file_name = target.replace(target.split(package_root)[0], "")
 
-    module_name = mod_file_name.replace(".pyx", "").replace("\\", ".")
+    module_name = os.path.splitext(mod_file_name)[0].replace("\\", ".")
     print(f"    target file:                {target}")
     print(f"    module full dotted name:    {module_name}")
 
@@ -168,7 +175,7 @@ def create_extension(target: str, package_root: str) -> Extension:
         #  distutils._msvccompiler.MSVCCompiler.
         # -Zi: Leave optimization as is ('Ox' apparently) but generate full debug info.
         # -Fd: specify the intermediate pdb file -> essential for parallel builds
-        extra_compile_args=["-Zi", "-Od", f"-Fd{target.replace('.pyx', '.pdb')}"],
+        extra_compile_args=["-Zi", "-Od", f"-Fd{os.path.splitext(target)[0]}.pdb"],
 
         # /IGNORE:4197: suppress warning of function declared for export more than once
         # -debug=full: use debug info to create pdb files
@@ -194,8 +201,25 @@ def find_dist_base(path: PurePath) -> Tuple[PurePath, str]:
     return path.parent, path.stem
 
 
+def find_sources(path: Path) -> List[Path]:
+    """ Return the source files to compile in the supplied directory
+    (recursively): all .pyx files, plus the .py files that have a .pxd file
+    of the same name next to them.
+
+    The .pxd file augments the .py file: e.g. it declares some of its classes
+    as cdef classes with typed attributes. The .py file itself stays plain
+    Python, importable and testable without compiling.
+
+    :param path: directory to be processed
+    :return the source files, sorted
+    """
+    sources = list(path.rglob("*.pyx"))
+    sources.extend(source for source in path.rglob("*.py") if source.with_suffix(".pxd").exists())
+    return sorted(sources)
+
+
 def cython_compile(path: Path, options: TranspileDirectives) -> int:
-    """ Perform the Cython build of all .pyx files in the supplied directory
+    """ Perform the Cython build of all source files in the supplied directory
     using the directives supplied. Return the number of files processed.
 
     :param path: directory to be processed
@@ -207,7 +231,7 @@ def cython_compile(path: Path, options: TranspileDirectives) -> int:
         base_dir, dist_root_name = find_dist_base(path)
         print(f"{mod_name}: creating setuptools.Extension instances:")
         targets = [create_extension(str(target), dist_root_name)
-                   for target in path.rglob("*.pyx")]
+                   for target in find_sources(path)]
         num_files_compiled = len(targets)
 
         ext_modules = cythonize(
@@ -242,6 +266,75 @@ def cython_compile(path: Path, options: TranspileDirectives) -> int:
     return num_files_compiled
 
 
+def shadow_annotate(path: Path, options: TranspileDirectives, build_dir: str) -> None:
+    """ Transpile (no C compilation) all source files in the supplied directory
+    with annotate switched on, writing the C and annotated HTML files to the
+    build directory supplied.
+
+    * Intended to run in its own process in parallel with the real build: the
+      annotate option is global Cython state and disables emit_linenums, so
+      must never leak into the real build.
+    * The source tree is only read, never written to.
+
+    :param path: directory to be processed
+    :param options: directives used in the real build
+    :param build_dir: (throwaway) directory for the generated files
+    """
+    CythonOptions.annotate = True
+    cythonize(
+        [str(target) for target in find_sources(path)],
+        exclude=options.excludes,
+        emit_linenums=False,
+        annotate=True,
+        compiler_directives=options.directives,
+        force=True,
+        quiet=True,
+        build_dir=build_dir)
+
+
+def start_shadow_annotate(path: Path, options: TranspileDirectives
+                          ) -> Tuple[multiprocessing.Process, str]:
+    """ Start the annotated shadow build of the supplied directory in a
+    separate process. Return the process and the throwaway build directory.
+
+    :param path: directory to be processed
+    :param options: directives used in the real build
+    :return process running the shadow build & its build directory
+    """
+    build_dir = tempfile.mkdtemp(prefix=f"{mod_name}_annotate_")
+    print(f"{mod_name}: start annotated shadow build in: {build_dir}")
+    process = multiprocessing.Process(target=shadow_annotate, args=(path, options, build_dir))
+    process.start()
+    return process, build_dir
+
+
+def report_hotspots(path: Path, process: multiprocessing.Process, build_dir: str) -> None:
+    """ Wait for the annotated shadow build to finish, then report the lines
+    and functions that fall back to the Python object protocol most. The full
+    report is written to the 'build' directory next to the source directory.
+
+    :param path: directory processed
+    :param process: process running the shadow build
+    :param build_dir: build directory of the shadow build
+    """
+    from utils.annotate_hotspots import collect_scores, print_report, write_report
+
+    process.join()
+    try:
+        if process.exitcode != 0:
+            print(f"{mod_name}: WARNING: annotated shadow build failed: {process.exitcode}")
+            return
+        # Cython mirrors the absolute source path (minus drive and root) below build_dir.
+        html_dir = Path(build_dir, *path.parts[1:])
+        scores = collect_scores(html_dir, path)
+        report_file = path.parent / "build" / f"{path.name}_hotspots.json"
+        print(f"{mod_name}: Python interaction hotspots, full report: {report_file}")
+        print_report(scores)
+        write_report(scores, report_file)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
 def run_distutils(args) -> None:
     """ Run distutils on the args supplied.
 
@@ -278,7 +371,8 @@ def construct_directives() -> Tuple[Path, TranspileDirectives]:
     :return path: to be processed & directives to build with
     """
     parser = ArgumentParser(
-        description="Cython build all pyx files in the supplied directory (recursively)")
+        description="Cython build all pyx files (and py files augmented by a pxd file) in the "
+                    "supplied directory (recursively)")
     parser.add_argument("path", type=str, help="the path (directory) to be processed")
     parser.add_argument("-f", "--force", dest="force", action="store_true",
                         help="force recompilation")
@@ -296,6 +390,9 @@ def construct_directives() -> Tuple[Path, TranspileDirectives]:
                         action="store_true",
                         help="set directive always_allow_keywords "
                              "(for experimentation only, DO NOT USE in production builds)")
+    parser.add_argument("-r", "--hotspot_report", dest="hotspot_report", action="store_true",
+                        help="report lines & functions using the Python C-API the most, via an "
+                             "annotated shadow build in a throwaway directory")
 
     my_directives = parser.parse_args(namespace=TranspileDirectives())
     if my_directives is None or my_directives.path is None:
@@ -377,6 +474,18 @@ def check_results(path: Path, num_files_compiled: int) -> int:
     return exit_code
 
 
+def write_build_manifest(path: Path) -> None:
+    """ Write the build manifest (source hash, size & modification time of
+    each compiled module) used by utils.compiled_import_hook to tell fresh
+    from stale extensions.
+
+    :param path: directory processed
+    """
+    from utils.compiled_import_hook import write_manifest
+
+    print(f"{mod_name}: build manifest: {write_manifest(path)}")
+
+
 def main():
     # Undo the compiler path: this will handle most exits of the program apart
     # from 'really bad crashes', see atexit docs.
@@ -391,10 +500,16 @@ def main():
     print(f"{mod_name}: directives:")
     pprint(directives.__dict__, indent=4)
 
+    shadow = start_shadow_annotate(path, directives) if directives.hotspot_report else None
+
     num_files_compiled = cython_compile(path, directives)
     delete_intermediate_pdb_files(path)
     copy_final_pdb_files(path)
     success = check_results(path, num_files_compiled)
+    write_build_manifest(path)
+
+    if shadow is not None:
+        report_hotspots(path, *shadow)
 
     print(f"{mod_name} START TIME:   {start_time}")
     print(f"{mod_name} FINISH TIME:  {datetime.now()}")
@@ -107,6 +107,10 @@ DIST_EXCLUDED_ITEMS_FROM_TEST_WHL = [
     r'conftest.py',
 ]
 
+# Replace package __init__ files that import their submodules by lazy loading (PEP 562)
+# versions, i.e. submodule extensions are only loaded on first use. Needs Python 3.7 or later.
+CYTHON_LAZY_INIT = False
+
 _here = Path(__file__).resolve().parents[0]
 
 
@@ -162,7 +166,8 @@ class CythonizeCommand(build_ext):
                                         cython_include_packages=CYTHON_INCLUDE_PACKAGES,
                                         cython_excluded_packages=CYTHON_EXCLUDED_PACKAGES,
                                         cython_excluded_modules=CYTHON_EXCLUDED_MODULES,
-                                        dist_excluded_items=DIST_EXCLUDED_ITEMS_FROM_TEST_WHL)
+                                        dist_excluded_items=DIST_EXCLUDED_ITEMS_FROM_TEST_WHL,
+                                        lazy_init=CYTHON_LAZY_INIT)
 
 
 class CythonizeIncremental(build_ext):
@@ -187,7 +192,8 @@ class CythonizeIncremental(build_ext):
                                         cython_excluded_packages=CYTHON_EXCLUDED_PACKAGES,
                                         cython_excluded_modules=CYTHON_EXCLUDED_MODULES,
                                         incremental=True,
-                                        dist_excluded_items=DIST_EXCLUDED_ITEMS_FROM_TEST_WHL)
+                                        dist_excluded_items=DIST_EXCLUDED_ITEMS_FROM_TEST_WHL,
+                                        lazy_init=CYTHON_LAZY_INIT)
 
 
 class TestCommand(build_ext):
@@ -216,7 +222,8 @@ class TestCommand(build_ext):
                                         dist_excluded_packages=EXCLUDE_FOR_TEST,
                                         cython_include_packages=CYTHON_INCLUDE_PACKAGES,
                                         cython_excluded_packages=CYTHON_EXCLUDED_PACKAGES,
-                                        cython_excluded_modules=CYTHON_EXCLUDED_MODULES)
+                                        cython_excluded_modules=CYTHON_EXCLUDED_MODULES,
+                                        lazy_init=CYTHON_LAZY_INIT)
 
 
 setup(
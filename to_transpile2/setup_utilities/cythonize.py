@@ -6,6 +6,7 @@
     Requirements: Microsoft Visual C++ Compiler 15.0 or later installed and configured.
     See '.../AUTOSTAR/build/Build-PythonWheel/Set-DevEnv'.
 """
+import ast
 import os
 import zipfile
 from os import path
@@ -245,6 +246,157 @@ def _create_new_incr_files(target_directory_fei,
                 _create_pyx_file(_path, filename)
 
 
+# First line of generated lazy loading __init__ files, after any header comment.
+_LAZY_INIT_MARKER = '# Generated by setup_utilities.cythonize: lazy loading (PEP 562) __init__.'
+
+_LAZY_INIT_TEMPLATE = '''{marker}
+# Submodules are only imported on first access of one of the names below.
+import importlib as _importlib
+
+_LAZY_ATTRIBUTES = {{
+{attributes}
+}}
+
+__all__ = {all_names!r}
+
+
+def __getattr__(name):
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        msg = 'module {{!r}} has no attribute {{!r}}'.format(__name__, name)
+        raise AttributeError(msg) from None
+    module = _importlib.import_module(module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+'''
+
+
+def _find_module_source(package_directory, relative_name):
+    """ Return the source file of a module given relative to a package, or None """
+    level = len(relative_name) - len(relative_name.lstrip('.'))
+    directory = package_directory
+    for _ in range(level - 1):
+        directory = os.path.dirname(directory)
+    module_path = os.path.join(directory, *relative_name.lstrip('.').split('.'))
+    for candidate in [module_path + '.py', module_path + '.pyx',
+                      os.path.join(module_path, '__init__.py')]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _public_names(module_source):
+    """ Static scan of the names a 'from module import *' of the module source gives """
+    with open(module_source, 'rt', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), module_source)
+
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == '__all__' for target in node.targets):
+            return list(ast.literal_eval(node.value))
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.extend(target.id for target in targets if isinstance(target, ast.Name))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.extend((alias.asname or alias.name).split('.')[0] for alias in node.names)
+    return [name for name in names if not name.startswith('_') and name != '*']
+
+
+def _create_lazy_init_source(init_source, package_directory):
+    """ Return the source of a lazy loading version of the package __init__ source supplied,
+    or None if the __init__ cannot be made lazy.
+
+    Only an __init__ that consists of a docstring, relative imports and an optional __all__ is
+    made lazy. Anything else might depend on the imported names at import time so is left alone.
+    """
+    if _LAZY_INIT_MARKER in init_source:
+        return None
+    tree = ast.parse(init_source)
+
+    attributes = {}
+    all_names = None
+    docstring = ast.get_docstring(tree, clean=False)
+    for index, node in enumerate(tree.body):
+        if index == 0 and docstring is not None:
+            continue
+        if isinstance(node, ast.ImportFrom) and node.level > 0:
+            module_name = '.' * node.level + (node.module or '')
+            for alias in node.names:
+                if alias.name == '*':
+                    module_source = _find_module_source(package_directory, module_name)
+                    if module_source is None:
+                        return None
+                    attributes.update((name, (module_name, name))
+                                      for name in _public_names(module_source))
+                elif node.module is None:
+                    attributes[alias.asname or alias.name] = (module_name + alias.name, None)
+                else:
+                    attributes[alias.asname or alias.name] = (module_name, alias.name)
+        elif isinstance(node, ast.Assign) and [getattr(target, 'id', None)
+                                               for target in node.targets] == ['__all__']:
+            all_names = list(ast.literal_eval(node.value))
+        else:
+            return None
+
+    if not attributes:
+        return None
+
+    header = []
+    for line in init_source.splitlines():
+        if not line.startswith('#'):
+            break
+        header.append(line)
+    if docstring is not None:
+        header.append('""" {} """'.format(docstring.strip().replace('"""', '\\"\\"\\"')))
+
+    lazy_source = _LAZY_INIT_TEMPLATE.format(
+        marker=_LAZY_INIT_MARKER,
+        attributes='\n'.join('    {!r}: {!r},'.format(name, attributes[name])
+                             for name in sorted(attributes)),
+        all_names=all_names if all_names is not None else sorted(attributes))
+    return '\n'.join(header + [lazy_source])
+
+
+def _create_lazy_init_files(target_directory_fei,
+                            cython_include_packages,
+                            cython_excluded_packages):
+    """ Replace the package __init__.py files that eagerly import their submodules by lazy
+    loading (PEP 562) versions. Needs Python 3.7 or later at runtime.
+
+    The package __init__.py files are not cythonized, but importing a package would still load
+    all the submodule extensions the __init__ imports. With the lazy version a submodule
+    extension is only loaded on first access of one of its names.
+    """
+    for _path, dirnames, filenames in os.walk(target_directory_fei):
+
+        if not any(package in _path for package in cython_include_packages):
+            continue
+
+        if any(package in _path for package in cython_excluded_packages) or "tests" in _path:
+            continue
+
+        if '__init__.py' not in filenames:
+            continue
+
+        init_file = os.path.join(_path, '__init__.py')
+        with open(init_file, 'rt', encoding='utf-8') as f:
+            lazy_source = _create_lazy_init_source(f.read(), _path)
+
+        if lazy_source is not None:
+            print("lazy loading package __init__: {0}".format(init_file))
+            with open(init_file, 'wt', encoding='utf-8') as f:
+                f.write(lazy_source)
+
+
 def _create_pyx_packages(source_directory,
                          target_directory,
                          dist_root_name,
@@ -252,11 +404,14 @@ def _create_pyx_packages(source_directory,
                          cython_include_packages,
                          cython_excluded_packages,
                          cython_excluded_modules,
-                         incremental=False):
+                         incremental=False,
+                         lazy_init=False):
     """ Copies all the selected packages to cythonize into the target
     directory and rename py files to pyx.
     If incremental option is selected then only changed py files will be
     cythonized.
+    If lazy_init option is selected then package __init__ files that import
+    their submodules are replaced by lazy loading versions.
     """
 
     source_directory_fei = os.path.join(source_directory, dist_root_name)
@@ -278,6 +433,13 @@ def _create_pyx_packages(source_directory,
     setup_file_path = os.path.join(source_directory, 'setup.py')
     shutil.copy2(setup_file_path, target_directory)
 
+    # Must be done before the py files are renamed (or removed) by _create_new_incr_files: the
+    # public names of the submodules are found by scanning their source.
+    if lazy_init:
+        _create_lazy_init_files(target_directory_fei,
+                                cython_include_packages,
+                                cython_excluded_packages)
+
     _create_new_incr_files(target_directory_fei,
                            dist_excluded_packages,
                            cython_include_packages,
@@ -376,7 +538,8 @@ def build_cython_packages(self,
                           cython_excluded_modules,
                           incremental=False,
                           dist_excluded_items=None,
-                          dist_excluded_files=None):
+                          dist_excluded_files=None,
+                          lazy_init=False):
     """ Build the python packages. """
 
     start_build_cython_packages = time.time()
@@ -411,7 +574,8 @@ def build_cython_packages(self,
                              cython_include_packages,
                              cython_excluded_packages,
                              cython_excluded_modules,
-                             incremental)
+                             incremental,
+                             lazy_init)
 
         print("\ncollect_extensions")
         print("")
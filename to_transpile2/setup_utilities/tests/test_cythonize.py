@@ -4,6 +4,7 @@
 import filecmp
 import os
 import shutil
+import tempfile
 import time
 import unittest
 
@@ -343,5 +344,35 @@ class TestCythonize(unittest.TestCase):
         extensions = cythonize._collect_extensions(self.test_destination_dir)
         assert len(extensions) == 1
 
+    # Test that _create_lazy_init_source replaces the relative imports of a package __init__ by
+    # lazy loading ones and leaves an __init__ with other statements alone
+    def test_create_lazy_init_source(self):
+        with tempfile.TemporaryDirectory() as package_directory:
+            with open(os.path.join(package_directory, "gamma.py"), "w") as f:
+                f.write("import os\nG = 1\n_hidden = 2\ndef g():\n    pass\n")
+
+            init_source = ("# Copyright\n"
+                           "from .alpha import Alpha, helper as h\n"
+                           "from . import beta\n"
+                           "from .gamma import *\n")
+            lazy_source = cythonize._create_lazy_init_source(init_source, package_directory)
+            assert lazy_source.startswith("# Copyright\n" + cythonize._LAZY_INIT_MARKER)
+            namespace = {"__name__": "package"}
+            exec(compile(lazy_source, "__init__.py", "exec"), namespace)
+            assert namespace["_LAZY_ATTRIBUTES"] == {
+                "Alpha": (".alpha", "Alpha"),
+                "h": (".alpha", "helper"),
+                "beta": (".beta", None),
+                "G": (".gamma", "G"),
+                "g": (".gamma", "g"),
+                "os": (".gamma", "os"),
+            }
+            assert namespace["__all__"] == ["Alpha", "G", "beta", "g", "h", "os"]
+
+            # Already lazy, or other statements that might need the imported names.
+            assert cythonize._create_lazy_init_source(lazy_source, package_directory) is None
+            assert cythonize._create_lazy_init_source(
+                init_source + "Alpha.register()\n", package_directory) is None
+
     # TODO: Find out a way to unit test 'python setup.py cythonize' and 'python setup.py
     #  cythonize_incremental'
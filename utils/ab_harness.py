@@ -0,0 +1,498 @@
+""" A/B performance harness: pure Python (py_version) vs Cython (cy_version)
+implementations of the problem constructs.
+
+Summary:
+'problem_constructs' keeps parallel 'py_version' and 'cy_version' trees with
+identical tests. This script runs the same workloads, taken from those tests,
+against both trees and reports per benchmark:
+    * the median time per operation of each implementation,
+    * the speedup of the compiled version (py time / cy time), with a
+      bootstrap confidence interval,
+    * a flag if the compiled version is slower: 'SLOWER' if the whole
+      confidence interval is below 1, 'slower?' if only the estimate is.
+
+Hot paths have a time budget for the compiled version, see CY_BUDGETS_NS: a
+benchmark over its budget is reported 'OVER BUDGET'.
+
+The workloads use the task classes from the 'tests' directories of the trees.
+Those call time.sleep to simulate work, which is switched off here so the
+framework code is measured rather than the sleeps.
+
+The cy tree must be built first, either beforehand or via the --build option
+(runs tfs_cythonize.py on the cy directories, see its prerequisites). Modules
+of the cy tree that are not compiled are reported as errors.
+
+Measurements are interleaved (py, cy, cy, py, ...) to spread drift of the
+machine (clock boost, other load) evenly over both implementations.
+
+Times are wall clock time, apart from benchmarks ending in '_cpu': those report
+the CPU time of the whole process (all threads), e.g. to measure the cost of
+waiting.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import threading
+from datetime import datetime
+from functools import partial
+from importlib import import_module, machinery
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+FLAVOURS = ("py_version", "cy_version")
+
+# Directories of the cy tree to build, relative to 'problem_constructs/cy_version'.
+CY_BUILD_DIRS = ("pep_560_ex2", "single_keyword")
+
+# Package of the task framework, relative to the tree of either flavour.
+PYTASK = "pep_560_ex2.py_3_10"
+
+# Benchmarks with this suffix are measured in process CPU time rather than wall clock time.
+CPU_TIME_SUFFIX = "_cpu"
+
+# Maximum time per operation of the compiled version in nano seconds, by benchmark.
+CY_BUDGETS_NS: Dict[str, float] = {
+    "interruption_check": 100.0,
+}
+
+Importer = Callable[[str], ModuleType]
+Workload = Callable[[Importer], Callable[[], Any]]
+
+_NO_SLEEP = SimpleNamespace(sleep=lambda seconds: None)
+
+
+class Comparison(NamedTuple):
+    """ Result of a single A/B benchmark, times in micro seconds per operation. """
+    name: str
+    py_us: float
+    cy_us: float
+    speedup: float
+    low: float
+    high: float
+
+    @property
+    def flag(self) -> str:
+        if self.high < 1.0:
+            return "SLOWER"
+        return "slower?" if self.speedup < 1.0 else ""
+
+
+class _CountingSink:
+    """ Callback sink for the task workloads, does the minimum possible. """
+    def __init__(self) -> None:
+        self.calls = 0
+        self.text = ""
+
+    def callback(self, *args) -> None:
+        self.calls += 1
+
+    def progress_callback(self, percentage: float) -> None:
+        # E.g. what a UI would do: format the value for display.
+        self.text = f"{percentage:.1f} %"
+
+
+def _import_task_module(import_: Importer, name: str) -> ModuleType:
+    """ Import a module from the tests of the task framework with its sleeps
+    switched off.
+    """
+    module = import_(f"{PYTASK}.tests.{name}")
+    module.time = _NO_SLEEP
+    return module
+
+
+def simple_task(import_: Importer) -> Callable[[], Any]:
+    """ Create and execute tests.simple_task.SimpleTask, nobody subscribed. """
+    task_class = _import_task_module(import_, "simple_task").SimpleTask
+
+    def run():
+        task_class().execute()
+    return run
+
+
+def simple_task_with_callbacks(import_: Importer) -> Callable[[], Any]:
+    """ Create and execute tests.simple_task_with_callback.SimpleTaskWithCallbacks
+    with progress, message and state change subscriptions.
+    """
+    task_class = _import_task_module(import_, "simple_task_with_callback").SimpleTaskWithCallbacks
+    sink = _CountingSink()
+
+    def run():
+        task = task_class()
+        task.subscribe_progress(sink.callback)
+        task.subscribe_message(sink.callback)
+        task.subscribe_state_change(sink.callback)
+        task.execute()
+    return run
+
+
+def interruptable_task(import_: Importer) -> Callable[[], Any]:
+    """ Create and execute tests.interruptable_task.InterruptableTask, i.e.
+    includes the interruption request handling between the steps.
+    """
+    task_class = _import_task_module(import_, "interruptable_task").InterruptableTask
+
+    def run():
+        task_class().execute()
+    return run
+
+
+def progress_reporting(import_: Importer, iterations: int, max_rate: float
+                       ) -> Callable[[], Any]:
+    """ Execute tests.progress_task.ProgressTask, reporting progress in a
+    tight loop to a subscriber, with or without progress coalescing.
+
+    :param iterations: number of progress reports
+    :param max_rate: maximum progress callbacks per second, 0. for no coalescing
+    """
+    task_class = import_(f"{PYTASK}.tests.progress_task").ProgressTask
+    sink = _CountingSink()
+
+    def run():
+        task = task_class(iterations)
+        if max_rate:
+            task.configure_progress_coalescing(max_rate=max_rate)
+        task.subscribe_progress(sink.progress_callback)
+        task.execute()
+    return run
+
+
+def executor_throughput(import_: Importer, tasks: int, max_workers: int, groups: int
+                        ) -> Callable[[], Any]:
+    """ Submit short tasks (tests.simple_task.SimpleTask, no sleeps) to a
+    TaskExecutor and wait for all of them, i.e. throughput is tasks / time
+    per operation. With groups > 0 the tasks are spread over that many groups,
+    each limited to a single running task, and get varying priorities.
+    """
+    executor_class = import_(f"{PYTASK}.pytask_executor").TaskExecutor
+    task_class = _import_task_module(import_, "simple_task").SimpleTask
+    group_limits = {f"group_{i}": 1 for i in range(groups)}
+
+    def run():
+        executor = executor_class(max_workers, group_limits)
+        for i in range(tasks):
+            if groups:
+                executor.submit(task_class(), priority=i % 7, group=f"group_{i % groups}")
+            else:
+                executor.submit(task_class())
+        executor.join()
+        executor.shutdown()
+    return run
+
+
+def interruptable_delay_cpu(import_: Importer, tasks: int, delay_ms: float
+                            ) -> Callable[[], Any]:
+    """ Execute tests.interruptable_task.TaskWithInterruptableDelay tasks
+    concurrently, each on its own thread, and wait for all of them. Measured
+    in CPU time, see CPU_TIME_SUFFIX.
+    """
+    task_class = import_(f"{PYTASK}.tests.interruptable_task").TaskWithInterruptableDelay
+
+    def run():
+        threads = [threading.Thread(target=task_class(delay_ms).execute) for _ in range(tasks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return run
+
+
+def event_broadcast(import_: Importer, subscribers: int) -> Callable[[], Any]:
+    """ Emit a single event to the number of subscribers supplied, see
+    tests.test_pytask_event. Emit throughput is 1 / time per operation.
+    """
+    broadcaster = import_(f"{PYTASK}.pytask_event").EventBroadcaster()
+    sink = _CountingSink()
+    for _ in range(subscribers):
+        broadcaster.add_handler(sink.callback)
+
+    def run():
+        broadcaster.emit(3)
+    return run
+
+
+def event_bus_emit(import_: Importer, subscribers: int, others: int) -> Callable[[], Any]:
+    """ Emit a progress event on an EventBus with the number of progress
+    subscribers supplied, and others subscribed to messages only (which the
+    emit must not touch), see tests.test_pytask_event_bus.
+    """
+    module = import_(f"{PYTASK}.pytask_event_bus")
+    bus = module.EventBus()
+    sink = _CountingSink()
+    for _ in range(subscribers):
+        bus.add_value_handler(module.TaskEventKind.Progress, sink.callback)
+    for _ in range(others):
+        bus.add_value_handler(module.TaskEventKind.Message, sink.callback)
+    kind = module.TaskEventKind.Progress
+
+    def run():
+        bus.emit(kind, 3)
+    return run
+
+
+def state_machine_cycle(import_: Importer) -> Callable[[], Any]:
+    """ Run a TaskStateMachine through execute, pause, resume and complete,
+    see tests.test_pytask_state_machine.
+    """
+    state_machine = import_(f"{PYTASK}.pytask_state_machine").TaskStateMachine()
+
+    def run():
+        state_machine.handle_execute_request()
+        state_machine.handle_pause_request()
+        state_machine.handle_task_paused()
+        state_machine.handle_resume_request()
+        state_machine.handle_task_completed()
+    return run
+
+
+def interruption_check(import_: Importer) -> Callable[[], Any]:
+    """ The check a running task makes for pause & abort requests, i.e. its
+    hot path: TaskStateMachine.handle_interruption_request while Running.
+    """
+    state_machine = import_(f"{PYTASK}.pytask_state_machine").TaskStateMachine()
+    state_machine.handle_execute_request()
+    # The bound method itself rather than a closure calling it: the budget is
+    # for the check, not for an extra Python call frame.
+    return state_machine.handle_interruption_request
+
+
+def task_interruption_check(import_: Importer) -> Callable[[], Any]:
+    """ As interruption_check, via the PyTaskBase method tasks call at every step.
+    """
+    task = import_(f"{PYTASK}.tests.interruptable_task").TaskWithInterruptableDelay(0)
+    task._task_state_machine.handle_execute_request()
+    return task.handle_interruption_request
+
+
+def single_keyword(import_: Importer, keyword: bool) -> Callable[[], Any]:
+    """ Call the single_keyword functions and methods, with either a single
+    positional or a single keyword argument.
+
+    Note: without the always_allow_keywords directive (tfs_cythonize
+    --single_keyword_arg) the keyword calls fail for the compiled version.
+    """
+    module = import_("single_keyword.single_keyword")
+    city = module.BedrockCity()
+    calls = [module.say_hello_to, module.say_hello_to_keyword, city.say_hello_to_instance,
+             module.BedrockCity.say_hello_to_class, module.BedrockCity.say_hello_to_static]
+
+    def run():
+        if keyword:
+            for call in calls:
+                call(name="Dino")
+        else:
+            for call in calls:
+                call("Dino")
+    return run
+
+
+WORKLOADS: Dict[str, Workload] = {
+    "simple_task": simple_task,
+    "simple_task_with_callbacks": simple_task_with_callbacks,
+    "interruptable_task": interruptable_task,
+    "progress_1m": partial(progress_reporting, iterations=1000000, max_rate=0.0),
+    "progress_1m_coalesced_30hz": partial(progress_reporting, iterations=1000000, max_rate=30.0),
+    "executor_10k": partial(executor_throughput, tasks=10000, max_workers=8, groups=0),
+    "executor_10k_groups": partial(executor_throughput, tasks=10000, max_workers=8, groups=4),
+    "interruptable_delay_100_tasks_cpu": partial(interruptable_delay_cpu, tasks=100,
+                                                 delay_ms=200.0),
+    "event_broadcast_0": partial(event_broadcast, subscribers=0),
+    "event_broadcast_1": partial(event_broadcast, subscribers=1),
+    "event_broadcast_10": partial(event_broadcast, subscribers=10),
+    "event_broadcast_1000": partial(event_broadcast, subscribers=1000),
+    "event_bus_emit_1": partial(event_bus_emit, subscribers=1, others=0),
+    "event_bus_emit_1_of_1000": partial(event_bus_emit, subscribers=1, others=1000),
+    "state_machine_cycle": state_machine_cycle,
+    "interruption_check": interruption_check,
+    "task_interruption_check": task_interruption_check,
+    "single_keyword_positional": partial(single_keyword, keyword=False),
+    "single_keyword_keyword": partial(single_keyword, keyword=True),
+}
+
+
+def create_importer(flavour: str) -> Importer:
+    """ Return a function that imports modules from the tree of the flavour
+    supplied, by name relative to the tree, e.g. 'single_keyword.single_keyword'.
+
+    For the cy tree, the framework modules imported must be compiled: an
+    ImportError is raised if not.
+    """
+    def import_(name: str) -> ModuleType:
+        module = import_module(f"problem_constructs.{flavour}.{name}")
+        if flavour == "cy_version" and ".tests." not in name:
+            if not module.__file__.endswith(tuple(machinery.EXTENSION_SUFFIXES + [".pyd"])):
+                raise ImportError(f"not compiled: {module.__file__}")
+        return module
+    return import_
+
+
+def build_cy_tree() -> int:
+    """ Build the cy tree by running tfs_cythonize on each of CY_BUILD_DIRS.
+    Return 0 if all builds succeeded, else the last non-zero exit code.
+    """
+    exit_code = 0
+    for directory in CY_BUILD_DIRS:
+        path = REPO_ROOT / "problem_constructs" / "cy_version" / directory
+        print(f"building: {path}")
+        result = subprocess.run([sys.executable, str(REPO_ROOT / "tfs_cythonize.py"), "-q",
+                                 str(path)], cwd=str(REPO_ROOT))
+        if result.returncode != 0:
+            print(f"    WARNING: build failed: {result.returncode}")
+            exit_code = result.returncode
+    return exit_code
+
+
+def calibrate(run: Callable[[], Any], min_time: float,
+              clock: Callable[[], float] = time.perf_counter) -> int:
+    """ Return the number of calls needed for a single sample to take at least
+    min_time seconds.
+    """
+    number = 1
+    while True:
+        start = clock()
+        for _ in range(number):
+            run()
+        if clock() - start >= min_time:
+            return number
+        number *= 2
+
+
+def measure(runs: Dict[str, Callable[[], Any]], number: int, repeat: int,
+            clock: Callable[[], float] = time.perf_counter) -> Dict[str, List[float]]:
+    """ Take repeat samples of number calls of each run supplied, interleaved
+    and alternating order each round. Return the samples in micro seconds per
+    call.
+
+    :param runs: {flavour: callable}
+    :param number: calls per sample
+    :param repeat: samples per flavour
+    :return {flavour: samples}
+    """
+    samples: Dict[str, List[float]] = {flavour: [] for flavour in runs}
+    order = list(runs)
+    for _ in range(repeat):
+        for flavour in order:
+            run = runs[flavour]
+            start = clock()
+            for _ in range(number):
+                run()
+            samples[flavour].append((clock() - start) * 1e6 / number)
+        order.reverse()
+    return samples
+
+
+def bootstrap_speedup(baseline: List[float], candidate: List[float], resamples: int = 2000,
+                      confidence: float = 0.95, seed: int = 0) -> Tuple[float, float, float]:
+    """ Speedup of the candidate relative to the baseline as the ratio of the
+    median times, with a percentile bootstrap confidence interval.
+
+    :param baseline: time samples of the baseline (py_version)
+    :param candidate: time samples of the candidate (cy_version)
+    :param resamples: number of bootstrap resamples
+    :param confidence: confidence level of the interval, e.g. 0.95
+    :param seed: seed for the resampling, results are reproducible
+    :return (speedup, low, high), speedup > 1 means the candidate is faster
+    """
+    rng = random.Random(seed)
+    ratios = sorted(statistics.median(rng.choices(baseline, k=len(baseline)))
+                    / statistics.median(rng.choices(candidate, k=len(candidate)))
+                    for _ in range(resamples))
+    tail = (1.0 - confidence) / 2
+    low = ratios[int(tail * (resamples - 1))]
+    high = ratios[int(round((1.0 - tail) * (resamples - 1)))]
+    return statistics.median(baseline) / statistics.median(candidate), low, high
+
+
+def over_budget(results: List[Comparison],
+                budgets_ns: Dict[str, float] = CY_BUDGETS_NS) -> List[str]:
+    """ Return the names of the benchmarks whose compiled version takes longer
+    than its budget.
+    """
+    return [result.name for result in results
+            if result.name in budgets_ns and result.cy_us * 1000.0 > budgets_ns[result.name]]
+
+
+def run_benchmark(name: str, workload: Workload, repeat: int, min_time: float
+                  ) -> Comparison:
+    """ Run a single workload against both trees. """
+    runs = {flavour: workload(create_importer(flavour)) for flavour in FLAVOURS}
+    for run in runs.values():
+        run()  # warm up, e.g. first call & caches
+    clock = time.process_time if name.endswith(CPU_TIME_SUFFIX) else time.perf_counter
+    samples = measure(runs, calibrate(runs["py_version"], min_time, clock), repeat, clock)
+    speedup, low, high = bootstrap_speedup(samples["py_version"], samples["cy_version"])
+    return Comparison(name, statistics.median(samples["py_version"]),
+                      statistics.median(samples["cy_version"]), speedup, low, high)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the py_version and cy_version problem constructs on the same "
+                    "workloads")
+    arg_parser.add_argument("-b", "--build", action="store_true",
+                            help="build the cy tree first (runs tfs_cythonize.py)")
+    arg_parser.add_argument("-n", "--repeat", type=int, default=20,
+                            help="samples per implementation")
+    arg_parser.add_argument("-m", "--min_time", type=float, default=0.02,
+                            help="minimum duration of a single sample in seconds")
+    arg_parser.add_argument("-k", "--select", default="",
+                            help="only run the benchmarks with this text in the name")
+    arg_parser.add_argument("-o", "--output", help="also write the results to this JSON file")
+    my_args = arg_parser.parse_args()
+
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    if my_args.build and build_cy_tree() != 0:
+        print("WARNING: cy tree build failed, benchmarks of modules not compiled will fail")
+
+    results: List[Comparison] = []
+    errors: Dict[str, str] = {}
+    print(f"{'benchmark':32} {'py us':>10} {'cy us':>10} {'speedup':>8} {'95% CI':>15}")
+    for name, workload in WORKLOADS.items():
+        if my_args.select not in name:
+            continue
+        try:
+            result = run_benchmark(name, workload, my_args.repeat, my_args.min_time)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+            print(f"{name:32} ERROR: {errors[name]}")
+            continue
+        results.append(result)
+        print(f"{name:32} {result.py_us:10.2f} {result.cy_us:10.2f} {result.speedup:8.2f} "
+              f"[{result.low:5.2f}, {result.high:5.2f}]  {result.flag}")
+
+    slower = [result.name for result in results if result.flag == "SLOWER"]
+    for name in slower:
+        print(f"    SLOWER: compiled version is slower for: {name}")
+    over = over_budget(results)
+    for name in over:
+        print(f"    OVER BUDGET: compiled version takes longer than {CY_BUDGETS_NS[name]} ns "
+              f"for: {name}")
+
+    if my_args.output:
+        report = {
+            "timestamp": str(datetime.now()),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "results": [dict(result._asdict(), flag=result.flag) for result in results],
+            "errors": errors,
+            "over_budget": over,
+        }
+        output = Path(my_args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(str(output), "wt", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if slower:
+        return 5
+    return 6 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
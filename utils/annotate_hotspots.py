@@ -0,0 +1,179 @@
+""" Rank the lines and functions of a Cython build that fall back to the Python
+object protocol the most.
+
+Summary:
+Parses the annotated HTML pages generated by 'cython --annotate' (or the
+'tfs_cythonize --hotspot_report' shadow build) and reports, per source line and
+per function, how many Python C-API calls the generated C code makes. Lines with
+a high count are where adding static types pays off.
+
+* score: the weighted score Cython itself uses to colour the annotated HTML.
+* calls: the raw number of C-API calls in the generated C code for the line.
+"""
+import re
+import sys
+import json
+import argparse
+from html import unescape
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Annotated source line: "<pre class='cython line score-12' ...>+<span class=''>0007</span>: ..."
+_LINE_RE = re.compile(
+    r"<pre class=['\"]cython line score-(?P<score>\d+)[^'\"]*['\"][^>]*>"
+    r".*?<span class=['\"]{2}>(?P<lineno>\d+)</span>: (?P<code>.*?)</pre>")
+
+# Generated C code for the preceding source line: "<pre class='cython code score-12 '>...</pre>"
+_CODE_RE = re.compile(
+    r"\s*<pre class=['\"]cython code score-\d+[^'\"]*['\"]>(?P<c_code>.*?)</pre>", re.DOTALL)
+
+# C-API call markers inside the generated C code.
+_CALL_RE = re.compile(r"<span class=['\"](?:py|pyx)_(?:c|macro)_api['\"]>")
+
+_DEF_RE = re.compile(r"^(?P<indent>\s*)(?:async\s+)?(?:c?p?def|class)\s+(?:[\w\[\]\s\*]+\s+)?"
+                     r"(?P<name>\w+)\s*[(:]")
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class LineScore(NamedTuple):
+    """ Python interaction measure for a single line of a .pyx file. """
+    source: str
+    lineno: int
+    function: str
+    score: int
+    calls: int
+    code: str
+
+
+def _strip_html(text: str) -> str:
+    return unescape(_TAG_RE.sub("", text)).rstrip()
+
+
+def parse_annotated_html(html: str, source: str) -> List[LineScore]:
+    """ Parse the contents of a Cython annotated HTML page. Return a score for
+    each line of the source file that generates any C code.
+
+    The enclosing function of each line is derived from the source code itself
+    (def, cdef, cpdef and class statements), e.g. 'MyClass.my_method'.
+
+    :param html: contents of the annotated HTML file
+    :param source: name of the corresponding .pyx file, used for reporting
+    :return list of line scores, in source order
+    """
+    scores = []
+    scope: List[Tuple[int, str]] = []  # (indentation, name) of the enclosing defs
+    for match in _LINE_RE.finditer(html):
+        code = _strip_html(match.group("code"))
+        def_match = _DEF_RE.match(code)
+        if code.strip() and not code.lstrip().startswith("#"):
+            indent = len(code) - len(code.lstrip())
+            while scope and scope[-1][0] >= indent:
+                scope.pop()
+            if def_match:
+                scope.append((indent, def_match.group("name")))
+        function = ".".join(name for _, name in scope) or "<module>"
+
+        c_code = _CODE_RE.match(html, match.end())
+        calls = len(_CALL_RE.findall(c_code.group("c_code"))) if c_code else 0
+        score = int(match.group("score"))
+        if score or calls:
+            scores.append(LineScore(source, int(match.group("lineno")), function,
+                                    score, calls, code.strip()))
+    return scores
+
+
+def collect_scores(html_dir: Path, source_dir: Optional[Path] = None) -> List[LineScore]:
+    """ Parse all the annotated HTML files found (recursively) in the supplied
+    directory.
+
+    :param html_dir: directory containing the annotated HTML files
+    :param source_dir: if supplied, report source names relative to this dir
+    :return all line scores found
+    """
+    scores = []
+    for html_file in sorted(html_dir.rglob("*.html")):
+        source = html_file.relative_to(html_dir).with_suffix(".pyx")
+        if source_dir is not None:
+            source = source_dir / source
+            if not source.exists() and source.with_suffix(".py").exists():
+                source = source.with_suffix(".py")  # augmented by a .pxd file
+        with open(str(html_file), "rt", encoding="utf-8") as f:
+            scores.extend(parse_annotated_html(f.read(), str(source)))
+    return scores
+
+
+def rank_functions(scores: List[LineScore]) -> List[Tuple[str, str, int, int]]:
+    """ Sum the line scores per function and return them ranked, worst first.
+
+    :param scores: line scores, e.g. from collect_scores
+    :return list of (source, function, score, calls) tuples
+    """
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for line in scores:
+        total = totals.setdefault((line.source, line.function), [0, 0])
+        total[0] += line.score
+        total[1] += line.calls
+    return sorted(((source, function, score, calls)
+                   for (source, function), (score, calls) in totals.items()),
+                  key=lambda item: (-item[2], -item[3], item[0], item[1]))
+
+
+def rank_lines(scores: List[LineScore]) -> List[LineScore]:
+    """ Return the line scores ranked, worst first.
+
+    :param scores: line scores, e.g. from collect_scores
+    :return ranked line scores
+    """
+    return sorted(scores, key=lambda line: (-line.score, -line.calls, line.source, line.lineno))
+
+
+def write_report(scores: List[LineScore], report_file: Path) -> None:
+    """ Write the complete ranked report as JSON.
+
+    :param scores: line scores, e.g. from collect_scores
+    :param report_file: JSON file to (over)write
+    """
+    report = {
+        "functions": [dict(source=source, function=function, score=score, calls=calls)
+                      for source, function, score, calls in rank_functions(scores)],
+        "lines": [line._asdict() for line in rank_lines(scores)],
+    }
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(report_file), "wt", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(scores: List[LineScore], top: int = 20) -> None:
+    """ Print the worst functions and lines to stdout.
+
+    :param scores: line scores, e.g. from collect_scores
+    :param top: number of functions and lines to show
+    """
+    print(f"top {top} functions by Python interaction (score, C-API calls):")
+    for source, function, score, calls in rank_functions(scores)[:top]:
+        print(f"    {score:6d} {calls:6d}    {source}: {function}")
+    print(f"top {top} lines by Python interaction (score, C-API calls):")
+    for line in rank_lines(scores)[:top]:
+        print(f"    {line.score:6d} {line.calls:6d}    {line.source}:{line.lineno}: {line.code}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Rank lines and functions of annotated Cython HTML by Python interaction")
+    arg_parser.add_argument("-d", "--directory", required=True,
+                            help="directory containing the annotated HTML files")
+    arg_parser.add_argument("-n", "--top", type=int, default=20,
+                            help="number of functions and lines to show")
+    arg_parser.add_argument("-o", "--output", help="also write the full report to this JSON file")
+    my_args = arg_parser.parse_args()
+    print(f"processing directory : {my_args.directory}")
+
+    scores = collect_scores(Path(my_args.directory))
+    print_report(scores, my_args.top)
+    if my_args.output:
+        write_report(scores, Path(my_args.output))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
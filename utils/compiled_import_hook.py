@@ -0,0 +1,267 @@
+""" Import hook that prefers fresh compiled modules and falls back to source.
+
+Summary:
+During development the same tree (e.g. 'fei_xxx') contains the Python source
+(.pyx, or .py) and, after a tfs_cythonize build, the compiled extensions
+(.pyd/.so). Python always prefers the extension, even when the source has been
+edited since the build. This module provides:
+    * create_manifest / write_manifest: record for every compiled module of a
+      built tree the hash, size and modification time of the source it was
+      built from. tfs_cythonize writes the manifest at the end of a build.
+    * ManifestFinder: a sys.meta_path finder that loads the compiled extension
+      of a module in the manifest only if its source is unchanged, otherwise
+      the source itself. Optionally a background rebuild of the tree is queued.
+    * install: add a ManifestFinder for a built tree to sys.meta_path.
+
+Validation costs a single os.stat of the source per module: if size and
+modification time match the manifest the module is fresh. Only when they differ
+(e.g. git checkout touched the file) the source is hashed, and the result is
+cached against the new stat values so the hash is computed once per change.
+
+Modules not in the manifest (e.g. package __init__ files, which are never
+compiled) are left to the standard finders.
+
+E.g. in run_hello.py:
+    from utils.compiled_import_hook import install
+    install("fei_xxx/build_manifest.json", rebuild=True)
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib import machinery, util
+from importlib.abc import MetaPathFinder
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+MANIFEST_NAME = "build_manifest.json"
+
+MANIFEST_VERSION = 1
+
+_EXTENSION_SUFFIXES = tuple(machinery.EXTENSION_SUFFIXES + [".pyd"])
+
+
+def _hash_file(file: Path) -> str:
+    with open(str(file), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _find_extension(source: Path) -> Optional[Path]:
+    """ Return the compiled extension next to the source file supplied, or
+    None if there is none. E.g. 'hello.pyx' -> 'hello.cp36-win_amd64.pyd'.
+    """
+    for candidate in sorted(source.parent.glob(f"{source.stem}.*")):
+        if candidate.name.endswith(_EXTENSION_SUFFIXES):
+            return candidate
+    return None
+
+
+def create_manifest(path: Path) -> Dict:
+    """ Create the build manifest of the built tree supplied: an entry for
+    every .pyx file, or .py file augmented by a .pxd file, that has a compiled
+    extension next to it.
+
+    * The root name of the package is the name of the directory supplied, see
+      tfs_cythonize.find_dist_base.
+    * File names are relative to the parent of the directory supplied, so the
+      tree can be moved or deployed.
+
+    :param path: directory of the built tree, e.g. 'to_transpile/fei_xxx'
+    :return the manifest
+    """
+    modules = {}
+    sources = list(path.rglob("*.pyx"))
+    sources.extend(source for source in path.rglob("*.py") if source.with_suffix(".pxd").exists())
+    for source in sorted(sources):
+        extension = _find_extension(source)
+        if extension is None:
+            continue
+        stat = source.stat()
+        rel_source = source.relative_to(path.parent)
+        modules[".".join(rel_source.with_suffix("").parts)] = {
+            "source": rel_source.as_posix(),
+            "extension": extension.relative_to(path.parent).as_posix(),
+            "sha256": _hash_file(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+    return {"version": MANIFEST_VERSION, "package": path.name, "modules": modules}
+
+
+def write_manifest(path: Path) -> Path:
+    """ Create the build manifest of the built tree supplied and write it to
+    the tree itself. Return the manifest file.
+
+    :param path: directory of the built tree, e.g. 'to_transpile/fei_xxx'
+    :return the manifest file
+    """
+    manifest_file = path / MANIFEST_NAME
+    with open(str(manifest_file), "wt", encoding="utf-8") as f:
+        json.dump(create_manifest(path), f, indent=2)
+    return manifest_file
+
+
+def rebuild_with_tfs_cythonize(path: Path) -> None:
+    """ Default background rebuild: run tfs_cythonize on the tree, which also
+    rewrites the manifest.
+
+    :param path: directory of the built tree
+    """
+    script = Path(__file__).resolve().parents[1] / "tfs_cythonize.py"
+    subprocess.run([sys.executable, str(script), "-q", str(path)],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class ManifestFinder(MetaPathFinder):
+    """ Finds the modules of a single built tree: the compiled extension if
+    its source is unchanged since the build, else the source.
+    """
+
+    def __init__(self, manifest_file: Path,
+                 rebuild: Optional[Callable[[Path], None]] = None) -> None:
+        """ Initializer.
+
+        :param manifest_file: manifest written by write_manifest
+        :param rebuild: if supplied, called in a background thread with the
+            directory of the tree when a stale module is found (at most one
+            rebuild queued at a time, at most one request per module)
+        """
+        self._manifest_file = Path(manifest_file).resolve()
+        self._base_dir = self._manifest_file.parents[1]
+        self._rebuild = rebuild
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._rebuild_queued = False
+        self._rebuild_requested: Set[str] = set()
+        self._lock = threading.Lock()
+        self._modules: Dict[str, Dict] = {}
+        # Module name -> (size, mtime_ns, fresh) as last seen by os.stat.
+        self._validated: Dict[str, Tuple[int, int, bool]] = {}
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        with open(str(self._manifest_file), "rt", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version: {self._manifest_file}")
+        with self._lock:
+            self._modules = manifest["modules"]
+            self._validated.clear()
+
+    def is_fresh(self, fullname: str) -> bool:
+        """ Check whether the compiled extension of the module supplied is
+        built from the current source.
+
+        :param fullname: full dotted name of a module in the manifest
+        :return True if fresh, False if the source changed (or is gone)
+        """
+        entry = self._modules[fullname]
+        try:
+            stat = os.stat(self._base_dir / entry["source"])
+        except OSError:
+            return False
+        key = (stat.st_size, stat.st_mtime_ns)
+        validated = self._validated.get(fullname)
+        if validated is not None and validated[:2] == key:
+            return validated[2]
+
+        if key == (entry["size"], entry["mtime_ns"]):
+            fresh = True
+        else:
+            fresh = (stat.st_size == entry["size"]
+                     and _hash_file(self._base_dir / entry["source"]) == entry["sha256"])
+        self._validated[fullname] = key + (fresh,)
+        return fresh
+
+    def stale_modules(self) -> List[str]:
+        """ Return the names of all modules in the manifest that are not fresh. """
+        return [name for name in sorted(self._modules) if not self.is_fresh(name)]
+
+    def find_spec(self, fullname, path=None, target=None):
+        entry = self._modules.get(fullname)
+        if entry is None:
+            return None
+
+        if self.is_fresh(fullname):
+            extension = str(self._base_dir / entry["extension"])
+            loader = machinery.ExtensionFileLoader(fullname, extension)
+            return util.spec_from_file_location(fullname, extension, loader=loader)
+
+        self._queue_rebuild(fullname)
+        source = str(self._base_dir / entry["source"])
+        if not os.path.exists(source):
+            return None  # leave it to the standard finders
+        loader = machinery.SourceFileLoader(fullname, source)
+        return util.spec_from_file_location(fullname, source, loader=loader)
+
+    def _queue_rebuild(self, fullname: str) -> None:
+        if self._rebuild is None:
+            return
+        with self._lock:
+            # Each stale module requests a rebuild once only, i.e. no rebuild loop if it fails.
+            if fullname in self._rebuild_requested:
+                return
+            self._rebuild_requested.add(fullname)
+            if self._rebuild_queued:
+                return
+            self._rebuild_queued = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1,
+                                                    thread_name_prefix="manifest_rebuild")
+        self._executor.submit(self._run_rebuild)
+
+    def _run_rebuild(self) -> None:
+        try:
+            self._rebuild(self._manifest_file.parent)
+            self._load_manifest()
+        finally:
+            with self._lock:
+                self._rebuild_queued = False
+
+
+def install(manifest_file, rebuild=False) -> ManifestFinder:
+    """ Add a ManifestFinder for the built tree of the manifest supplied to the
+    front of sys.meta_path. Return the finder.
+
+    Note: a background rebuild only benefits the next process, modules already
+    imported from source are not reloaded. Interpreter exit waits for a running
+    rebuild to finish.
+
+    :param manifest_file: manifest written by write_manifest
+    :param rebuild: False, True to rebuild with tfs_cythonize, or a callable
+        taking the directory of the tree
+    :return the finder installed
+    """
+    if rebuild is True:
+        rebuild = rebuild_with_tfs_cythonize
+    finder = ManifestFinder(Path(manifest_file), rebuild or None)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Write or check the build manifest of a built tree")
+    arg_parser.add_argument("-d", "--directory", required=True,
+                            help="built tree to process, e.g. 'to_transpile/fei_xxx'")
+    arg_parser.add_argument("-w", "--write", action="store_true",
+                            help="(re)write the manifest, else report stale modules")
+    my_args = arg_parser.parse_args()
+
+    path = Path(my_args.directory).resolve()
+    print(f"processing directory : {path}")
+    if my_args.write:
+        print(f"manifest written to  : {write_manifest(path)}")
+        return 0
+
+    stale = ManifestFinder(path / MANIFEST_NAME).stale_modules()
+    for name in stale:
+        print(f"    STALE: {name}")
+    return 5 if stale else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+""" Import-time and first-call latency benchmark for compiled vs pure Python
+modules.
+
+Summary:
+For every module in a built tree (e.g. 'to_transpile/fei_xxx') measure, in
+fresh Python processes, how long it takes to get the module ready for use. Both
+the compiled extension (.pyd/.so) and the equivalent source (.py, or the .pyx
+itself since that is plain Python for this code base) are measured. Each
+measurement is split into phases:
+    * load: compiled, dlopen (LoadLibrary) of the extension. Source, reading
+      and compiling (or un-marshalling) the byte code.
+    * init: compiled, module creation and initialization (PyInit_xxx and
+      module exec). Source, executing the module body.
+    * first_call: calling the function given by --call on the fresh module
+      (optional).
+
+Cold and warm imports:
+    * cold: fresh process with an empty byte code cache, i.e. source modules
+      must be compiled. The OS file cache cannot be dropped portably so it is
+      not.
+    * warm: fresh process with the byte code cache already populated.
+
+Results are appended to a JSON history file and compared against the previous
+run: any phase that is slower than the threshold allows is reported as a
+regression and the exit code is non-zero.
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from importlib import import_module, machinery, util
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PHASES = ("load", "init", "first_call")
+
+# Regressions smaller than this (in micro seconds) are considered noise.
+MIN_REGRESSION_US = 50.0
+
+
+def find_modules(path: Path) -> Dict[str, Dict[str, str]]:
+    """ Find all modules in the built tree supplied. Return a mapping of full
+    dotted module name to the compiled and / or source file of that module.
+
+    * The root name of the package is the name of the directory supplied, see
+      tfs_cythonize.find_dist_base.
+    * Package __init__ files are not benchmarked.
+
+    :param path: directory of the built tree, e.g. 'to_transpile/fei_xxx'
+    :return {module name: {'compiled': file, 'source': file}}
+    """
+    modules: Dict[str, Dict[str, str]] = {}
+    suffixes = [(suffix, "compiled") for suffix in machinery.EXTENSION_SUFFIXES + [".pyd"]]
+    suffixes += [(".pyx", "source"), (".py", "source")]
+    for file in sorted(path.rglob("*")):
+        for suffix, kind in suffixes:
+            if file.name.endswith(suffix):
+                stem = file.name[:-len(suffix)].split(".")[0]
+                if stem == "__init__":
+                    break
+                rel_parts = file.parent.relative_to(path.parent).parts + (stem,)
+                # Sorted, so e.g. .py wins over .pyx if both are present.
+                modules.setdefault(".".join(rel_parts), {}).setdefault(kind, str(file))
+                break
+    return modules
+
+
+def _probe(spec: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """ Runs in the fresh benchmark process: import a single module, phase by
+    phase. Return the duration of each phase in micro seconds.
+
+    :param spec: what to import, see _run_probe
+    :return {phase: duration}
+    """
+    sys.path.insert(0, spec["base_dir"])
+    name, file = spec["name"], spec["file"]
+    parent = name.rpartition(".")[0]
+    if parent:
+        import_module(parent)  # not part of the measurement
+
+    timings: Dict[str, Optional[float]] = dict.fromkeys(PHASES)
+    if spec["kind"] == "compiled":
+        import ctypes
+        start = time.perf_counter_ns()
+        ctypes.PyDLL(file, mode=getattr(sys, "getdlopenflags", lambda: 0)())
+        timings["load"] = (time.perf_counter_ns() - start) / 1000
+
+        start = time.perf_counter_ns()
+        module_spec = util.spec_from_file_location(name, file)
+        module = util.module_from_spec(module_spec)
+        sys.modules[name] = module
+        module_spec.loader.exec_module(module)
+        timings["init"] = (time.perf_counter_ns() - start) / 1000
+    else:
+        loader = machinery.SourceFileLoader(name, file)
+        start = time.perf_counter_ns()
+        code = loader.get_code(name)
+        timings["load"] = (time.perf_counter_ns() - start) / 1000
+
+        start = time.perf_counter_ns()
+        module = util.module_from_spec(util.spec_from_loader(name, loader, origin=file))
+        sys.modules[name] = module
+        exec(code, module.__dict__)
+        timings["init"] = (time.perf_counter_ns() - start) / 1000
+
+    if spec["call"]:
+        function = getattr(module, spec["call"])
+        start = time.perf_counter_ns()
+        function(*spec["call_args"])
+        timings["first_call"] = (time.perf_counter_ns() - start) / 1000
+
+    return timings
+
+
+def _run_probe(spec: Dict[str, Any], pycache_prefix: str) -> Dict[str, Optional[float]]:
+    """ Run a single measurement in a fresh Python process.
+
+    :param spec: what to import
+    :param pycache_prefix: byte code cache directory to use
+    :return {phase: duration}
+    """
+    cmd = [sys.executable, "-X", f"pycache_prefix={pycache_prefix}",
+           str(Path(__file__).resolve()), "--probe", json.dumps(spec)]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median(samples: List[Dict[str, Optional[float]]]) -> Dict[str, Optional[float]]:
+    medians: Dict[str, Optional[float]] = {}
+    for phase in PHASES:
+        values = [sample[phase] for sample in samples if sample[phase] is not None]
+        medians[phase] = statistics.median(values) if values else None
+    return medians
+
+
+def benchmark_module(base_dir: Path, name: str, kind: str, file: str, repeat: int,
+                     call: Optional[str], call_args: List[Any]) -> Dict[str, Dict]:
+    """ Measure cold and warm import of a single module. Return the median of
+    each phase over the repeated runs.
+
+    :param base_dir: directory to add to sys.path for the import
+    :param name: full dotted module name
+    :param kind: 'compiled' or 'source'
+    :param file: the module file
+    :param repeat: number of fresh processes per measurement
+    :param call: name of a function to call after import, or None
+    :param call_args: arguments for that function
+    :return {'cold': {phase: duration}, 'warm': {phase: duration}}
+    """
+    spec = dict(base_dir=str(base_dir), name=name, kind=kind, file=file,
+                call=call if call else None, call_args=call_args)
+    warm_cache = tempfile.mkdtemp(prefix="import_benchmark_")
+    try:
+        cold = []
+        for _ in range(repeat):
+            cold_cache = tempfile.mkdtemp(prefix="import_benchmark_")
+            try:
+                cold.append(_run_probe(spec, cold_cache))
+            finally:
+                shutil.rmtree(cold_cache, ignore_errors=True)
+
+        _run_probe(spec, warm_cache)  # populate the byte code cache
+        warm = [_run_probe(spec, warm_cache) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(warm_cache, ignore_errors=True)
+    return {"cold": _median(cold), "warm": _median(warm)}
+
+
+def compare_runs(previous: Dict, current: Dict, threshold: float
+                 ) -> List[Tuple[str, str, str, str, float, float]]:
+    """ Compare the results of two runs. Return all phases that got slower
+    than the threshold allows.
+
+    :param previous: results of the reference run
+    :param current: results of the new run
+    :param threshold: allowed relative slow down, e.g. 0.2 for 20%
+    :return list of (module, kind, cold / warm, phase, previous, current)
+    """
+    regressions = []
+    for module, kinds in current.items():
+        for kind, temperatures in kinds.items():
+            for temperature, phases in temperatures.items():
+                for phase, value in phases.items():
+                    try:
+                        old = previous[module][kind][temperature][phase]
+                    except KeyError:
+                        continue
+                    if value is None or old is None:
+                        continue
+                    if value > old * (1 + threshold) and value - old > MIN_REGRESSION_US:
+                        regressions.append((module, kind, temperature, phase, old, value))
+    return regressions
+
+
+def _format(value: Optional[float]) -> str:
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark cold & warm import and first call of compiled vs source modules")
+    arg_parser.add_argument("-d", "--directory",
+                            help="built tree to process, e.g. 'to_transpile/fei_xxx'")
+    arg_parser.add_argument("-o", "--output", default="build/import_benchmark.json",
+                            help="JSON history file (results are appended)")
+    arg_parser.add_argument("-n", "--repeat", type=int, default=5,
+                            help="fresh processes per measurement")
+    arg_parser.add_argument("-c", "--call", default="",
+                            help="function to call after import to measure first call latency")
+    arg_parser.add_argument("-a", "--call_args", default="[]",
+                            help="JSON list of arguments for the function given by --call")
+    arg_parser.add_argument("-t", "--threshold", type=float, default=0.2,
+                            help="relative slow down versus the previous run seen as regression")
+    arg_parser.add_argument("--probe", help=argparse.SUPPRESS)
+    my_args = arg_parser.parse_args()
+
+    if my_args.probe:
+        print(json.dumps(_probe(json.loads(my_args.probe))))
+        return 0
+    if not my_args.directory:
+        arg_parser.error("the following arguments are required: -d/--directory")
+
+    path = Path(my_args.directory).resolve()
+    print(f"processing directory : {path}")
+    call_args = json.loads(my_args.call_args)
+
+    results: Dict[str, Dict] = {}
+    print(f"{'module':40} {'kind':8} {'temp':4} " + " ".join(f"{p + ' us':>10}" for p in PHASES))
+    for name, files in find_modules(path).items():
+        for kind, file in sorted(files.items()):
+            result = benchmark_module(path.parent, name, kind, file, my_args.repeat,
+                                      my_args.call, call_args)
+            results.setdefault(name, {})[kind] = result
+            for temperature, phases in result.items():
+                print(f"{name:40} {kind:8} {temperature:4} "
+                      + " ".join(_format(phases[phase]) for phase in PHASES))
+
+    history_file = Path(my_args.output)
+    history = {"runs": []}
+    if history_file.exists():
+        with open(str(history_file), "rt", encoding="utf-8") as f:
+            history = json.load(f)
+    same_tree = [run for run in history["runs"] if run["directory"] == str(path)]
+
+    exit_code = 0
+    if same_tree:
+        regressions = compare_runs(same_tree[-1]["results"], results, my_args.threshold)
+        print(f"compared with run of: {same_tree[-1]['timestamp']}")
+        for module, kind, temperature, phase, old, new in regressions:
+            print(f"    REGRESSION: {module} {kind} {temperature} {phase}: "
+                  f"{old:.1f} us -> {new:.1f} us")
+        exit_code = 5 if regressions else 0
+
+    history["runs"].append({
+        "timestamp": str(datetime.now()),
+        "directory": str(path),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "results": results,
+    })
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(history_file), "wt", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    print(f"results appended to: {history_file}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+""" Load test of the PyTask framework: thousands of concurrent tasks under
+random pause, resume and abort storms.
+
+Summary:
+The tests under 'pep_560_ex2/py_3_10/tests' check the behaviour of single
+tasks. This script runs a mix of their task classes (SimpleTask,
+InterruptableTask and TaskWithInterruptableDelay) concurrently on a
+TaskExecutor, while a storm thread repeatedly picks random tasks and pauses,
+resumes or aborts them. It reports:
+    * transitions_per_s: state transitions of all tasks per second,
+    * pause / abort latency p50 & p99: time from the request (Pausing /
+      Aborting) until Paused / Aborted, from the task tracing histograms,
+    * request_p99_ms: time a pause / resume / abort call takes,
+    * lock_busy_fraction: fraction of probes that found the state machine lock
+      of a task held, i.e. how often a request has to wait for the lock,
+    * memory_per_task_bytes: memory allocated per task created, with its
+      subscriptions and tracing (measured separately with tracemalloc).
+
+The sleeps of the test tasks (seconds) are scaled down by --sleep_scale, so
+the framework is measured rather than the sleeps.
+
+The metrics can be stored as a baseline (--write_baseline) and later runs
+compared against it: a metric that is worse by more than --threshold (and
+more than its noise floor) is a regression, and the exit code is non-zero.
+Rejected requests (e.g. resuming a task that just completed) are expected
+under storms and counted, not errors.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import platform
+import threading
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Set, Tuple
+
+try:
+    from .ab_harness import FLAVOURS, PYTASK, REPO_ROOT, Importer, create_importer
+except ImportError:  # run as a script
+    from ab_harness import FLAVOURS, PYTASK, REPO_ROOT, Importer, create_importer
+
+# Metric -> (higher is better, noise floor: differences below it are not regressions).
+METRICS: Dict[str, Tuple[bool, float]] = {
+    "transitions_per_s": (True, 0.0),
+    "pause_latency_p50_ms": (False, 1.0),
+    "pause_latency_p99_ms": (False, 5.0),
+    "abort_latency_p50_ms": (False, 1.0),
+    "abort_latency_p99_ms": (False, 5.0),
+    "request_p99_ms": (False, 1.0),
+    "lock_busy_fraction": (False, 0.02),
+    "memory_per_task_bytes": (False, 256.0),
+}
+
+# Name of the tracing histograms of the tasks, see PyTaskBase.enable_tracing.
+_TRACE_NAME = "load"
+
+
+class LoadConfig(NamedTuple):
+    """ Parameters of a load test run. """
+    flavour: str = "py_version"
+    tasks: int = 10000
+    workers: int = 1000
+    delay_ms: float = 50.0
+    sleep_scale: float = 0.01
+    storm_interval: float = 0.005
+    storm_size: int = 50
+    abort_probability: float = 0.2
+    seed: int = 0
+
+
+class _Framework:
+    """ The classes used from the tree of a flavour, with the sleeps of the
+    test tasks scaled down while in use (context manager).
+    """
+    def __init__(self, import_: Importer, config: LoadConfig) -> None:
+        self.executor_class = import_(f"{PYTASK}.pytask_executor").TaskExecutor
+        self.registry_class = import_(f"{PYTASK}.pytask_tracing").HistogramRegistry
+        self.state = import_(f"{PYTASK}.pytask_state").PyTaskState
+        exceptions = import_(f"{PYTASK}.pytask_exceptions")
+        self.invalid_state_exception = exceptions.PyTaskInvalidStateException
+        self._modules = [import_(f"{PYTASK}.tests.simple_task"),
+                         import_(f"{PYTASK}.tests.interruptable_task")]
+        self.task_factories = [
+            self._modules[0].SimpleTask,
+            self._modules[1].InterruptableTask,
+            partial(self._modules[1].TaskWithInterruptableDelay, config.delay_ms),
+        ]
+        self._scaled_time = SimpleNamespace(
+            sleep=lambda seconds: time.sleep(seconds * config.sleep_scale))
+
+    def __enter__(self) -> "_Framework":
+        for module in self._modules:
+            module.time = self._scaled_time
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for module in self._modules:
+            module.time = time
+
+
+class _Monitor:
+    """ State change subscriber of all tasks: counts the transitions and
+    keeps the set of running tasks, for the storm.
+    """
+    def __init__(self, running_state) -> None:
+        self._running_state = running_state
+        self._transitions = itertools.count()
+        self.running: Set[Any] = set()
+
+    def on_state_change(self, task, state) -> None:
+        next(self._transitions)
+        if state == self._running_state:
+            self.running.add(task)
+        else:
+            self.running.discard(task)
+
+    def get_transitions(self) -> int:
+        return next(self._transitions)
+
+
+def create_tasks(framework: _Framework, count: int, registry, monitor: _Monitor) -> List[Any]:
+    """ Create the task mix, round robin over the task classes, each with
+    tracing enabled and subscribed to by the monitor.
+    """
+    tasks = []
+    for i in range(count):
+        task = framework.task_factories[i % len(framework.task_factories)]()
+        task.enable_tracing(_TRACE_NAME, registry)
+        task.subscribe_state_change(partial(monitor.on_state_change, task))
+        tasks.append(task)
+    return tasks
+
+
+def measure_memory_per_task(framework: _Framework, config: LoadConfig) -> float:
+    """ Return the memory allocated per task created, in bytes. """
+    count = max(100, config.tasks // 10)
+    registry = framework.registry_class()
+    monitor = _Monitor(framework.state.Running)
+    create_tasks(framework, 3, registry, monitor)  # histograms, caches
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tasks = create_tasks(framework, count, registry, monitor)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del tasks
+    return (after - before) / count
+
+
+class _Storm:
+    """ Pauses or aborts random running tasks until stopped, resuming the
+    paused tasks in the next round.
+    """
+    def __init__(self, framework: _Framework, tasks: List[Any], monitor: _Monitor,
+                 config: LoadConfig, registry) -> None:
+        self._framework = framework
+        self._tasks = tasks
+        self._monitor = monitor
+        self._config = config
+        self._rng = random.Random(config.seed)
+        self._requests = registry.get("storm.request")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="Storm", daemon=True)
+        self.requests = 0
+        self.rejected = 0
+        self.probes = 0
+        self.lock_busy = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        # Nothing may stay paused, else the run never ends.
+        for task in self._tasks:
+            if task.get_state() in (self._framework.state.Pausing, self._framework.state.Paused):
+                self._request(task.resume)
+
+    def _run(self) -> None:
+        paused: List[Any] = []
+        while not self._stop.wait(self._config.storm_interval):
+            for task in paused:
+                self._request(task.resume)
+            running = list(self._monitor.running)
+            sample = self._rng.sample(running, min(self._config.storm_size, len(running)))
+            abort = self._rng.random() < self._config.abort_probability
+            for task in sample:
+                # The state machine lock is private: probed for the contention metric only.
+                lock = task._task_state_machine._lock
+                self.probes += 1
+                if lock.acquire(blocking=False):
+                    lock.release()
+                else:
+                    self.lock_busy += 1
+                self._request(task.abort if abort else task.pause)
+            paused = [] if abort else sample
+
+    def _request(self, request) -> None:
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            request()
+        except self._framework.invalid_state_exception:
+            self.rejected += 1
+        finally:
+            self._requests.record(time.perf_counter() - start)
+
+
+def run_load(config: LoadConfig) -> Dict[str, float]:
+    """ Run the load test. Return the metrics (see METRICS) plus informational
+    counts.
+    """
+    with _Framework(create_importer(config.flavour), config) as framework:
+        memory_per_task = measure_memory_per_task(framework, config)
+
+        registry = framework.registry_class()
+        monitor = _Monitor(framework.state.Running)
+        tasks = create_tasks(framework, config.tasks, registry, monitor)
+        executor = framework.executor_class(max_workers=config.workers)
+        storm = _Storm(framework, tasks, monitor, config, registry)
+
+        start = time.perf_counter()
+        for task in tasks:
+            executor.submit(task)
+        storm.start()
+        # Tasks paused by the storm are resumed by its next round, so all tasks end.
+        executor.join()
+        storm.stop()
+        duration = time.perf_counter() - start
+        executor.shutdown()
+
+    states: Dict[str, int] = {}
+    for task in tasks:
+        states[task.get_state().name] = states.get(task.get_state().name, 0) + 1
+    pause = registry.get(f"{_TRACE_NAME}.pause_latency")
+    abort = registry.get(f"{_TRACE_NAME}.abort_latency")
+    return {
+        "transitions_per_s": monitor.get_transitions() / duration,
+        "pause_latency_p50_ms": pause.percentile(0.5) * 1e3,
+        "pause_latency_p99_ms": pause.percentile(0.99) * 1e3,
+        "abort_latency_p50_ms": abort.percentile(0.5) * 1e3,
+        "abort_latency_p99_ms": abort.percentile(0.99) * 1e3,
+        "request_p99_ms": registry.get("storm.request").percentile(0.99) * 1e3,
+        "lock_busy_fraction": storm.lock_busy / storm.probes if storm.probes else 0.0,
+        "memory_per_task_bytes": memory_per_task,
+        "duration_s": duration,
+        "pauses": pause.count,
+        "aborts": abort.count,
+        "requests": storm.requests,
+        "rejected_requests": storm.rejected,
+        "final_states": states,
+    }
+
+
+def compare_to_baseline(baseline: Dict[str, float], metrics: Dict[str, float],
+                        threshold: float) -> List[Tuple[str, float, float]]:
+    """ Return the metrics that regressed: worse than the baseline by more than
+    the threshold (relative) and the noise floor of the metric (absolute).
+
+    :param baseline: metrics of the baseline run
+    :param metrics: metrics of the current run
+    :param threshold: e.g. 0.2 for 20 %
+    :return [(metric, baseline value, current value)]
+    """
+    regressions = []
+    for name, (higher_is_better, noise_floor) in METRICS.items():
+        if name not in baseline or name not in metrics:
+            continue
+        previous, current = baseline[name], metrics[name]
+        worse_by = previous - current if higher_is_better else current - previous
+        if worse_by > noise_floor and worse_by > threshold * abs(previous):
+            regressions.append((name, previous, current))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Load test the PyTask framework with concurrent tasks and request storms")
+    arg_parser.add_argument("-f", "--flavour", choices=FLAVOURS, default="py_version",
+                            help="tree to test (cy_version must be built)")
+    arg_parser.add_argument("-t", "--tasks", type=int, default=10000, help="number of tasks")
+    arg_parser.add_argument("-w", "--workers", type=int, default=1000,
+                            help="tasks running concurrently")
+    arg_parser.add_argument("-s", "--sleep_scale", type=float, default=0.01,
+                            help="factor applied to the sleeps of the test tasks")
+    arg_parser.add_argument("--seed", type=int, default=0, help="seed of the storms")
+    arg_parser.add_argument("-b", "--baseline", help="baseline JSON file to compare against")
+    arg_parser.add_argument("--write_baseline", action="store_true",
+                            help="store the metrics as the baseline instead of comparing")
+    arg_parser.add_argument("--threshold", type=float, default=0.25,
+                            help="relative change of a metric reported as regression")
+    my_args = arg_parser.parse_args()
+
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    config = LoadConfig(flavour=my_args.flavour, tasks=my_args.tasks, workers=my_args.workers,
+                        sleep_scale=my_args.sleep_scale, seed=my_args.seed)
+    metrics = run_load(config)
+    for name, value in metrics.items():
+        print(f"{name:24} {value}")
+
+    if not my_args.baseline:
+        return 0
+    baseline_file = Path(my_args.baseline)
+    if my_args.write_baseline:
+        baseline_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(str(baseline_file), "wt", encoding="utf-8") as f:
+            json.dump({"timestamp": str(datetime.now()), "python": sys.version,
+                       "platform": platform.platform(), "config": config._asdict(),
+                       "metrics": metrics}, f, indent=2)
+        print(f"baseline written to: {baseline_file}")
+        return 0
+
+    with open(str(baseline_file), "rt", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(baseline["metrics"], metrics, my_args.threshold)
+    for name, previous, current in regressions:
+        print(f"    REGRESSION: {name}: {previous:.3f} -> {current:.3f}")
+    return 5 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
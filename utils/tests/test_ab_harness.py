@@ -0,0 +1,30 @@
+from ..ab_harness import Comparison, bootstrap_speedup, over_budget
+
+
+def test_bootstrap_speedup():
+    baseline = [20.0, 21.0, 19.0, 20.5, 19.5, 20.0, 22.0, 18.0]
+    candidate = [10.0, 10.5, 9.5, 10.25, 9.75, 10.0, 11.0, 9.0]
+
+    speedup, low, high = bootstrap_speedup(baseline, candidate)
+    assert speedup == 2.0
+    assert 1.0 < low <= speedup <= high
+
+    speedup, low, high = bootstrap_speedup(candidate, baseline)
+    assert speedup == 0.5
+    assert low <= speedup <= high < 1.0
+
+    # Reproducible for the same seed.
+    assert bootstrap_speedup(baseline, candidate) == bootstrap_speedup(baseline, candidate)
+
+
+def test_comparison_flag():
+    assert Comparison("a", 2.0, 1.0, 2.0, 1.5, 2.5).flag == ""
+    assert Comparison("b", 1.0, 1.1, 0.9, 0.8, 1.05).flag == "slower?"
+    assert Comparison("c", 1.0, 2.0, 0.5, 0.4, 0.6).flag == "SLOWER"
+
+
+def test_over_budget():
+    results = [Comparison("fast", 0.5, 0.05, 10.0, 9.0, 11.0),
+               Comparison("slow", 0.5, 0.25, 2.0, 1.5, 2.5),
+               Comparison("no_budget", 5.0, 2.0, 2.5, 2.0, 3.0)]
+    assert over_budget(results, {"fast": 100.0, "slow": 100.0}) == ["slow"]
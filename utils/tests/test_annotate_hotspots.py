@@ -0,0 +1,43 @@
+from ..annotate_hotspots import parse_annotated_html, rank_functions, rank_lines
+
+# Trimmed down version of what 'cython --annotate' generates.
+ANNOTATED_HTML = """
+<pre class="cython line score-0">&#xA0;<span class="">1</span>: <span class="k">import</span> math</pre>
+<pre class="cython line score-0">&#xA0;<span class="">2</span>: </pre>
+<pre class="cython line score-6" onclick="toggle(this)">+<span class="">3</span>: <span class="k">def</span> area(r):</pre>
+<pre class='cython code score-6 '>static PyObject *__pyx_pw_4area(PyObject *__pyx_self, PyObject *__pyx_v_r) {
+  __pyx_t_1 = <span class='pyx_c_api'>__Pyx_PyObject_GetAttrStr</span>(__pyx_m, __pyx_n_s_area);
+  <span class='py_macro_api'>Py_DECREF</span>(__pyx_t_1);
+}</pre>
+<pre class="cython line score-17" onclick="toggle(this)">+<span class="">4</span>:     <span class="k">return</span> math.pi * r * r</pre>
+<pre class='cython code score-17 '>  __pyx_t_1 = <span class='pyx_c_api'>__Pyx_GetModuleGlobalName</span>(__pyx_n_s_math);
+  __pyx_t_2 = <span class='py_c_api'>PyNumber_Multiply</span>(__pyx_t_1, __pyx_v_r);
+  __pyx_t_3 = <span class='py_c_api'>PyNumber_Multiply</span>(__pyx_t_2, __pyx_v_r);
+</pre>
+<pre class="cython line score-0">&#xA0;<span class="">5</span>: </pre>
+<pre class="cython line score-0">&#xA0;<span class="">6</span>: <span class="k">class</span> Shape:</pre>
+<pre class="cython line score-2" onclick="toggle(this)">+<span class="">7</span>:     <span class="k">def</span> name(self):</pre>
+<pre class='cython code score-2 '>  <span class='pyx_c_api'>__Pyx_RaiseArgtupleInvalid</span>("name", 1, 1, 1, 0);
+</pre>
+<pre class="cython line score-0">&#xA0;<span class="">8</span>:         <span class="k">return</span> &quot;shape&quot;</pre>
+"""  # noqa: E501
+
+
+def test_parse_annotated_html():
+    scores = parse_annotated_html(ANNOTATED_HTML, "shapes.pyx")
+    assert [(line.lineno, line.function, line.score, line.calls) for line in scores] == [
+        (3, "area", 6, 2),
+        (4, "area", 17, 3),
+        (7, "Shape.name", 2, 1),
+    ]
+    assert scores[1].code == "return math.pi * r * r"
+    assert all(line.source == "shapes.pyx" for line in scores)
+
+
+def test_rank():
+    scores = parse_annotated_html(ANNOTATED_HTML, "shapes.pyx")
+    assert [line.lineno for line in rank_lines(scores)] == [4, 3, 7]
+    assert rank_functions(scores) == [
+        ("shapes.pyx", "area", 23, 5),
+        ("shapes.pyx", "Shape.name", 2, 1),
+    ]
@@ -0,0 +1,74 @@
+import os
+import sys
+from importlib import machinery
+
+from ..compiled_import_hook import ManifestFinder, create_manifest, write_manifest
+
+
+def _create_tree(tmp_path):
+    dist = tmp_path / "fei_hook"
+    (dist / "sub").mkdir(parents=True)
+    (dist / "__init__.py").touch()
+    (dist / "sub" / "__init__.py").touch()
+    (dist / "sub" / "hello.pyx").write_text("GREETING = 'hello'\n")
+    (dist / "sub" / "hello.cpython-311-x86_64-linux-gnu.so").touch()
+    (dist / "not_built.pyx").write_text("GREETING = 'hi'\n")
+    return dist
+
+
+def test_create_manifest(tmp_path):
+    manifest = create_manifest(_create_tree(tmp_path))
+    assert manifest["package"] == "fei_hook"
+    assert list(manifest["modules"]) == ["fei_hook.sub.hello"]
+    entry = manifest["modules"]["fei_hook.sub.hello"]
+    assert entry["source"] == "fei_hook/sub/hello.pyx"
+    assert entry["extension"] == "fei_hook/sub/hello.cpython-311-x86_64-linux-gnu.so"
+    assert entry["size"] == len("GREETING = 'hello'\n")
+
+
+def test_create_manifest_augmented_py(tmp_path):
+    dist = _create_tree(tmp_path)
+    (dist / "sub" / "fast.py").write_text("class Fast:\n    pass\n")
+    (dist / "sub" / "fast.pxd").write_text("cdef class Fast:\n    pass\n")
+    (dist / "sub" / "fast.cpython-311-x86_64-linux-gnu.so").touch()
+
+    manifest = create_manifest(dist)
+    assert list(manifest["modules"]) == ["fei_hook.sub.fast", "fei_hook.sub.hello"]
+    assert manifest["modules"]["fei_hook.sub.fast"]["source"] == "fei_hook/sub/fast.py"
+
+
+def test_manifest_finder(tmp_path):
+    dist = _create_tree(tmp_path)
+    rebuilds = []
+    finder = ManifestFinder(write_manifest(dist), rebuild=rebuilds.append)
+
+    assert finder.find_spec("fei_hook") is None
+    assert finder.find_spec("fei_hook.not_built") is None
+    spec = finder.find_spec("fei_hook.sub.hello")
+    assert isinstance(spec.loader, machinery.ExtensionFileLoader)
+
+    # Touched but unchanged source: still fresh.
+    source = dist / "sub" / "hello.pyx"
+    stat = source.stat()
+    os.utime(str(source), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert finder.stale_modules() == []
+
+    # Changed source: falls back to the source & a rebuild is queued.
+    source.write_text("GREETING = 'HELLO'\n")
+    os.utime(str(source), ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert finder.stale_modules() == ["fei_hook.sub.hello"]
+    spec = finder.find_spec("fei_hook.sub.hello")
+    assert isinstance(spec.loader, machinery.SourceFileLoader)
+    finder._executor.shutdown(wait=True)
+    assert rebuilds == [dist.resolve()]
+
+    sys.path.insert(0, str(tmp_path))
+    sys.meta_path.insert(0, finder)
+    try:
+        from fei_hook.sub import hello
+        assert hello.GREETING == "HELLO"
+    finally:
+        sys.meta_path.remove(finder)
+        sys.path.remove(str(tmp_path))
+        for name in ["fei_hook", "fei_hook.sub", "fei_hook.sub.hello"]:
+            sys.modules.pop(name, None)
@@ -0,0 +1,28 @@
+from ..import_benchmark import compare_runs, find_modules
+
+
+def test_find_modules(tmp_path):
+    dist = tmp_path / "fei_xxx"
+    (dist / "sub").mkdir(parents=True)
+    for name in ["__init__.py", "helloA.py", "helloA.pyx", "helloA.cp36-win_amd64.pyd",
+                 "helloA.pdb", "sub/__init__.py", "sub/hello0.pyx",
+                 "sub/hello0.cpython-311-x86_64-linux-gnu.so"]:
+        (dist / name).touch()
+
+    modules = find_modules(dist)
+    assert sorted(modules) == ["fei_xxx.helloA", "fei_xxx.sub.hello0"]
+    assert modules["fei_xxx.helloA"]["source"].endswith("helloA.py")
+    assert modules["fei_xxx.helloA"]["compiled"].endswith(".pyd")
+    assert modules["fei_xxx.sub.hello0"]["source"].endswith("hello0.pyx")
+    assert modules["fei_xxx.sub.hello0"]["compiled"].endswith(".so")
+
+
+def test_compare_runs():
+    previous = {"fei_xxx.helloA": {"compiled": {"cold": {"load": 100.0, "init": 200.0,
+                                                         "first_call": None}}}}
+    current = {"fei_xxx.helloA": {"compiled": {"cold": {"load": 110.0, "init": 400.0,
+                                                        "first_call": 20.0}}},
+               "fei_xxx.helloB": {"source": {"warm": {"load": 1000.0}}}}
+
+    regressions = compare_runs(previous, current, threshold=0.2)
+    assert regressions == [("fei_xxx.helloA", "compiled", "cold", "init", 200.0, 400.0)]
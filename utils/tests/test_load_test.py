@@ -0,0 +1,30 @@
+from ..load_test import METRICS, LoadConfig, compare_to_baseline, run_load
+
+
+def test_run_load():
+    config = LoadConfig(tasks=60, workers=20, storm_size=5)
+    metrics = run_load(config)
+
+    assert set(METRICS) <= set(metrics)
+    assert sum(metrics["final_states"].values()) == config.tasks
+    assert set(metrics["final_states"]) <= {"Completed", "Aborted"}
+    assert metrics["transitions_per_s"] > 0.0
+    assert metrics["memory_per_task_bytes"] > 0.0
+
+
+def test_compare_to_baseline():
+    baseline = {"transitions_per_s": 1000.0, "pause_latency_p99_ms": 20.0,
+                "lock_busy_fraction": 0.01}
+
+    assert compare_to_baseline(baseline, dict(baseline), 0.25) == []
+    # Higher is better.
+    assert compare_to_baseline(baseline, dict(baseline, transitions_per_s=2000.0), 0.25) == []
+    assert compare_to_baseline(baseline, dict(baseline, transitions_per_s=700.0), 0.25) == [
+        ("transitions_per_s", 1000.0, 700.0)]
+    # Lower is better.
+    assert compare_to_baseline(baseline, dict(baseline, pause_latency_p99_ms=30.0), 0.25) == [
+        ("pause_latency_p99_ms", 20.0, 30.0)]
+    # Within the noise floor, although relatively much worse.
+    assert compare_to_baseline(baseline, dict(baseline, lock_busy_fraction=0.02), 0.25) == []
+    # Metrics missing on either side are skipped.
+    assert compare_to_baseline({}, dict(baseline, transitions_per_s=1.0), 0.25) == []